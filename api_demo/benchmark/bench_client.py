@@ -0,0 +1,135 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import itertools
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.api.datasource_api import DatasourceAPI
+from common.api.process_instance_api import ProcessInstanceAPI
+from common.api.project_api import ProjectAPI
+from common.enums.data_quality import ComparisonType, ConnectorType, Rule
+from common.testing.stub_data import StubData
+from common.testing.stub_server import StubAPIServer
+from common.utils.bench_util import MODES, SERIAL, compare_results, load_results, measure, save_results
+from common.utils.dq_sql_util import TRNIO_ENV_VARS, build_trnio_sql
+
+PAGE_SIZE = 10
+LOG_LIMIT = 50
+# Fewest operations of a scenario, fewer samples make the comparison with a baseline noisy
+MIN_SAMPLES = 50
+
+def rule_input_parameters(count: int):
+    """Distinct null check parameters, one table per rule"""
+    return [{
+        'src_connector_type': ConnectorType.TRINO.value, 'src_datasource_id': 1, 'src_catalog': 'hive',
+        'src_database': 'dw', 'src_table': f"table_{i}", 'src_field': 'id', 'src_filter': '',
+        'check_type': '0', 'operator': '3', 'threshold': '0', 'failure_strategy': '0',
+        'comparison_type': ComparisonType.FixValue.id,
+    } for i in range(count)]
+
+def download_log(api: ProjectAPI, task_instance_id: int) -> str:
+    """Download a whole task log, LOG_LIMIT lines per request like log/query_task_instance_log.py"""
+    log, skip_line_num = "", 0
+    while True:
+        data = api._get_request("log/detail", params={'taskInstanceId': task_instance_id,
+                                                      'skipLineNum': skip_line_num, 'limit': LOG_LIMIT},
+                                operation_name=f"Query log of task instance {task_instance_id}")
+        message = (data or {}).get('message')
+        if not message:
+            return log
+        log += message
+        skip_line_num = data.get('lineNum')
+
+def scenarios(server: StubAPIServer, ops: int):
+    """(name, func, items, concurrent) of every benchmarked operation"""
+    data = server.data
+    project_api = ProjectAPI(server.url, server.token, timeout=30)
+    datasource_api = DatasourceAPI(server.url, server.token, timeout=30)
+    instance_api = ProcessInstanceAPI(server.url, server.token, timeout=30)
+
+    def cycle(values):
+        return list(itertools.islice(itertools.cycle(values), ops))
+
+    pages = [(code, page_no) for code in data.projects
+             for page_no in range(1, len(data.list_process_instances(code)) // PAGE_SIZE + 2)]
+    task_instance_ids = [t['id'] for tasks in data.task_instances.values() for t in tasks]
+    healthy = [i for i, d in data.datasources.items() if d['healthy']]
+    rules = rule_input_parameters(ops)
+
+    return [
+        ('request', lambda _: project_api._request('GET', 'projects/created-and-authed'), range(ops), True),
+        ('project_fanout', project_api.get_project, cycle(list(data.projects)), True),
+        ('datasource_fanout', datasource_api.connect_test_datasource, cycle(healthy), True),
+        ('paging', lambda page: instance_api.list_process_instances(page[0], page[1], PAGE_SIZE), cycle(pages), True),
+        ('log_download', lambda task: download_log(project_api, task), cycle(task_instance_ids)[:max(MIN_SAMPLES, ops // 10)], True),
+        ('trnio_sql', lambda p: build_trnio_sql(Rule.NULL_CHECK.id, p), rules, False),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API clients against a local stub server")
+    parser.add_argument("--ops", type=int, default=200, help="operations per scenario and mode")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma separated modes: serial, pooled, async")
+    parser.add_argument("--scenarios", help="comma separated scenarios, all by default")
+    parser.add_argument("--concurrency", type=int, default=8, help="calls in flight in the pooled and async modes")
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds added by the stub server to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="upper bound of a random extra delay")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare with the results saved in this file")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+    if any(m not in MODES for m in modes):
+        print(f"Invalid modes: {args.modes}, expected some of {', '.join(MODES)}")
+        sys.exit(1)
+    selected = set(args.scenarios.split(',')) if args.scenarios else None
+
+    # SQL 生成依赖的环境变量
+    for key, env in TRNIO_ENV_VARS.items():
+        os.environ.setdefault(env, f"bench_{key}")
+
+    results = []
+    data = StubData(seed=0, projects=4, definitions_per_project=5, instances_per_definition=20)
+    with StubAPIServer(data, latency=args.latency, jitter=args.jitter) as server:
+        print("{:<18} {:<7} {:>6} {:>7} {:>10} {:>9} {:>9} {:>9}".format(
+            "scenario", "mode", "ops", "errors", "ops/s", "p50 ms", "p95 ms", "p99 ms"))
+        for name, func, items, concurrent in scenarios(server, args.ops):
+            if selected and name not in selected:
+                continue
+            for mode in (modes if concurrent else [SERIAL]):
+                result = measure(name, mode, func, items, args.concurrency)
+                results.append(result)
+                print("{:<18} {:<7} {:>6} {:>7} {:>10.1f} {:>9.2f} {:>9.2f} {:>9.2f}".format(
+                    name, mode, result.ops, result.errors, result.throughput,
+                    result.percentile(50) * 1000, result.percentile(95) * 1000, result.percentile(99) * 1000))
+        print(f"{server.request_count()} requests served")
+
+    if args.output:
+        save_results(args.output, results, vars(args))
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        # 与基线对比，吞吐下降或 p95 延迟上升超过容差视为回退
+        comparisons = compare_results(results, load_results(args.baseline), args.tolerance)
+        print("\n{:<18} {:<7} {:>10} {:>10} {:>9} {:>9} {:>7}  {}".format(
+            "scenario", "mode", "ops/s", "change", "p95 ms", "change", "errors", "status"))
+        for c in comparisons:
+            print("{:<18} {:<7} {:>10.1f} {:>10} {:>9.2f} {:>9} {:>7}  {}".format(
+                c['scenario'], c['mode'], c['ops_per_s'], _percent(c['throughput_change']),
+                c['p95_ms'], _percent(c['p95_change']), f"{c['errors']}/{c['base_errors']}",
+                "REGRESSION" if c['regression'] else "ok"))
+        regressions = [c for c in comparisons if c['regression']]
+        if regressions:
+            print(f"{len(regressions)} regressions beyond {args.tolerance:.0%} against {args.baseline}")
+            sys.exit(1)
+
+def _percent(change) -> str:
+    return "-" if change is None else f"{change:+.1%}"
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import random
+import sys
+import os
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.utils.dag_util import ProcessDAG
+from common.utils.layout_util import count_crossings, layered_layout
+
+def synthetic_dag(num_tasks: int, width: int, fan_in: int, seed: int = 0) -> ProcessDAG:
+    """
+    Random layered DAG: tasks are dealt into layers of about width tasks,
+    and every task depends on up to fan_in tasks of the previous layers
+    """
+    rng = random.Random(seed)
+    task_definitions = [{'code': i + 1, 'name': f"task_{i}", 'timeout': rng.randint(0, 60)} for i in range(num_tasks)]
+    task_relations = []
+    for i in range(width, num_tasks):
+        window = range(max(0, i - i % width - 2 * width), i - i % width)
+        for p in rng.sample(window, min(fan_in, len(window))):
+            task_relations.append({'preTaskCode': p + 1, 'postTaskCode': i + 1})
+    return ProcessDAG.from_definition(task_definitions, task_relations)
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DAG validation and layered layout on synthetic DAGs")
+    parser.add_argument("--sizes", default="100,1000,5000,20000", help="comma separated numbers of tasks")
+    parser.add_argument("--width", type=int, default=50, help="approximate number of tasks per layer")
+    parser.add_argument("--fan-in", type=int, default=2, help="predecessors per task")
+    parser.add_argument("--crossings-limit", type=int, default=5000, help="largest DAG to count crossings for")
+    args = parser.parse_args()
+
+    print("{:>8} {:>8} {:>10} {:>10} {:>10} {:>10} {:>12} {:>12}".format(
+        "tasks", "edges", "build ms", "valid ms", "layout ms", "json ms", "crossings0", "crossings"))
+    for size in (int(x) for x in args.sizes.split(',')):
+        dag, build_ms = timed(synthetic_dag, size, args.width, args.fan_in)
+        _, validate_ms = timed(dag.validate)
+        positions, layout_ms = timed(layered_layout, dag)
+        _, json_ms = timed(lambda: json.dumps(dag.to_locations(positions)))
+
+        edges = sum(len(s) for s in dag.adjacency()[0])
+        crossings_before = crossings_after = "-"
+        if size <= args.crossings_limit:
+            crossings_before = count_crossings(dag, layered_layout(dag, sweeps=0))
+            crossings_after = count_crossings(dag, positions)
+
+        print("{:>8} {:>8} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.1f} {:>12} {:>12}".format(
+            size, edges, build_ms, validate_ms, layout_ms, json_ms, crossings_before, crossings_after))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import gc
+import json
+import sys
+import os
+import time
+import tracemalloc
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.models.process_instance import ProcessInstance, TaskInstance
+from common.testing.stub_data import StubData
+
+def payload(records, count: int) -> bytes:
+    """JSON array of count records, cycled from the samples with distinct ids"""
+    items = []
+    for i in range(count):
+        record = dict(records[i % len(records)])
+        record['id'] = i + 1
+        items.append(record)
+    return json.dumps(items).encode('utf-8')
+
+def retained(build):
+    """Bytes still allocated by build() once it returned, and its seconds"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the memory of API records held as dicts and as models")
+    parser.add_argument("--count", type=int, default=100000, help="records per entity")
+    args = parser.parse_args()
+
+    data = StubData(projects=2, definitions_per_project=5, tasks_per_definition=4, instances_per_definition=20)
+    samples = {
+        ProcessInstance: [i for p in data.projects for i in data.list_process_instances(p)],
+        TaskInstance: [t for tasks in data.task_instances.values() for t in tasks],
+    }
+
+    print("{:<16} {:<10} {:>10} {:>12} {:>12} {:>10}".format("entity", "form", "records", "MB", "bytes/rec", "ms"))
+    for model, records in samples.items():
+        body = payload(records, args.count)
+        keys = frozenset(key for _, key in model.FIELDS)
+        for form, build in (
+                ('dict', lambda: json.loads(body)),
+                ('filtered', lambda: [{k: v for k, v in r.items() if k in keys} for r in json.loads(body)]),
+                ('model', lambda: model.from_list(json.loads(body)))):
+            size, elapsed = retained(build)
+            print("{:<16} {:<10} {:>10} {:>12.1f} {:>12.0f} {:>10.0f}".format(
+                model.__name__, form, args.count, size / 2 ** 20, size / args.count, elapsed * 1000))
+
+if __name__ == '__main__':
+    main()
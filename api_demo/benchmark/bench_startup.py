@@ -0,0 +1,130 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import socket
+import subprocess
+import sys
+import os
+import time
+
+# 添加项目根目录到 Python 路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from common.testing.stub_server import DEFAULT_TOKEN
+from common.utils.bench_util import SERIAL, BenchResult, compare_results, load_results, measure, save_results
+
+# Modules whose import time is reported, third-party ones first
+IMPORTED_MODULES = ('requests', 'yaml', 'dotenv', 'numpy', 'common.utils.config_util', 'common.api.base_api',
+                    'common.api.project_api', 'common.services.deployment', 'common.services.project_snapshot', 'cli')
+
+def start_server():
+    """Stub server in a child process, its startup is not measured"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    script = os.path.join(ROOT, 'benchmark', 'run_stub_server.py')
+    process = subprocess.Popen([sys.executable, script, '--port', str(port), '--projects', '2',
+                                '--instances', '0', '--running', '0', '--datasources', '2'],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    # 等待服务启动完成
+    for line in process.stdout:
+        if 'process definitions' in line:
+            break
+    return process, f"http://127.0.0.1:{port}/dolphinscheduler"
+
+def import_ms(module: str) -> float:
+    """Cumulative import time of a module in a fresh interpreter, from -X importtime"""
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stderr
+    for line in reversed(output.splitlines()):
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1000
+    raise ValueError(f"No import time of {module}")
+
+def commands(project_code: str):
+    """(group, command, args) of read-only commands typical of shell loops"""
+    return [
+        ('project', 'query_all_project_list', []),
+        ('project', 'query_project_info_by_project_code', [project_code]),
+        ('process-definition', 'query_process_definition_list_by_project_code', [project_code]),
+        ('schedule', 'query_schedule_list', [project_code]),
+    ]
+
+def run(argv, env, stdin=None):
+    process = subprocess.run([sys.executable] + argv, cwd=ROOT, env=env, input=stdin,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if process.returncode:
+        raise RuntimeError(f"{' '.join(argv)} exited with {process.returncode}: {process.stderr.strip()}")
+
+def measure_batch(items, batch_size: int, env) -> BenchResult:
+    """One cli.py batch process per batch_size commands, latency per command"""
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for i in range(0, len(items), batch_size):
+        chunk = items[i:i + batch_size]
+        lines = "".join(f"{group} {command} {' '.join(args)}\n" for group, command, args in chunk)
+        chunk_start = time.perf_counter()
+        try:
+            run(['cli.py', 'batch'], env, lines)
+            latencies += [(time.perf_counter() - chunk_start) / len(chunk)] * len(chunk)
+        except RuntimeError:
+            errors += len(chunk)
+    return BenchResult('batch', SERIAL, len(items), errors, time.perf_counter() - start, latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the startup cost of the scripts, run directly, "
+                                                 "through cli.py and in cli.py batches")
+    parser.add_argument("--repeat", type=int, default=5, help="runs of every command")
+    parser.add_argument("--batch-size", type=int, default=20, help="commands per cli.py batch process")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="compare with the JSON results of a previous run")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative change reported as a regression")
+    args = parser.parse_args()
+
+    imports = {module: import_ms(module) for module in IMPORTED_MODULES}
+    print("{:<36} {:>10}".format("module", "import ms"))
+    for module, ms in imports.items():
+        print("{:<36} {:>10.1f}".format(module, ms))
+
+    process, url = start_server()
+    try:
+        env = dict(os.environ, DOLPHINSCHEDULER_SERVER_URL=url, DOLPHINSCHEDULER_USER_TOKEN=DEFAULT_TOKEN)
+        sys.path.insert(0, ROOT)
+        from common.api.project_api import ProjectAPI
+        project_code = str(ProjectAPI(url, DEFAULT_TOKEN).list_all_projects()[0]['code'])
+        items = commands(project_code) * args.repeat
+
+        results = [
+            measure('script', SERIAL, lambda c: run([os.path.join(c[0], c[1] + '.py')] + c[2], env), items),
+            measure('cli', SERIAL, lambda c: run(['cli.py', c[0], c[1]] + c[2], env), items),
+            measure_batch(items, args.batch_size, env),
+        ]
+    finally:
+        process.terminate()
+        process.wait()
+
+    print("\n{:<10} {:>6} {:>7} {:>10} {:>9} {:>9}".format("scenario", "ops", "errors", "ops/s", "p50 ms", "p95 ms"))
+    for result in results:
+        print("{:<10} {:>6} {:>7} {:>10.1f} {:>9.2f} {:>9.2f}".format(
+            result.scenario, result.ops, result.errors, result.throughput,
+            result.percentile(50) * 1000, result.percentile(95) * 1000))
+
+    if args.output:
+        save_results(args.output, results, dict(vars(args), import_ms=imports))
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        # 与基线对比，吞吐下降或 p95 延迟上升超过容差视为回退
+        comparisons = compare_results(results, load_results(args.baseline), args.tolerance)
+        regressions = [c for c in comparisons if c['regression']]
+        for c in regressions:
+            print(f"REGRESSION {c['scenario']}: {c['ops_per_s']:.1f} ops/s, p95 {c['p95_ms']:.2f} ms")
+        if regressions:
+            print(f"{len(regressions)} regressions beyond {args.tolerance:.0%} against {args.baseline}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
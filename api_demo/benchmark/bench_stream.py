@@ -0,0 +1,81 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import socket
+import subprocess
+import sys
+import os
+import time
+import tracemalloc
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.api.process_definition_api import ProcessDefinitionAPI
+from common.api.project_api import ProjectAPI
+from common.testing.stub_server import DEFAULT_TOKEN
+
+def start_server(definitions: int, tasks: int):
+    """
+    Stub server in a child process, so that neither its time nor its
+    allocations are counted with the client's
+    """
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'run_stub_server.py')
+    process = subprocess.Popen([sys.executable, script, '--port', str(port), '--projects', '1',
+                                '--definitions', str(definitions), '--tasks', str(tasks), '--instances', '0',
+                                '--running', '0', '--datasources', '0'],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    # 等待服务启动完成
+    for line in process.stdout:
+        if 'process definitions' in line:
+            break
+    return process, f"http://127.0.0.1:{port}/dolphinscheduler"
+
+def consume(call):
+    """Call and count the items, return (count, seconds to the first item)"""
+    start = time.perf_counter()
+    first, count = None, 0
+    for _ in call():
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    return count, first or 0.0
+
+def profiled(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count, first = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, first, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare buffered and streaming parsing of large list responses")
+    parser.add_argument("--definitions", default="100,1000,5000", help="comma separated numbers of process definitions")
+    parser.add_argument("--tasks", type=int, default=20, help="tasks per process definition")
+    args = parser.parse_args()
+
+    print("{:>12} {:<10} {:>10} {:>12} {:>10} {:>10}".format(
+        "definitions", "mode", "items", "first ms", "total ms", "peak MB"))
+    for size in (int(x) for x in args.definitions.split(',')):
+        process, url = start_server(size, args.tasks)
+        try:
+            project_code = ProjectAPI(url, DEFAULT_TOKEN).list_all_projects()[0]['code']
+            api = ProcessDefinitionAPI(url, DEFAULT_TOKEN)
+            for mode, func in (
+                    ('buffered', lambda: consume(lambda: api.list_all_process_definitions(project_code))),
+                    ('streaming', lambda: consume(lambda: api.iter_all_process_definitions(project_code)))):
+                count, first, elapsed, peak = profiled(func)
+                print("{:>12} {:<10} {:>10} {:>12.1f} {:>10.1f} {:>10.1f}".format(
+                    size, mode, count, first * 1000, elapsed * 1000, peak / 2 ** 20))
+        finally:
+            process.terminate()
+            process.wait()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import sys
+import os
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.testing.stub_data import StubData
+from common.testing.stub_server import DEFAULT_TOKEN, StubAPIServer
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local stand-in of the DolphinScheduler API with generated data")
+    parser.add_argument("--host", default="127.0.0.1", help="bound address")
+    parser.add_argument("--port", type=int, default=12345, help="bound port, 0 for any free port")
+    parser.add_argument("--token", default=DEFAULT_TOKEN, help="expected user token")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated data and injected faults")
+    parser.add_argument("--projects", type=int, default=2, help="number of projects")
+    parser.add_argument("--definitions", type=int, default=5, help="process definitions per project")
+    parser.add_argument("--tasks", type=int, default=4, help="tasks per process definition")
+    parser.add_argument("--instances", type=int, default=20, help="finished process instances per definition")
+    parser.add_argument("--running", type=int, default=1, help="running process instances per definition")
+    parser.add_argument("--datasources", type=int, default=10, help="number of datasources")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="upper bound of a random extra delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failing in the envelope")
+    parser.add_argument("--http-error-rate", type=float, default=0.0, help="share of requests failing with HTTP 500")
+    parser.add_argument("--no-compress", action="store_true", help="never compress the responses")
+    args = parser.parse_args()
+
+    # 生成模拟数据
+    data = StubData(seed=args.seed, projects=args.projects, definitions_per_project=args.definitions,
+                    tasks_per_definition=args.tasks, instances_per_definition=args.instances,
+                    running_instances=args.running, datasources=args.datasources)
+    server = StubAPIServer(data, token=args.token, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, http_error_rate=args.http_error_rate,
+                           compress_min_bytes=None if args.no_compress else 1024,
+                           seed=args.seed, host=args.host, port=args.port)
+    with server:
+        print(f"DOLPHINSCHEDULER_SERVER_URL={server.url}")
+        print(f"DOLPHINSCHEDULER_USER_TOKEN={server.token}")
+        print(f"{len(data.projects)} projects, {len(data.definitions)} process definitions, "
+              f"{len(data.process_instances)} process instances, {len(data.datasources)} datasources", flush=True)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print(f"\n{server.request_count()} requests served")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Single entry point of the demo scripts
+
+    cli.py list [group]                      list the commands
+    cli.py <group> <command> [args...]       run one script, e.g. cli.py project query_all_project_list
+    cli.py batch [--file F] [--keep-going]   run one command per line of stdin or F in this process
+
+Commands are the scripts of the group directories, discovered without
+importing them; only the modules of the command that runs are imported.
+A batch imports requests and the common modules once for all its
+commands, and shares one connection pool between them.
+"""
+
+import os
+import runpy
+import shlex
+import sys
+import traceback
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Directories that are not command groups
+EXCLUDED_DIRS = ('common', '__pycache__')
+
+def discover_commands() -> dict:
+    """Group -> command -> script path; nested commands are named dir/script"""
+    groups = {}
+    for entry in sorted(os.scandir(ROOT), key=lambda e: e.name):
+        if not entry.is_dir() or entry.name in EXCLUDED_DIRS or entry.name.startswith('.'):
+            continue
+        commands = {}
+        for dirpath, dirnames, filenames in os.walk(entry.path):
+            dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS)
+            for filename in sorted(filenames):
+                if filename.endswith('.py') and not filename.startswith('_'):
+                    path = os.path.join(dirpath, filename)
+                    commands[os.path.relpath(path, entry.path)[:-3].replace(os.sep, '/')] = path
+        if commands:
+            groups[entry.name] = commands
+    return groups
+
+def resolve(groups: dict, group: str, command: str) -> str:
+    """
+    Script path of a command, '.py' suffix and '-' for '_' are accepted
+
+    Raises:
+        ValueError: If the group or the command is unknown
+    """
+    if group not in groups:
+        raise ValueError(f"Unknown group '{group}', expected one of {', '.join(groups)}")
+    command = command[:-3] if command.endswith('.py') else command
+    commands = groups[group]
+    path = commands.get(command) or commands.get(command.replace('-', '_'))
+    if path is None:
+        raise ValueError(f"Unknown command '{command}' of group '{group}', see: cli.py list {group}")
+    return path
+
+def run_script(path: str, args: list) -> int:
+    """
+    Run a script as __main__ in this process
+
+    Returns:
+        Exit code of the script, 1 for an uncaught exception
+    """
+    argv, path_entries = sys.argv, list(sys.path)
+    sys.argv = [path] + list(args)
+    try:
+        runpy.run_path(path, run_name='__main__')
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    finally:
+        # Scripts append the project root to sys.path, once per run
+        sys.argv, sys.path[:] = argv, path_entries
+        sys.stdout.flush()
+
+def run_batch(groups: dict, lines, keep_going: bool) -> int:
+    """
+    Run one command per line, '<group> <command> [args...]'
+
+    Empty lines and lines starting with '#' are skipped. Failed commands
+    are reported on stderr with their line number.
+
+    Returns:
+        0 if every command succeeded, 1 otherwise
+    """
+    from common.api.base_api import BaseAPI
+    import requests
+
+    BaseAPI.default_session = requests.Session()
+    failed = 0
+    try:
+        for number, line in enumerate(lines, 1):
+            words = shlex.split(line, comments=True)
+            if not words:
+                continue
+            try:
+                if len(words) < 2:
+                    raise ValueError("expected <group> <command> [args...]")
+                code = run_script(resolve(groups, words[0], words[1]), words[2:])
+            except ValueError as e:
+                print(f"Invalid command: {e}", file=sys.stderr)
+                code = 1
+            if code:
+                failed += 1
+                print(f"[line {number}] exit {code}: {line.strip()}", file=sys.stderr)
+                if not keep_going:
+                    break
+    finally:
+        BaseAPI.default_session.close()
+        BaseAPI.default_session = None
+    return 1 if failed else 0
+
+def print_commands(groups: dict, group: str = None):
+    for name, commands in groups.items():
+        if group and name != group:
+            continue
+        print(f"{name}:")
+        for command in commands:
+            print(f"  {command}")
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] in ('-h', '--help'):
+        print(__doc__.strip())
+        sys.exit(0 if args else 1)
+
+    # 仅扫描目录，不导入脚本
+    sys.path.insert(0, ROOT)
+    groups = discover_commands()
+    try:
+        if args[0] == 'list':
+            print_commands(groups, args[1] if len(args) > 1 else None)
+            return
+        if args[0] == 'batch':
+            options = args[1:]
+            keep_going = '--keep-going' in options
+            if '--file' in options:
+                index = options.index('--file') + 1
+                if index >= len(options):
+                    raise ValueError("--file expects a path")
+                with open(options[index], 'r') as f:
+                    sys.exit(run_batch(groups, f, keep_going))
+            sys.exit(run_batch(groups, sys.stdin, keep_going))
+        if len(args) < 2:
+            raise ValueError("expected <group> <command> [args...]")
+        sys.exit(run_script(resolve(groups, args[0], args[1]), args[2:]))
+    except ValueError as e:
+        print(f"Invalid command: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+
+from common.analytics.history_store import DATETIME_FORMAT
+from common.api.process_instance_api import ProcessInstanceAPI
+from common.utils.concurrent_util import TaskOutcome, run_bounded
+from common.utils.dag_util import ProcessDAG
+
+# Slack in seconds under which a task counts as critical, times having a 1s resolution
+SLACK_TOLERANCE = 1.0
+
+class TaskTiming(NamedTuple):
+    code: int
+    name: str
+    task_type: str
+    start: float
+    end: float
+    wait: float
+    duration: float
+    slack: float
+    critical: bool
+
+class RunCriticalPath(NamedTuple):
+    process_instance_id: int
+    process_definition_code: int
+    name: str
+    makespan: float
+    path: List[int]
+    tasks: Dict[int, TaskTiming]
+
+    def path_tasks(self) -> List[TaskTiming]:
+        return [self.tasks[code] for code in self.path]
+
+def _epoch(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    return datetime.datetime.strptime(value, DATETIME_FORMAT).timestamp()
+
+def analyze_run(process_instance: Dict, task_instances: List[Dict]) -> RunCriticalPath:
+    """
+    Critical path of a finished run from its real task timings
+
+    The executed DAG is the definition of the run ('dagData') restricted to
+    the tasks that ran. Every task weighs its wait (from the end of its
+    last predecessor, or the start of the run, to its own start) plus its
+    duration; retries of a task are merged from the first start to the
+    last end. A forward and a backward pass give the slack of every task:
+    how much longer it could have taken without delaying the run.
+
+    Args:
+        process_instance: Process instance with 'dagData'
+        task_instances: Task instances of the run
+
+    Returns:
+        RunCriticalPath, times in seconds from the start of the run
+    """
+    dag_data = process_instance.get('dagData') or {}
+    dag = ProcessDAG.from_definition(dag_data.get('taskDefinitionList') or [],
+                                     dag_data.get('processTaskRelationList') or [])
+
+    spans: Dict[int, List[float]] = {}
+    for task in task_instances:
+        start, end = _epoch(task.get('startTime')), _epoch(task.get('endTime'))
+        if start is None or end is None:
+            continue
+        code = int(task.get('taskCode') or 0)
+        span = spans.setdefault(code, [start, end])
+        span[0], span[1] = min(span[0], start), max(span[1], end)
+
+    starts = [span[0] for span in spans.values()]
+    if process_instance.get('startTime'):
+        starts.append(_epoch(process_instance['startTime']))
+    run_start = min(starts, default=0.0)
+    codes = [code for code in dag.topological_order() if code in spans]
+    executed = set(codes)
+
+    # Predecessors among executed tasks only, e.g. skipped condition branches drop out
+    predecessors = {code: [p for p in dag.predecessors(code) if p in executed] for code in codes}
+    successors = {code: [s for s in dag.successors(code) if s in executed] for code in codes}
+
+    wait, duration, finish = {}, {}, {}
+    for code in codes:
+        start, end = spans[code][0] - run_start, spans[code][1] - run_start
+        ready = max((spans[p][1] - run_start for p in predecessors[code]), default=0.0)
+        wait[code] = max(0.0, start - ready)
+        duration[code] = end - start
+        finish[code] = max((finish[p] for p in predecessors[code]), default=0.0) + wait[code] + duration[code]
+
+    makespan = max(finish.values(), default=0.0)
+    latest_finish = {}
+    for code in reversed(codes):
+        latest_finish[code] = min((latest_finish[s] - wait[s] - duration[s] for s in successors[code]),
+                                  default=makespan)
+
+    tasks = {}
+    for code in codes:
+        task = dag.task(code)
+        slack = latest_finish[code] - finish[code]
+        tasks[code] = TaskTiming(code, task.name, task.definition.get('taskType') or '',
+                                 spans[code][0] - run_start, spans[code][1] - run_start,
+                                 wait[code], duration[code], slack, slack <= SLACK_TOLERANCE)
+
+    # Walk back from the last task through the predecessor that finished last
+    path = []
+    if codes:
+        code = max(codes, key=lambda c: finish[c])
+        while code is not None:
+            path.append(code)
+            code = max(predecessors[code], key=lambda p: finish[p], default=None)
+        path.reverse()
+
+    return RunCriticalPath(int(process_instance.get('id') or 0),
+                           int(process_instance.get('processDefinitionCode') or 0),
+                           process_instance.get('name') or '', makespan, path, tasks)
+
+def fetch_and_analyze(project_code: Union[str, int],
+                      process_instance_ids: Iterable[Union[str, int]],
+                      process_instance_api: Optional[ProcessInstanceAPI] = None,
+                      max_workers: int = 8) -> List[TaskOutcome]:
+    """
+    Analyze many runs, fetching each run and its tasks concurrently
+
+    Returns:
+        One TaskOutcome per id, with a RunCriticalPath as result
+    """
+    api = process_instance_api or ProcessInstanceAPI()
+
+    def analyze(process_instance_id):
+        process_instance = api.get_process_instance(project_code, process_instance_id)
+        return analyze_run(process_instance, api.list_task_instances(project_code, process_instance_id))
+
+    return run_bounded(analyze, list(process_instance_ids), max_workers)
+
+class TaskCriticality(NamedTuple):
+    name: str
+    task_type: str
+    runs: int
+    critical_runs: int
+    mean_duration: float
+    mean_wait: float
+    mean_slack: float
+    critical_share: float
+
+def aggregate_criticality(runs: List[RunCriticalPath]) -> List[TaskCriticality]:
+    """
+    How often and how much each task bounded the wall-clock time
+
+    critical_share is the task's time (wait + duration) on the critical
+    path, summed over runs, over the summed makespans: the fraction of the
+    wall-clock time that shortening this task could win back.
+
+    Returns:
+        One entry per task name, highest critical share first
+    """
+    stats: Dict[str, Dict] = {}
+    total_makespan = sum(run.makespan for run in runs) or 1.0
+    for run in runs:
+        on_path = set(run.path)
+        for timing in run.tasks.values():
+            s = stats.setdefault(timing.name, {'task_type': timing.task_type, 'runs': 0, 'critical_runs': 0,
+                                               'duration': 0.0, 'wait': 0.0, 'slack': 0.0, 'critical_time': 0.0})
+            s['runs'] += 1
+            s['duration'] += timing.duration
+            s['wait'] += timing.wait
+            s['slack'] += timing.slack
+            if timing.code in on_path:
+                s['critical_runs'] += 1
+                s['critical_time'] += timing.wait + timing.duration
+
+    report = [TaskCriticality(name, s['task_type'], s['runs'], s['critical_runs'],
+                              s['duration'] / s['runs'], s['wait'] / s['runs'], s['slack'] / s['runs'],
+                              s['critical_time'] / total_makespan)
+              for name, s in stats.items()]
+    report.sort(key=lambda r: -r.critical_share)
+    return report
@@ -0,0 +1,128 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import itertools
+import sqlite3
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasource (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    type TEXT,
+    host TEXT,
+    seen_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS datasource_check (
+    datasource_id INTEGER NOT NULL,
+    checked_at TEXT NOT NULL,
+    ok INTEGER NOT NULL,
+    latency_ms REAL,
+    error TEXT,
+    PRIMARY KEY (datasource_id, checked_at)
+);
+"""
+
+class CheckResult(NamedTuple):
+    datasource_id: int
+    checked_at: str
+    ok: bool
+    latency_ms: float
+    error: Optional[str]
+
+class DatasourceHealth(NamedTuple):
+    datasource_id: int
+    name: str
+    type: str
+    checks: int
+    availability: float
+    last_ok: bool
+    last_error: Optional[str]
+    latency_p50: float
+    latency_p95: float
+    flips: int
+    flapping: bool
+
+class HealthStore:
+    def __init__(self, path: str):
+        """
+        Local SQLite time series of datasource connection tests
+
+        Args:
+            path: Database file, ':memory:' for a throwaway store
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def query(self, sql: str, params: Iterable = ()) -> List[sqlite3.Row]:
+        return self.connection.execute(sql, tuple(params)).fetchall()
+
+    def upsert_datasources(self, datasources: List[Dict], seen_at: str) -> int:
+        """Insert or refresh the datasources listed by a sweep"""
+        rows = [(d['id'], d.get('name'), d.get('type'), d.get('host'), seen_at) for d in datasources]
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO datasource VALUES (?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def record(self, results: List[CheckResult]) -> int:
+        """Append connection test results"""
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO datasource_check VALUES (?, ?, ?, ?, ?)",
+                                        [(r.datasource_id, r.checked_at, int(r.ok), r.latency_ms, r.error)
+                                         for r in results])
+        return len(results)
+
+    def health(self, since: Optional[str] = None, window: int = 20, min_flips: int = 3) -> List[DatasourceHealth]:
+        """
+        Health of every datasource over its last checks
+
+        A datasource is flapping when its result changed at least
+        min_flips times over its last window checks: unlike a source that
+        is just down, it passes often enough to hide the problem.
+
+        Args:
+            since: Only checks at or after ('%Y-%m-%d %H:%M:%S')
+            window: Number of latest checks looked at per datasource
+            min_flips: Smallest number of result changes of a flapping source
+
+        Returns:
+            One entry per datasource, flapping first, then least available
+        """
+        rows = self.query("""
+            SELECT c.datasource_id, COALESCE(d.name, '') AS name, COALESCE(d.type, '') AS type,
+                c.ok, c.latency_ms, c.error
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY datasource_id ORDER BY checked_at DESC) AS recent
+                FROM datasource_check WHERE checked_at >= ?
+            ) c LEFT JOIN datasource d ON d.id = c.datasource_id
+            WHERE c.recent <= ?
+            ORDER BY c.datasource_id, c.checked_at
+        """, (since or '', window))
+        report = []
+        for datasource_id, group in itertools.groupby(rows, key=lambda row: row['datasource_id']):
+            group = list(group)
+            ok = np.array([row['ok'] for row in group], dtype=bool)
+            latencies = np.array([row['latency_ms'] for row in group if row['ok']], dtype=float)
+            p50, p95 = np.percentile(latencies, (50, 95)) if len(latencies) else (np.nan, np.nan)
+            flips = int(np.count_nonzero(ok[1:] != ok[:-1]))
+            last = group[-1]
+            report.append(DatasourceHealth(datasource_id, last['name'], last['type'], len(ok), float(ok.mean()),
+                                           bool(ok[-1]), last['error'], float(p50), float(p95),
+                                           flips, flips >= min_flips))
+        report.sort(key=lambda h: (not h.flapping, h.availability, -h.flips))
+        return report
@@ -0,0 +1,212 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from common.analytics.history_store import HistoryStore, definition_name
+
+METHODS = ('sigma', 'percentile')
+
+# Rows of the percentile window matrix built at once
+PERCENTILE_CHUNK = 65536
+
+class RunHistory(NamedTuple):
+    """Finished runs of all definitions, sorted by definition then start time"""
+    codes: np.ndarray
+    names: List[str]
+    instance_ids: np.ndarray
+    start_times: List[str]
+    durations: np.ndarray
+    timeouts: np.ndarray
+    group_starts: np.ndarray
+
+    def __len__(self):
+        return len(self.durations)
+
+def load_run_history(store: HistoryStore, since: Optional[str] = None, states=('SUCCESS',)) -> RunHistory:
+    """
+    Load the run durations of a HistoryStore into flat arrays
+
+    Args:
+        store: History store
+        since: Only runs started at or after ('%Y-%m-%d %H:%M:%S')
+        states: Only runs in these states
+    """
+    placeholders = ', '.join('?' * len(states))
+    rows = store.query(f"""
+        SELECT process_definition_code, name, id, start_time, duration_seconds, COALESCE(timeout, 0) AS timeout
+        FROM process_instance
+        WHERE duration_seconds IS NOT NULL AND start_time >= ? AND state IN ({placeholders})
+        ORDER BY process_definition_code, start_time, id
+    """, (since or '',) + tuple(states))
+    codes = np.array([row['process_definition_code'] for row in rows], dtype=np.int64)
+    # Index of the first run of the group of every row
+    boundaries = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.empty(0, dtype=np.int64)
+    group_starts = np.repeat(boundaries, np.diff(np.r_[boundaries, len(codes)]))
+    return RunHistory(
+        codes=codes,
+        names=[definition_name(row['name']) for row in rows],
+        instance_ids=np.array([row['id'] for row in rows], dtype=np.int64),
+        start_times=[row['start_time'] for row in rows],
+        durations=np.array([row['duration_seconds'] for row in rows], dtype=float),
+        timeouts=np.array([row['timeout'] for row in rows], dtype=float),
+        group_starts=group_starts,
+    )
+
+def rolling_baseline(history: RunHistory,
+                     window: int = 30,
+                     method: str = 'sigma',
+                     sigma: float = 3.0,
+                     percentile: float = 95) -> Dict[str, np.ndarray]:
+    """
+    Baseline and alert threshold of every run from the runs before it
+
+    Every run is compared with up to `window` previous runs of the same
+    definition. All definitions are computed in one pass over the flat
+    history: prefix sums give rolling means and deviations, and windows
+    never reach across two definitions.
+
+    Args:
+        history: Run history
+        window: Number of previous runs in the baseline
+        method: 'sigma' (mean + sigma * std) or 'percentile' (rolling percentile)
+        sigma: Number of standard deviations
+        percentile: Percentile of the previous runs
+
+    Returns:
+        Dict of arrays indexed like the history: 'count' (runs in the
+        baseline), 'baseline' (mean), 'std' and 'threshold'
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}', expected one of {', '.join(METHODS)}")
+    x = history.durations
+    n = len(x)
+    positions = np.arange(n)
+    count = np.minimum(positions - history.group_starts, window)
+    low = positions - count
+
+    # NOTE: durations are centred on the mean of their definition, so the prefix
+    # sums return to about zero at the end of every definition and the
+    # differences of two of them do not cancel out large values
+    _, groups = np.unique(history.group_starts, return_inverse=True)
+    centre = (np.bincount(groups, weights=x) / np.bincount(groups))[groups] if n else x
+    y = x - centre
+    prefix = np.r_[0.0, np.cumsum(y)]
+    prefix2 = np.r_[0.0, np.cumsum(y * y)]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        centred_mean = (prefix[positions] - prefix[low]) / count
+        variance = (prefix2[positions] - prefix2[low]) / count - centred_mean * centred_mean
+        mean = centred_mean + centre
+    std = np.sqrt(np.maximum(variance, 0.0))
+
+    if method == 'sigma':
+        threshold = mean + sigma * std
+    else:
+        threshold = np.full(n, np.nan)
+        offsets = np.arange(1, window + 1)
+        for begin in range(0, n, PERCENTILE_CHUNK):
+            rows = positions[begin:begin + PERCENTILE_CHUNK]
+            indices = rows[:, None] - offsets[None, :]
+            # NOTE: full windows use the dense percentile, which is much faster
+            # than nanpercentile; only the first runs of a definition need NaN padding
+            full = count[rows] == window
+            if full.any():
+                threshold[rows[full]] = np.percentile(x[indices[full]], percentile, axis=1)
+            partial = ~full & (count[rows] > 0)
+            if partial.any():
+                inside = indices[partial] >= history.group_starts[rows[partial]][:, None]
+                values = np.where(inside, x[np.maximum(indices[partial], 0)], np.nan)
+                threshold[rows[partial]] = np.nanpercentile(values, percentile, axis=1)
+    return {'count': count, 'baseline': mean, 'std': std, 'threshold': threshold}
+
+class RegressionFlag(NamedTuple):
+    process_definition_code: int
+    name: str
+    instance_id: int
+    start_time: str
+    duration: float
+    baseline: float
+    threshold: float
+    timeout_ratio: float
+
+class DefinitionTrend(NamedTuple):
+    process_definition_code: int
+    name: str
+    runs: int
+    baseline: float
+    latest: float
+    drift: float
+    timeout_ratio: float
+    flags: int
+
+class RegressionReport(NamedTuple):
+    flags: List[RegressionFlag]
+    trends: List[DefinitionTrend]
+
+def detect_regressions(history: RunHistory,
+                       window: int = 30,
+                       min_history: int = 10,
+                       method: str = 'sigma',
+                       sigma: float = 3.0,
+                       percentile: float = 95,
+                       min_increase: float = 0.1,
+                       since: Optional[str] = None) -> RegressionReport:
+    """
+    Flag runs slower than their rolling baseline
+
+    A run is flagged if it has at least min_history previous runs, exceeds
+    the threshold of its method and is at least min_increase (relative)
+    above the baseline mean, which ignores noise on very stable workflows.
+
+    Per definition, drift is the mean of the last window runs over the
+    mean of the window before, and timeout_ratio the latest baseline over
+    the timeout of the workflow (0 without timeout).
+
+    Args:
+        history: Run history
+        window: Number of previous runs in the baseline
+        min_history: Smallest baseline for a run to be judged
+        method: 'sigma' or 'percentile'
+        sigma: Number of standard deviations, for 'sigma'
+        percentile: Percentile of the previous runs, for 'percentile'
+        min_increase: Smallest relative increase over the baseline mean
+        since: Only flag runs started at or after, the baseline still uses older runs
+
+    Returns:
+        RegressionReport with the flagged runs, newest first, and the
+        trend of every definition, closest to its timeout first
+    """
+    stats = rolling_baseline(history, window, method, sigma, percentile)
+    x = history.durations
+    with np.errstate(invalid='ignore', divide='ignore'):
+        flagged = ((stats['count'] >= min_history)
+                   & (x > stats['threshold'])
+                   & (x > stats['baseline'] * (1 + min_increase)))
+        timeout_ratio = np.where(history.timeouts > 0, x / (history.timeouts * 60), 0.0)
+    if since:
+        flagged &= np.array([start >= since for start in history.start_times], dtype=bool)
+
+    flags = [RegressionFlag(int(history.codes[i]), history.names[i], int(history.instance_ids[i]),
+                            history.start_times[i], float(x[i]), float(stats['baseline'][i]),
+                            float(stats['threshold'][i]), float(timeout_ratio[i]))
+             for i in np.flatnonzero(flagged)]
+    flags.sort(key=lambda f: f.start_time, reverse=True)
+
+    trends = []
+    boundaries = np.unique(history.group_starts)
+    ends = np.r_[boundaries[1:], len(x)]
+    flag_counts = np.add.reduceat(flagged.astype(np.int64), boundaries) if len(boundaries) else []
+    for begin, end, flag_count in zip(boundaries, ends, flag_counts):
+        recent = x[max(begin, end - window):end]
+        previous = x[max(begin, end - 2 * window):max(begin, end - window)]
+        baseline = float(recent.mean())
+        timeout = history.timeouts[end - 1]
+        trends.append(DefinitionTrend(
+            int(history.codes[begin]), history.names[end - 1], int(end - begin), baseline, float(x[end - 1]),
+            baseline / float(previous.mean()) if len(previous) else 1.0,
+            float(baseline / (timeout * 60)) if timeout > 0 else 0.0,
+            int(flag_count)))
+    trends.sort(key=lambda t: (-t.timeout_ratio, -t.drift))
+    return RegressionReport(flags, trends)
@@ -0,0 +1,368 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# States after which an instance never changes again
+FINAL_STATES = ('SUCCESS', 'FAILURE', 'STOP', 'KILL', 'FORCED_SUCCESS')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS process_instance (
+    id INTEGER PRIMARY KEY,
+    project_code INTEGER NOT NULL,
+    process_definition_code INTEGER NOT NULL,
+    process_definition_version INTEGER,
+    name TEXT,
+    state TEXT,
+    command_type TEXT,
+    schedule_time TEXT,
+    command_start_time TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    duration_seconds REAL,
+    run_times INTEGER,
+    host TEXT,
+    worker_group TEXT,
+    tenant_code TEXT,
+    timeout INTEGER,
+    tasks_synced INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS process_instance_definition ON process_instance (process_definition_code, start_time);
+CREATE INDEX IF NOT EXISTS process_instance_project ON process_instance (project_code, start_time);
+
+CREATE TABLE IF NOT EXISTS task_instance (
+    id INTEGER PRIMARY KEY,
+    process_instance_id INTEGER NOT NULL,
+    project_code INTEGER NOT NULL,
+    task_code INTEGER,
+    task_definition_version INTEGER,
+    name TEXT,
+    task_type TEXT,
+    state TEXT,
+    first_submit_time TEXT,
+    submit_time TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    duration_seconds REAL,
+    queue_seconds REAL,
+    worker_group TEXT,
+    priority TEXT,
+    cpu_quota INTEGER,
+    memory_max INTEGER,
+    host TEXT,
+    retry_times INTEGER
+);
+CREATE INDEX IF NOT EXISTS task_instance_process ON task_instance (process_instance_id);
+CREATE INDEX IF NOT EXISTS task_instance_worker_group ON task_instance (worker_group, start_time);
+
+CREATE TABLE IF NOT EXISTS task_definition (
+    code INTEGER PRIMARY KEY,
+    project_code INTEGER NOT NULL,
+    process_definition_code INTEGER,
+    name TEXT,
+    task_type TEXT,
+    version INTEGER,
+    worker_group TEXT,
+    task_priority TEXT,
+    cpu_quota INTEGER,
+    memory_max INTEGER,
+    timeout INTEGER,
+    fail_retry_times INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    project_code INTEGER PRIMARY KEY,
+    watermark TEXT,
+    synced_at TEXT
+);
+"""
+
+# Columns added after the first release of the schema: table -> [(column, type)]
+ADDED_COLUMNS = {
+    'process_instance': [('timeout', 'INTEGER')],
+}
+
+def seconds_between(start: Optional[str], end: Optional[str]) -> Optional[float]:
+    """Seconds between two '%Y-%m-%d %H:%M:%S' times, None if one is missing"""
+    if not start or not end:
+        return None
+    return (datetime.datetime.strptime(end, DATETIME_FORMAT)
+            - datetime.datetime.strptime(start, DATETIME_FORMAT)).total_seconds()
+
+class HistoryStore:
+    def __init__(self, path: str):
+        """
+        Local SQLite store of process and task instance history
+
+        Times are kept as '%Y-%m-%d %H:%M:%S' strings, which sort like the
+        times, and durations are precomputed in seconds.
+
+        Args:
+            path: Database file, ':memory:' for a throwaway store
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {row['name'] for row in self.query(f"PRAGMA table_info({table})")}
+            for column, column_type in columns:
+                if column not in existing:
+                    self.connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def query(self, sql: str, params: Iterable = ()) -> List[sqlite3.Row]:
+        return self.connection.execute(sql, tuple(params)).fetchall()
+
+    def upsert_process_instances(self, project_code: Union[str, int], instances: List[Dict]) -> int:
+        """
+        Insert or refresh process instances, as listed by ProcessInstanceAPI
+
+        Returns:
+            Number of instances written
+        """
+        rows = [(
+            instance['id'],
+            int(project_code),
+            int(instance.get('processDefinitionCode') or 0),
+            instance.get('processDefinitionVersion'),
+            instance.get('name'),
+            instance.get('state'),
+            instance.get('commandType'),
+            instance.get('scheduleTime'),
+            instance.get('commandStartTime'),
+            instance.get('startTime'),
+            instance.get('endTime'),
+            seconds_between(instance.get('startTime'), instance.get('endTime')),
+            instance.get('runTimes'),
+            instance.get('host'),
+            instance.get('workerGroup'),
+            instance.get('tenantCode'),
+            instance.get('timeout'),
+        ) for instance in instances]
+        with self.connection:
+            # NOTE: tasks are synced again when a finished instance is rerun
+            self.connection.executemany("""
+                INSERT INTO process_instance (id, project_code, process_definition_code, process_definition_version,
+                    name, state, command_type, schedule_time, command_start_time, start_time, end_time,
+                    duration_seconds, run_times, host, worker_group, tenant_code, timeout)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    process_definition_version = excluded.process_definition_version,
+                    state = excluded.state,
+                    start_time = excluded.start_time,
+                    end_time = excluded.end_time,
+                    duration_seconds = excluded.duration_seconds,
+                    tasks_synced = CASE WHEN run_times = excluded.run_times THEN tasks_synced ELSE 0 END,
+                    run_times = excluded.run_times,
+                    host = excluded.host,
+                    timeout = excluded.timeout
+            """, rows)
+        return len(rows)
+
+    def upsert_task_instances(self, project_code: Union[str, int], process_instance_id: int, tasks: List[Dict]) -> int:
+        """
+        Replace the task instances of a process instance
+
+        The process instance is marked as synced if it is finished.
+
+        Returns:
+            Number of task instances written
+        """
+        rows = [(
+            task['id'],
+            process_instance_id,
+            int(project_code),
+            task.get('taskCode'),
+            task.get('taskDefinitionVersion'),
+            task.get('name'),
+            task.get('taskType'),
+            task.get('state'),
+            task.get('firstSubmitTime'),
+            task.get('submitTime'),
+            task.get('startTime'),
+            task.get('endTime'),
+            seconds_between(task.get('startTime'), task.get('endTime')),
+            seconds_between(task.get('submitTime'), task.get('startTime')),
+            task.get('workerGroup'),
+            task.get('taskInstancePriority'),
+            task.get('cpuQuota'),
+            task.get('memoryMax'),
+            task.get('host'),
+            task.get('retryTimes'),
+        ) for task in tasks]
+        placeholders = ', '.join('?' * len(FINAL_STATES))
+        with self.connection:
+            self.connection.execute("DELETE FROM task_instance WHERE process_instance_id = ?", (process_instance_id,))
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO task_instance VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows)
+            self.connection.execute(
+                f"UPDATE process_instance SET tasks_synced = 1 WHERE id = ? AND state IN ({placeholders})",
+                (process_instance_id,) + FINAL_STATES)
+        return len(rows)
+
+    def upsert_task_definitions(self, project_code: Union[str, int], definitions: List[Dict]) -> int:
+        """
+        Insert or refresh the task definitions of process definitions, as
+        listed by ProcessDefinitionAPI.list_all_process_definitions
+
+        Returns:
+            Number of task definitions written
+        """
+        rows = []
+        for definition in definitions:
+            process_definition_code = (definition.get('processDefinition') or {}).get('code')
+            for task in definition.get('taskDefinitionList') or []:
+                rows.append((
+                    task['code'],
+                    int(project_code),
+                    process_definition_code,
+                    task.get('name'),
+                    task.get('taskType'),
+                    task.get('version'),
+                    task.get('workerGroup'),
+                    task.get('taskPriority'),
+                    task.get('cpuQuota'),
+                    task.get('memoryMax'),
+                    task.get('timeout'),
+                    task.get('failRetryTimes'),
+                ))
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO task_definition VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def pending_task_syncs(self, project_code: Union[str, int]) -> List[int]:
+        """Ids of the finished process instances whose tasks are not synced yet"""
+        placeholders = ', '.join('?' * len(FINAL_STATES))
+        rows = self.query(f"""
+            SELECT id FROM process_instance
+            WHERE project_code = ? AND tasks_synced = 0 AND state IN ({placeholders})
+            ORDER BY id
+        """, (int(project_code),) + FINAL_STATES)
+        return [row['id'] for row in rows]
+
+    def watermark(self, project_code: Union[str, int]) -> Optional[str]:
+        rows = self.query("SELECT watermark FROM sync_state WHERE project_code = ?", (int(project_code),))
+        return rows[0]['watermark'] if rows else None
+
+    def update_watermark(self, project_code: Union[str, int]) -> Optional[str]:
+        """
+        Move the high-water mark of a project after a sync
+
+        The mark is the start time of the oldest unfinished instance, so
+        that running instances are fetched again next time, or else the
+        start time of the newest instance.
+
+        Returns:
+            The new watermark
+        """
+        placeholders = ', '.join('?' * len(FINAL_STATES))
+        rows = self.query(f"""
+            SELECT COALESCE(
+                (SELECT MIN(start_time) FROM process_instance
+                 WHERE project_code = ? AND state NOT IN ({placeholders})),
+                (SELECT MAX(start_time) FROM process_instance WHERE project_code = ?)) AS watermark
+        """, (int(project_code),) + FINAL_STATES + (int(project_code),))
+        watermark = rows[0]['watermark']
+        with self.connection:
+            self.connection.execute("""
+                INSERT INTO sync_state (project_code, watermark, synced_at) VALUES (?, ?, ?)
+                ON CONFLICT (project_code) DO UPDATE SET watermark = excluded.watermark, synced_at = excluded.synced_at
+            """, (int(project_code), watermark, datetime.datetime.now().strftime(DATETIME_FORMAT)))
+        return watermark
+
+    def duration_percentiles(self, since: Optional[str] = None,
+                             percentiles: Iterable[float] = (50, 90, 99)) -> List[Dict]:
+        """
+        Duration percentiles of successful runs, per process definition
+
+        Returns:
+            One dict per definition with code, name, runs and p<N> in seconds
+        """
+        percentiles = list(percentiles)
+        rows = self.query("""
+            SELECT process_definition_code, name, duration_seconds FROM process_instance
+            WHERE state = 'SUCCESS' AND duration_seconds IS NOT NULL AND start_time >= ?
+            ORDER BY process_definition_code, start_time
+        """, (since or '',))
+        report = []
+        for code, group in _group_rows(rows, 'process_definition_code'):
+            durations = np.array([row['duration_seconds'] for row in group], dtype=float)
+            entry = {'code': code, 'name': definition_name(group[-1]['name']), 'runs': len(durations)}
+            entry.update({f"p{p:g}": float(v) for p, v in zip(percentiles, np.percentile(durations, percentiles))})
+            report.append(entry)
+        return report
+
+    def failure_rates(self, since: Optional[str] = None) -> List[Dict]:
+        """Runs, failures and failure rate per process definition, worst first"""
+        rows = self.query("""
+            SELECT process_definition_code AS code, MAX(name) AS name, COUNT(*) AS runs,
+                SUM(state = 'FAILURE') AS failures
+            FROM process_instance
+            WHERE start_time >= ? AND state IN ('SUCCESS', 'FAILURE', 'STOP', 'KILL')
+            GROUP BY process_definition_code
+        """, (since or '',))
+        report = [{'code': row['code'], 'name': definition_name(row['name']), 'runs': row['runs'],
+                   'failures': row['failures'], 'failure_rate': row['failures'] / row['runs']} for row in rows]
+        report.sort(key=lambda r: (-r['failure_rate'], -r['runs']))
+        return report
+
+    def queue_times(self, since: Optional[str] = None,
+                    percentiles: Iterable[float] = (50, 90, 99)) -> List[Dict]:
+        """
+        Task queue time (submit to start) percentiles per worker group
+
+        Returns:
+            One dict per worker group with tasks and p<N> in seconds
+        """
+        percentiles = list(percentiles)
+        rows = self.query("""
+            SELECT COALESCE(worker_group, 'default') AS worker_group, queue_seconds FROM task_instance
+            WHERE queue_seconds IS NOT NULL AND start_time >= ?
+            ORDER BY worker_group
+        """, (since or '',))
+        report = []
+        for worker_group, group in _group_rows(rows, 'worker_group'):
+            waits = np.array([row['queue_seconds'] for row in group], dtype=float)
+            entry = {'worker_group': worker_group, 'tasks': len(waits)}
+            entry.update({f"p{p:g}": float(v) for p, v in zip(percentiles, np.percentile(waits, percentiles))})
+            report.append(entry)
+        return report
+
+def _group_rows(rows: List[sqlite3.Row], column: str):
+    group, key = [], None
+    for row in rows:
+        if group and row[column] != key:
+            yield key, group
+            group = []
+        key = row[column]
+        group.append(row)
+    if group:
+        yield key, group
+
+def definition_name(instance_name: Optional[str]) -> str:
+    """Process definition name from an instance name, '<definition>-<version>-<timestamp>'"""
+    if not instance_name:
+        return ''
+    parts = instance_name.rsplit('-', 2)
+    return parts[0] if len(parts) == 3 else instance_name
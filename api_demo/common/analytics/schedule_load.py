@@ -0,0 +1,251 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import math
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+
+import numpy as np
+
+from common.api.process_instance_api import ProcessInstanceAPI
+from common.utils.concurrent_util import fetch_pages
+from common.utils.cron_util import parse_local_time, parse_quartz_cron, shift_crontab, shift_range, to_epoch_seconds
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+HISTORY_PAGE_SIZE = 100
+
+def schedule_fire_times(schedules: List[Dict],
+                        start: Union[datetime.datetime, int],
+                        end: Union[datetime.datetime, int]) -> List[np.ndarray]:
+    """
+    Fire times of every schedule in [start, end), clipped to the schedule
+    start and end time
+
+    Schedules sharing a crontab and timezone are expanded once.
+
+    Args:
+        schedules: Schedules as listed by ScheduleAPI
+        start: Horizon start
+        end: Horizon end
+
+    Returns:
+        One sorted int64 array of epoch seconds per schedule
+
+    Raises:
+        ValueError: If a crontab is invalid
+    """
+    start, end = to_epoch_seconds(start), to_epoch_seconds(end)
+    expanded = {}
+    fires = []
+    for schedule in schedules:
+        timezone = schedule.get('timezoneId') or 'UTC'
+        key = (schedule.get('crontab'), timezone)
+        if key not in expanded:
+            try:
+                expanded[key] = parse_quartz_cron(key[0]).fire_times(start, end, timezone)
+            except ValueError as e:
+                raise ValueError(f"Schedule {schedule.get('id')} ({schedule.get('processDefinitionName')}): {e}") from e
+        times = expanded[key]
+
+        schedule_start = parse_local_time(schedule.get('startTime'), timezone)
+        schedule_end = parse_local_time(schedule.get('endTime'), timezone)
+        if schedule_start is not None or schedule_end is not None:
+            low = np.searchsorted(times, schedule_start) if schedule_start is not None else 0
+            high = np.searchsorted(times, schedule_end, side='right') if schedule_end is not None else len(times)
+            times = times[low:high]
+        fires.append(times)
+    return fires
+
+class LoadForecast:
+    def __init__(self, start: int, starts: np.ndarray, running: np.ndarray):
+        """
+        Per-minute load forecast
+
+        Args:
+            start: Epoch seconds of the first minute
+            starts: Number of workflow starts per minute
+            running: Number of running workflows per minute
+        """
+        self.start = start
+        self.starts = starts
+        self.running = running
+
+    def minute(self, index: int) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.start + index * 60)
+
+    def peaks(self, top: int = 10, by: str = 'starts') -> List[tuple]:
+        """
+        Busiest minutes
+
+        Args:
+            top: Number of minutes
+            by: 'starts' or 'running'
+
+        Returns:
+            List of (local datetime, starts, running), busiest first
+        """
+        values = self.starts if by == 'starts' else self.running
+        top = min(top, len(values))
+        if not top:
+            return []
+        # Stable sort on the negated values keeps earlier minutes first on ties
+        indices = np.argsort(-values, kind='stable')[:top]
+        return [(self.minute(i), int(self.starts[i]), int(self.running[i])) for i in indices if values[i] > 0]
+
+def forecast_load(schedules: List[Dict],
+                  start: Union[datetime.datetime, int],
+                  end: Union[datetime.datetime, int],
+                  durations: Optional[Dict[int, float]] = None,
+                  default_duration: float = 60,
+                  fires: Optional[List[np.ndarray]] = None) -> LoadForecast:
+    """
+    Forecast the per-minute load of schedules over a horizon
+
+    Every fire counts as one start in its minute, and as one running
+    workflow in every minute it is expected to run, from the historical
+    duration of its process definition.
+
+    Args:
+        schedules: Schedules as listed by ScheduleAPI
+        start: Horizon start
+        end: Horizon end
+        durations: Process definition code -> duration in seconds
+        default_duration: Duration of definitions without history
+        fires: Precomputed schedule_fire_times
+
+    Returns:
+        LoadForecast
+    """
+    start, end = to_epoch_seconds(start), to_epoch_seconds(end)
+    start -= start % 60
+    size = max(0, math.ceil((end - start) / 60))
+    if fires is None:
+        fires = schedule_fire_times(schedules, start, end)
+    durations = durations or {}
+
+    minutes = [(times - start) // 60 for times in fires]
+    lengths = [max(1, math.ceil(durations.get(int(s.get('processDefinitionCode') or 0), default_duration) / 60))
+               for s in schedules]
+    if not minutes:
+        return LoadForecast(start, np.zeros(size, dtype=np.int64), np.zeros(size, dtype=np.int64))
+
+    begin = np.concatenate(minutes).astype(np.int64)
+    finish = np.concatenate([m + n for m, n in zip(minutes, lengths)]).astype(np.int64)
+    starts = np.bincount(begin, minlength=size)[:size]
+
+    # Running workflows: +1 at start and -1 after the last minute, then a prefix sum
+    delta = np.bincount(begin, minlength=size + 1)[:size + 1]
+    delta -= np.bincount(np.minimum(finish, size), minlength=size + 1)[:size + 1]
+    running = np.cumsum(delta)[:size]
+    return LoadForecast(start, starts, running)
+
+def historical_durations(project_codes: Iterable[Union[str, int]],
+                         since: datetime.datetime,
+                         until: Optional[datetime.datetime] = None,
+                         process_instance_api: Optional[ProcessInstanceAPI] = None,
+                         max_workers: int = 8) -> Dict[int, float]:
+    """
+    Median duration of the successful runs of each process definition
+
+    Args:
+        project_codes: Projects to scan
+        since: Only runs started after
+        until: Only runs started before, now by default
+        process_instance_api: ProcessInstanceAPI client
+        max_workers: Maximum number of concurrent page requests
+
+    Returns:
+        Process definition code -> duration in seconds
+    """
+    api = process_instance_api or ProcessInstanceAPI()
+    until = until or datetime.datetime.now()
+    query = {
+        'state_type': 'SUCCESS',
+        'start_date': since.strftime(DATETIME_FORMAT),
+        'end_date': until.strftime(DATETIME_FORMAT),
+    }
+
+    def page(project_code, page_no):
+        return api.list_process_instances(project_code, page_no, HISTORY_PAGE_SIZE, **query)
+
+    samples: Dict[int, List[float]] = {}
+    for _, instances in fetch_pages(page, project_codes, HISTORY_PAGE_SIZE, max_workers):
+        for instance in instances:
+            if not instance.get('startTime') or not instance.get('endTime'):
+                continue
+            begin = datetime.datetime.strptime(instance['startTime'], DATETIME_FORMAT)
+            finish = datetime.datetime.strptime(instance['endTime'], DATETIME_FORMAT)
+            samples.setdefault(int(instance['processDefinitionCode']), []).append((finish - begin).total_seconds())
+    return {code: float(np.median(values)) for code, values in samples.items()}
+
+class StaggerSuggestion(NamedTuple):
+    schedule: Dict
+    delay_minutes: int
+    crontab: str
+    new_crontab: str
+    peak_before: int
+    peak_after: int
+
+def suggest_staggers(schedules: List[Dict],
+                     start: Union[datetime.datetime, int],
+                     end: Union[datetime.datetime, int],
+                     max_starts: int = 5,
+                     window_minutes: int = 30,
+                     fires: Optional[List[np.ndarray]] = None) -> List[StaggerSuggestion]:
+    """
+    Suggest delayed crontabs for schedules firing in crowded minutes
+
+    Greedy: schedules are visited from the most crowded minute down. A
+    schedule whose fires meet more than max_starts starts in a minute is
+    delayed by the number of minutes, within the window, that minimizes its
+    most crowded minute. Only crontabs with a single second and minute value
+    can be delayed, and never past the end of their hour.
+
+    Args:
+        schedules: Schedules as listed by ScheduleAPI
+        start: Horizon start
+        end: Horizon end
+        max_starts: Acceptable number of starts per minute
+        window_minutes: Largest delay
+        fires: Precomputed schedule_fire_times
+
+    Returns:
+        Suggestions, for the delayed schedules only
+    """
+    start, end = to_epoch_seconds(start), to_epoch_seconds(end)
+    start -= start % 60
+    size = max(0, math.ceil((end - start) / 60))
+    if fires is None:
+        fires = schedule_fire_times(schedules, start, end)
+
+    minutes = [np.unique((times - start) // 60) for times in fires]
+    starts = np.zeros(size + window_minutes, dtype=np.int64)
+    for m in minutes:
+        np.add.at(starts, m, 1)
+
+    peaks = [int(starts[m].max()) if len(m) else 0 for m in minutes]
+    order = sorted(range(len(schedules)), key=lambda i: (-peaks[i], schedules[i].get('id') or 0))
+
+    suggestions = []
+    for i in order:
+        m = minutes[i]
+        if not len(m):
+            continue
+        peak = int(starts[m].max())
+        if peak <= max_starts:
+            continue
+        crontab = schedules[i].get('crontab') or ''
+        latest = min(window_minutes - 1, shift_range(crontab)[1] // 60)
+        if latest <= 0:
+            continue
+
+        starts[m] -= 1
+        cost = starts[m[:, None] + np.arange(latest + 1)[None, :]].max(axis=0)
+        delay = int(np.argmin(cost))
+        if cost[delay] >= cost[0]:
+            delay = 0
+        starts[m + delay] += 1
+        if delay:
+            suggestions.append(StaggerSuggestion(schedules[i], delay, crontab, shift_crontab(crontab, delay * 60),
+                                                 peak, int(cost[delay]) + 1))
+    return suggestions
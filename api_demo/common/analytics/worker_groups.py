@@ -0,0 +1,306 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from common.analytics.history_store import HistoryStore
+
+HIGH_PRIORITIES = ('HIGHEST', 'HIGH')
+
+class TaskRuns(NamedTuple):
+    """Finished task instances as flat arrays, times in epoch seconds"""
+    task_codes: np.ndarray
+    names: List[str]
+    worker_groups: np.ndarray
+    priorities: np.ndarray
+    cpu_quotas: np.ndarray
+    memory_maxes: np.ndarray
+    failed: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+    queues: np.ndarray
+
+    def __len__(self):
+        return len(self.starts)
+
+def _epochs(values: List[Optional[str]]) -> np.ndarray:
+    times = np.array(values, dtype='datetime64[s]')
+    return np.where(np.isnat(times), np.nan, times.astype(np.int64).astype(float))
+
+def load_task_runs(store: HistoryStore, since: Optional[str] = None) -> TaskRuns:
+    """
+    Load the finished task instances of a HistoryStore
+
+    The worker group is the one the instance ran on; priority and quotas
+    are the current task definition settings when synced, else the ones
+    recorded on the instance.
+
+    Args:
+        store: History store
+        since: Only tasks started at or after ('%Y-%m-%d %H:%M:%S')
+    """
+    rows = store.query("""
+        SELECT t.task_code, t.name, COALESCE(t.worker_group, d.worker_group, 'default') AS worker_group,
+            COALESCE(d.task_priority, t.priority, 'MEDIUM') AS priority,
+            COALESCE(d.cpu_quota, t.cpu_quota, -1) AS cpu_quota,
+            COALESCE(d.memory_max, t.memory_max, -1) AS memory_max,
+            t.state, t.start_time, t.end_time, t.queue_seconds
+        FROM task_instance t LEFT JOIN task_definition d ON d.code = t.task_code
+        WHERE t.start_time IS NOT NULL AND t.end_time IS NOT NULL AND t.start_time >= ?
+        ORDER BY t.start_time, t.id
+    """, (since or '',))
+    starts = _epochs([row['start_time'] for row in rows])
+    ends = _epochs([row['end_time'] for row in rows])
+    return TaskRuns(
+        task_codes=np.array([row['task_code'] or 0 for row in rows], dtype=np.int64),
+        names=[row['name'] or '' for row in rows],
+        worker_groups=np.array([row['worker_group'] for row in rows], dtype=object),
+        priorities=np.array([row['priority'] for row in rows], dtype=object),
+        cpu_quotas=np.array([row['cpu_quota'] for row in rows], dtype=float),
+        memory_maxes=np.array([row['memory_max'] for row in rows], dtype=float),
+        failed=np.array([row['state'] == 'FAILURE' for row in rows], dtype=bool),
+        starts=starts,
+        ends=np.maximum(ends, starts),
+        queues=np.array([np.nan if row['queue_seconds'] is None else row['queue_seconds'] for row in rows],
+                        dtype=float),
+    )
+
+def concurrency_steps(starts: np.ndarray, ends: np.ndarray, weights: Optional[np.ndarray] = None):
+    """
+    Step function of the number (or summed weight) of tasks running
+
+    Tasks ending at the same second as others start do not overlap them.
+
+    Returns:
+        (times, levels): the level from times[i] until times[i + 1]
+    """
+    if weights is None:
+        weights = np.ones(len(starts))
+    times = np.r_[starts, ends]
+    deltas = np.r_[weights, -weights]
+    # Ends before starts at equal times
+    order = np.lexsort((np.r_[np.ones(len(starts)), np.zeros(len(ends))], times))
+    times, levels = times[order], np.cumsum(deltas[order])
+    last = np.r_[times[1:] != times[:-1], True] if len(times) else np.empty(0, dtype=bool)
+    return times[last], levels[last]
+
+def level_at(times: np.ndarray, levels: np.ndarray, at: np.ndarray) -> np.ndarray:
+    """Value of a step function at the given times, 0 before the first step"""
+    index = np.searchsorted(times, at, side='right') - 1
+    return np.where(index >= 0, levels[np.maximum(index, 0)], 0.0)
+
+def _weighted_percentile(values: np.ndarray, weights: np.ndarray, percentile: float) -> float:
+    order = np.argsort(values)
+    cumulative = np.cumsum(weights[order])
+    if not len(cumulative) or cumulative[-1] <= 0:
+        return 0.0
+    return float(values[order][np.searchsorted(cumulative, cumulative[-1] * percentile / 100)])
+
+class GroupUtilization(NamedTuple):
+    worker_group: str
+    tasks: int
+    peak: int
+    mean: float
+    p95: float
+    peak_cpu: float
+    peak_memory: float
+    unlimited_share: float
+    queue_p50: float
+    queue_p95: float
+    queue_p99: float
+    queue_by_priority: Dict[str, float]
+
+class TaskProfile(NamedTuple):
+    task_code: int
+    name: str
+    worker_group: str
+    priority: str
+    cpu_quota: float
+    memory_max: float
+    runs: int
+    failure_rate: float
+    mean_duration: float
+    queue_p95: float
+    contention: float
+
+class Recommendation(NamedTuple):
+    kind: str
+    worker_group: str
+    name: str
+    message: str
+
+class WorkerGroupReport(NamedTuple):
+    groups: List[GroupUtilization]
+    tasks: List[TaskProfile]
+    recommendations: List[Recommendation]
+
+def _group_utilization(runs: TaskRuns, mask: np.ndarray, worker_group: str) -> GroupUtilization:
+    starts, ends = runs.starts[mask], runs.ends[mask]
+    times, levels = concurrency_steps(starts, ends)
+    spans = np.diff(times)
+    busy = levels[:-1]
+    span = spans.sum()
+    cpu = runs.cpu_quotas[mask]
+    memory = runs.memory_maxes[mask]
+    _, cpu_levels = concurrency_steps(starts, ends, np.maximum(cpu, 0))
+    _, memory_levels = concurrency_steps(starts, ends, np.maximum(memory, 0))
+
+    queues = runs.queues[mask]
+    queues = queues[~np.isnan(queues)]
+    p50, p95, p99 = np.percentile(queues, (50, 95, 99)) if len(queues) else (0.0, 0.0, 0.0)
+    by_priority = {}
+    for priority in np.unique(runs.priorities[mask]):
+        waits = runs.queues[mask & (runs.priorities == priority)]
+        waits = waits[~np.isnan(waits)]
+        if len(waits):
+            by_priority[priority] = float(np.percentile(waits, 95))
+
+    return GroupUtilization(
+        worker_group, int(mask.sum()), int(levels.max(initial=0)),
+        float((busy * spans).sum() / span) if span > 0 else float(levels.max(initial=0)),
+        _weighted_percentile(busy, spans, 95),
+        float(cpu_levels.max(initial=0)), float(memory_levels.max(initial=0)),
+        float(((cpu < 0) | (memory < 0)).mean()),
+        float(p50), float(p95), float(p99), by_priority)
+
+def _task_profiles(runs: TaskRuns, concurrency: np.ndarray, min_runs: int) -> List[TaskProfile]:
+    codes, inverse, counts = np.unique(runs.task_codes, return_inverse=True, return_counts=True)
+    durations = runs.ends - runs.starts
+
+    # Correlation of duration and group concurrency at start, all tasks at once
+    def sums(values):
+        return np.bincount(inverse, weights=values, minlength=len(codes))
+    n = counts.astype(float)
+    mean_x, mean_y = sums(concurrency) / n, sums(durations) / n
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sums(concurrency * durations) / n - mean_x * mean_y
+        var_x = sums(concurrency * concurrency) / n - mean_x * mean_x
+        var_y = sums(durations * durations) / n - mean_y * mean_y
+        contention = np.where((var_x > 1e-9) & (var_y > 1e-9), cov / np.sqrt(var_x * var_y), 0.0)
+    failure_rates = sums(runs.failed.astype(float)) / n
+
+    # Settings of the latest run of every task
+    latest = np.zeros(len(codes), dtype=np.int64)
+    np.maximum.at(latest, inverse, np.arange(len(runs)))
+
+    profiles = []
+    for i in np.flatnonzero(counts >= min_runs):
+        queues = runs.queues[inverse == i]
+        queues = queues[~np.isnan(queues)]
+        j = latest[i]
+        profiles.append(TaskProfile(
+            int(codes[i]), runs.names[j], runs.worker_groups[j], runs.priorities[j],
+            float(runs.cpu_quotas[j]), float(runs.memory_maxes[j]), int(counts[i]),
+            float(failure_rates[i]), float(mean_y[i]),
+            float(np.percentile(queues, 95)) if len(queues) else 0.0,
+            float(np.clip(contention[i], -1.0, 1.0))))
+    return profiles
+
+def _quota(value: float, unit: str = '') -> str:
+    return 'unlimited' if value < 0 else f"{value:g}{unit}"
+
+def recommend(groups: List[GroupUtilization],
+              tasks: List[TaskProfile],
+              queue_threshold: float = 60.0,
+              contention_threshold: float = 0.5,
+              failure_threshold: float = 0.2) -> List[Recommendation]:
+    """
+    Provisioning recommendations from group utilization and task profiles
+
+    Without resource usage metrics, provisioning is inferred from timing:
+    a task whose duration grows with the number of tasks running beside
+    it is starved, one that does not care is likely over-provisioned if
+    it reserves more CPU than its neighbours, and a capped task failing
+    often may be hitting its memory limit.
+
+    Args:
+        groups: Worker group utilization
+        tasks: Task profiles
+        queue_threshold: Queue wait p95 in seconds above which a group is congested
+        contention_threshold: Correlation of duration and concurrency above which a task is contention sensitive
+        failure_threshold: Failure rate above which a memory capped task is flagged
+    """
+    congested = {g.worker_group for g in groups if g.queue_p95 > queue_threshold}
+    recommendations = []
+    for g in groups:
+        if g.worker_group in congested:
+            recommendations.append(Recommendation(
+                'scale-group', g.worker_group, '',
+                f"queue wait p95 {g.queue_p95:.0f}s at {g.p95:.0f} concurrent tasks (peak {g.peak}), "
+                f"add workers or stagger the schedules using this group"))
+        high = [p for p in HIGH_PRIORITIES if g.queue_by_priority.get(p, 0.0) > queue_threshold]
+        if high:
+            recommendations.append(Recommendation(
+                'priority', g.worker_group, '',
+                f"{'/'.join(high)} priority tasks still wait {max(g.queue_by_priority[p] for p in high):.0f}s (p95), "
+                f"priority cannot help once the group is saturated, reserve a dedicated group"))
+
+    positive = {}
+    for t in tasks:
+        if t.cpu_quota > 0:
+            positive.setdefault(t.worker_group, []).append(t.cpu_quota)
+    medians = {group: float(np.median(quotas)) for group, quotas in positive.items()}
+
+    for t in tasks:
+        if t.contention >= contention_threshold:
+            action = ("move it to a dedicated worker group" if t.cpu_quota < 0
+                      else f"raise cpuQuota ({t.cpu_quota:g}%) or move it to a dedicated worker group")
+            recommendations.append(Recommendation(
+                'contention', t.worker_group, t.name,
+                f"duration grows with group concurrency (r={t.contention:.2f}), {action}"))
+        if t.worker_group in congested and (t.cpu_quota < 0 or t.memory_max < 0):
+            recommendations.append(Recommendation(
+                'unbounded-quota', t.worker_group, t.name,
+                f"cpuQuota {_quota(t.cpu_quota, '%')} / memoryMax {_quota(t.memory_max, 'MB')} in a congested group, "
+                f"set limits so it cannot starve its neighbours"))
+        if t.memory_max > 0 and t.failure_rate >= failure_threshold:
+            recommendations.append(Recommendation(
+                'under-provisioned', t.worker_group, t.name,
+                f"fails {t.failure_rate:.0%} of runs with memoryMax {t.memory_max:g}MB, check for memory limit kills"))
+        median = medians.get(t.worker_group)
+        if median and t.cpu_quota > 2 * median and abs(t.contention) < contention_threshold / 2:
+            recommendations.append(Recommendation(
+                'over-provisioned', t.worker_group, t.name,
+                f"cpuQuota {t.cpu_quota:g}% is over twice the group median ({median:g}%) while its duration "
+                f"ignores contention (r={t.contention:.2f}), a lower quota is likely enough"))
+    return recommendations
+
+def analyze_worker_groups(runs: TaskRuns,
+                          min_runs: int = 5,
+                          queue_threshold: float = 60.0,
+                          contention_threshold: float = 0.5,
+                          failure_threshold: float = 0.2) -> WorkerGroupReport:
+    """
+    Utilization, queueing and provisioning of the worker groups
+
+    Concurrency over time is swept per worker group from the start and end
+    events of its tasks; means and percentiles are weighted by time. The
+    contention of a task is the correlation of its duration with the
+    concurrency of its group when it started.
+
+    Args:
+        runs: Task runs
+        min_runs: Smallest number of runs for a task to be profiled
+        queue_threshold: See recommend
+        contention_threshold: See recommend
+        failure_threshold: See recommend
+
+    Returns:
+        WorkerGroupReport, groups by queue wait and tasks by contention, worst first
+    """
+    groups = []
+    concurrency = np.zeros(len(runs))
+    for worker_group in np.unique(runs.worker_groups):
+        mask = runs.worker_groups == worker_group
+        groups.append(_group_utilization(runs, mask, worker_group))
+        times, levels = concurrency_steps(runs.starts[mask], runs.ends[mask])
+        # Tasks running beside each one when it started
+        concurrency[mask] = level_at(times, levels, runs.starts[mask]) - 1
+    groups.sort(key=lambda g: -g.queue_p95)
+
+    tasks = _task_profiles(runs, concurrency, min_runs)
+    tasks.sort(key=lambda t: -t.contention)
+    return WorkerGroupReport(groups, tasks,
+                             recommend(groups, tasks, queue_threshold, contention_threshold, failure_threshold))
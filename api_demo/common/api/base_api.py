@@ -5,24 +5,53 @@ import os
 import requests
 from urllib.parse import urljoin
 from common.exceptions import APIRequestError, APIResponseError
-from typing import Dict, Optional, Any
-import dotenv
+from common.utils.config_util import load_dotenv_once
+from common.utils.http_util import ACCEPT_ENCODING, TransferStats, encode_form_body, encode_json_body
+from common.utils.json_stream_util import iter_json_items
+from typing import Dict, Iterator, Optional, Any, Sequence
+
+# Bytes read from the socket at a time by the streaming requests
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Smallest JSON request body sent gzip compressed, when enabled
+COMPRESS_MIN_BYTES = 4096
 
 class BaseAPI:
-    def __init__(self, server_url: Optional[str] = None, user_token: Optional[str] = None):
+    # Session of the clients created without one, e.g. shared by the commands of a cli.py batch
+    default_session: Optional[requests.Session] = None
+
+    def __init__(self, server_url: Optional[str] = None, user_token: Optional[str] = None,
+                 timeout: Optional[float] = None, session: Optional[requests.Session] = None,
+                 compress_requests: Optional[bool] = None, stats: Optional[TransferStats] = None):
         """
         Base API client for DolphinScheduler
         
         Args:
             server_url: DolphinScheduler server URL
             user_token: User authentication token
+            timeout: Request timeout in seconds, no timeout if None
+            session: Session whose connection pool is reused by the requests,
+                BaseAPI.default_session if None, a new connection per request
+                if that is None too
+            compress_requests: Send JSON bodies of COMPRESS_MIN_BYTES or more
+                gzip compressed; the server must inflate request bodies, which
+                is not the default of DolphinScheduler. DOLPHINSCHEDULER_COMPRESS_REQUESTS
+                if None
+            stats: Counters of the transferred bytes, shared between clients if given
         """
         # Load .env file if exists
-        dotenv.load_dotenv()
+        if not (server_url and user_token):
+            load_dotenv_once()
         
         self.server_url = server_url or os.getenv('DOLPHINSCHEDULER_SERVER_URL')
         self.user_token = user_token or os.getenv('DOLPHINSCHEDULER_USER_TOKEN')
         self.headers = {'token': self.user_token} if self.user_token else {}
+        self.timeout = timeout
+        self.session = session if session is not None else BaseAPI.default_session
+        if compress_requests is None:
+            compress_requests = os.getenv('DOLPHINSCHEDULER_COMPRESS_REQUESTS', '').lower() in ('1', 'true', 'yes')
+        self.compress_requests = compress_requests
+        self.stats = stats if stats is not None else TransferStats()
         
         if not self.server_url:
             raise ValueError("Missing DolphinScheduler server URL")
@@ -31,7 +60,8 @@ class BaseAPI:
     
     def _request(self, method: str, endpoint: str, 
                  params: Optional[Dict] = None, 
-                 json_data: Optional[Dict] = None) -> Dict:
+                 json_data: Optional[Dict] = None,
+                 form_data: Optional[Dict] = None) -> Dict:
         """
         Internal method for making API requests
         
@@ -40,6 +70,8 @@ class BaseAPI:
             endpoint: API endpoint (relative path)
             params: Query parameters
             json_data: JSON payload for POST/PUT requests
+            form_data: Form-encoded payload for POST/PUT requests, for
+                request parameters too large for the query string
             
         Returns:
             Parsed JSON response
@@ -50,13 +82,9 @@ class BaseAPI:
         url = urljoin(f"{self.server_url}/", endpoint)
         
         try:
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=self.headers,
-                params=params,
-                json=json_data
-            )
+            response = self._send(method, url, params, json_data, form_data)
+            content = response.content
+            self._record_received(response, len(content))
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
@@ -69,6 +97,93 @@ class BaseAPI:
                 f"Failed to parse JSON response from {url}: {str(e)}"
             ) from e
 
+    def _stream_request(self, method: str, endpoint: str,
+                        params: Optional[Dict] = None,
+                        json_data: Optional[Dict] = None,
+                        path: Sequence[str] = ('data',),
+                        operation_name: str = "Operation") -> Iterator[Any]:
+        """
+        Internal method for requests whose response holds a large list
+
+        The body is read from the socket in chunks and the items of the
+        list are parsed and yielded one at a time, so that the first item
+        is available before the body is complete and only one item is
+        held in memory at a time.
+
+        Args:
+            method: HTTP method (GET, POST, PUT, DELETE)
+            endpoint: API endpoint (relative path)
+            params: Query parameters
+            json_data: JSON payload for POST/PUT requests
+            path: Keys leading to the list, e.g. ('data', 'totalList') for pages
+            operation_name: Operation name for error messages
+
+        Yields:
+            Items of the list
+
+        Raises:
+            APIRequestError: For network, HTTP or JSON errors
+            APIResponseError: If API indicates failure, once the body is read
+        """
+        url = urljoin(f"{self.server_url}/", endpoint)
+        envelope = {}
+        decoded = 0
+
+        def chunks(response):
+            nonlocal decoded
+            for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                decoded += len(chunk)
+                yield chunk
+
+        try:
+            with self._send(method, url, params, json_data, stream=True) as response:
+                try:
+                    response.raise_for_status()
+                    yield from iter_json_items(chunks(response), path, envelope)
+                finally:
+                    self._record_received(response, decoded)
+        except requests.RequestException as e:
+            status_code = e.response.status_code if e.response else "N/A"
+            raise APIRequestError(
+                f"{operation_name} failed: API request to {url} failed [Status: {status_code}]: {str(e)}"
+            ) from e
+        except ValueError as e:
+            raise APIRequestError(
+                f"{operation_name} failed: Failed to parse JSON response from {url}: {str(e)}"
+            ) from e
+        self._handle_response(envelope, operation_name)
+
+    def _send(self, method: str, url: str, params: Optional[Dict], json_data: Optional[Dict],
+              form_data: Optional[Dict] = None, stream: bool = False) -> requests.Response:
+        """Send a request, negotiating compressed responses, and count the sent bytes"""
+        headers = dict(self.headers, **{'Accept-Encoding': ACCEPT_ENCODING})
+        body, size = None, 0
+        if json_data is not None:
+            body, body_headers, size = encode_json_body(
+                json_data, COMPRESS_MIN_BYTES if self.compress_requests else None)
+            headers.update(body_headers)
+        elif form_data is not None:
+            body, body_headers = encode_form_body(form_data)
+            size = len(body)
+            headers.update(body_headers)
+        response = (self.session or requests).request(
+            method=method,
+            url=url,
+            headers=headers,
+            params=params,
+            data=body,
+            timeout=self.timeout,
+            stream=stream
+        )
+        url_size = len(response.request.url)
+        self.stats.record_sent(url_size + len(body or b''), url_size + size)
+        return response
+
+    def _record_received(self, response: requests.Response, decoded: int):
+        # The raw stream counts the bytes read from the socket, before decoding
+        wire = response.raw.tell() if hasattr(response.raw, 'tell') else decoded
+        self.stats.record_received(wire, decoded, bool(response.headers.get('Content-Encoding')))
+
     def _handle_response(self, response: Dict, operation_name: str) -> Any:
         """
         Handle API response and check for errors
@@ -106,6 +221,7 @@ class BaseAPI:
     def _post_request(self, endpoint: str,
                       params: Optional[Dict] = None, 
                       json_data: Optional[Dict] = None, 
+                      form_data: Optional[Dict] = None,
                       operation_name: str = "Operation") -> Dict:
         """
         Internal method for POST requests
@@ -114,13 +230,15 @@ class BaseAPI:
             endpoint: API endpoint
             params: Query parameters
             json_data: JSON payload
+            form_data: Form-encoded payload
             operation_name: Operation name for error messages
         
         Returns:
             Response data
         """
         try:
-            response = self._request('POST', endpoint, params=params, json_data=json_data)
+            response = self._request('POST', endpoint, params=params, json_data=json_data,
+                                     form_data=form_data)
             return self._handle_response(response, operation_name)
         except (APIRequestError, APIResponseError) as e:
             raise type(e)(f"{operation_name} failed: {str(e)}") from e
@@ -148,6 +266,7 @@ class BaseAPI:
     def _put_request(self, endpoint: str, 
                      params: Optional[Dict] = None, 
                      json_data: Optional[Dict] = None, 
+                     form_data: Optional[Dict] = None,
                      operation_name: str = "Operation") -> Dict:
         """
         Internal method for PUT requests
@@ -156,13 +275,15 @@ class BaseAPI:
             endpoint: API endpoint
             params: Query parameters
             json_data: JSON payload
+            form_data: Form-encoded payload
             operation_name: Operation name for error messages
         
         Returns:
             Response data
         """
         try:
-            response = self._request('PUT', endpoint, params=params, json_data=json_data)
+            response = self._request('PUT', endpoint, params=params, json_data=json_data,
+                                     form_data=form_data)
             return self._handle_response(response, operation_name)
         except (APIRequestError, APIResponseError) as e:
             raise type(e)(f"{operation_name} failed: {str(e)}") from e
@@ -0,0 +1,74 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+from common.api.base_api import BaseAPI
+from typing import Dict, List, Optional, Union
+
+class DataQualityAPI(BaseAPI):
+    def list_rules(self) -> List[Dict]:
+        """
+        List all data quality rules
+
+        Returns:
+            List of rules
+        """
+        endpoint = "data-quality/ruleList"
+        return self._get_request(endpoint, operation_name="List data quality rules")
+
+    def get_rule_form_create_json(self, rule_id: Union[str, int]) -> List[Dict]:
+        """
+        Get the form-create json of a rule
+
+        Args:
+            rule_id: Data quality rule id
+
+        Returns:
+            Parsed form-create json, one dict per input field
+        """
+        endpoint = "data-quality/getRuleFormCreateJson"
+        params = {"ruleId": rule_id}
+        data = self._get_request(endpoint, params=params, operation_name=f"Get form-create json of rule {rule_id}")
+        return json.loads(data)
+
+    def get_rule_input_parameter_keys(self, rule_id: Union[str, int]) -> List[str]:
+        """
+        Get the input parameter keys of a rule
+
+        Args:
+            rule_id: Data quality rule id
+
+        Returns:
+            List of input field names
+        """
+        return [x.get('field') for x in self.get_rule_form_create_json(rule_id)]
+
+    def query_result_page(self,
+                          start_date: str,
+                          end_date: str,
+                          page_no: int = 1,
+                          page_size: int = 100,
+                          search_val: Optional[str] = None) -> Dict:
+        """
+        Query a page of data quality execute results
+
+        Args:
+            start_date: Start date (%Y-%m-%d %H:%M:%S)
+            end_date: End date (%Y-%m-%d %H:%M:%S)
+            page_no: Page number, starting from 1
+            page_size: Page size
+            search_val: Optional task name filter
+
+        Returns:
+            Page data with totalList, total, totalPage and currentPage
+        """
+        endpoint = "data-quality/result/page"
+        params = {
+            "startDate": start_date,
+            "endDate": end_date,
+            "pageNo": page_no,
+            "pageSize": page_size,
+        }
+        if search_val:
+            params["searchVal"] = search_val
+        return self._get_request(endpoint, params=params, operation_name="Query data quality results")
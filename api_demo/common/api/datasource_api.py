@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 
 from common.api.base_api import BaseAPI
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterator, List, Optional, Union
 
 class DatasourceAPI(BaseAPI):
     def create_datasource(self, 
@@ -129,6 +129,24 @@ class DatasourceAPI(BaseAPI):
         params = {"type": datasource_type}
         return self._get_request(endpoint, params=params, operation_name=f"List {datasource_type} datasources")
 
+    def list_datasources(self, page_no: int = 1, page_size: int = 10, search_val: Optional[str] = None) -> Dict:
+        """
+        Query a page of datasources of all types
+        
+        Args:
+            page_no: Page number, starting from 1
+            page_size: Page size
+            search_val: Search value of the datasource name
+            
+        Returns:
+            Page data with 'total' and 'totalList'
+        """
+        endpoint = "datasources"
+        params = {"pageNo": page_no, "pageSize": page_size}
+        if search_val:
+            params["searchVal"] = search_val
+        return self._get_request(endpoint, params=params, operation_name="List datasources")
+
     def connect_test_datasource(self, datasource_id: Union[str, int]) -> Dict:
         """
         Test connection to a datasource
@@ -235,4 +253,27 @@ class DatasourceAPI(BaseAPI):
             "database": database_name,
             "tableName": table_name
         }
-        return self._get_request(endpoint, params=params, operation_name=f"List columns in table {table_name}")
\ No newline at end of file
+        return self._get_request(endpoint, params=params, operation_name=f"List columns in table {table_name}")
+
+    def iter_columns(self, datasource_id: Union[str, int], database_name: str, table_name: str) -> Iterator[Dict]:
+        """
+        Stream the columns of a specific table
+
+        Streaming variant of list_columns for very wide tables
+
+        Args:
+            datasource_id: ID of the datasource (can be string or integer)
+            database_name: Name of the database containing the table
+            table_name: Name of the table to inspect
+
+        Yields:
+            Column definitions
+        """
+        endpoint = "datasources/tableColumns"
+        params = {
+            "datasourceId": datasource_id,
+            "database": database_name,
+            "tableName": table_name
+        }
+        return self._stream_request('GET', endpoint, params=params,
+                                    operation_name=f"List columns in table {table_name}")
\ No newline at end of file
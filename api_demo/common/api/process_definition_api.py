@@ -0,0 +1,258 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+from common.api.base_api import BaseAPI
+from typing import Dict, Iterator, List, Union
+
+class ProcessDefinitionAPI(BaseAPI):
+    def gen_task_codes(self, project_code: Union[str, int], gen_num: int = 1) -> List[int]:
+        """
+        Generate task codes in bulk
+
+        Args:
+            project_code: Project code identifier
+            gen_num: Number of task codes to generate
+
+        Returns:
+            List of generated task codes
+        """
+        endpoint = f"projects/{project_code}/task-definition/gen-task-codes"
+        params = {"genNum": gen_num}
+        return self._get_request(endpoint, params=params, operation_name=f"Generate {gen_num} task codes")
+
+    def _process_definition_params(self,
+                                   name: str,
+                                   task_definitions: List[Dict],
+                                   task_relations: List[Dict],
+                                   description: str = "",
+                                   global_params: str = "[]",
+                                   locations: str = "[]",
+                                   timeout: int = 0,
+                                   execution_type: str = "PARALLEL") -> Dict:
+        # Compact separators, the JSON of thousands of tasks is sent form-encoded
+        return {
+            "name": name,
+            "description": description,
+            "globalParams": global_params,
+            "locations": locations,
+            "timeout": timeout,
+            "taskRelationJson": json.dumps(task_relations, separators=(',', ':')),
+            "taskDefinitionJson": json.dumps(task_definitions, separators=(',', ':')),
+            "executionType": execution_type,
+        }
+
+    def create_process_definition(self,
+                                  project_code: Union[str, int],
+                                  name: str,
+                                  task_definitions: List[Dict],
+                                  task_relations: List[Dict],
+                                  description: str = "",
+                                  global_params: str = "[]",
+                                  locations: str = "[]",
+                                  timeout: int = 0,
+                                  execution_type: str = "PARALLEL") -> Dict:
+        """
+        Create a new process definition
+
+        Args:
+            project_code: Project code identifier
+            name: Process definition name (must be unique in the project)
+            task_definitions: Task definitions, each with a generated task code
+            task_relations: Task relations (preTaskCode/postTaskCode edges)
+            description: Optional description
+            global_params: Global parameters JSON
+            locations: Node locations JSON
+            timeout: Process timeout in minutes
+            execution_type: Execution type (e.g. PARALLEL, SERIAL_WAIT)
+
+        Returns:
+            Created process definition data
+        """
+        endpoint = f"projects/{project_code}/process-definition"
+        params = self._process_definition_params(
+            name, task_definitions, task_relations, description,
+            global_params, locations, timeout, execution_type
+        )
+        return self._post_request(endpoint, form_data=params, operation_name=f"Create process definition '{name}'")
+
+    def update_process_definition(self,
+                                  project_code: Union[str, int],
+                                  process_definition_code: Union[str, int],
+                                  name: str,
+                                  task_definitions: List[Dict],
+                                  task_relations: List[Dict],
+                                  description: str = "",
+                                  global_params: str = "[]",
+                                  locations: str = "[]",
+                                  timeout: int = 0,
+                                  execution_type: str = "PARALLEL") -> Dict:
+        """
+        Update a process definition, which must be OFFLINE
+
+        Args:
+            project_code: Project code identifier
+            process_definition_code: Process definition code
+            name: Process definition name
+            task_definitions: Task definitions
+            task_relations: Task relations (preTaskCode/postTaskCode edges)
+            description: Optional description
+            global_params: Global parameters JSON
+            locations: Node locations JSON
+            timeout: Process timeout in minutes
+            execution_type: Execution type (e.g. PARALLEL, SERIAL_WAIT)
+
+        Returns:
+            Updated process definition data
+        """
+        endpoint = f"projects/{project_code}/process-definition/{process_definition_code}"
+        params = self._process_definition_params(
+            name, task_definitions, task_relations, description,
+            global_params, locations, timeout, execution_type
+        )
+        return self._put_request(endpoint, form_data=params, operation_name=f"Update process definition {process_definition_code}")
+
+    def get_process_definition(self, project_code: Union[str, int], process_definition_code: Union[str, int]) -> Dict:
+        """
+        Get process definition by code
+
+        Args:
+            project_code: Project code identifier
+            process_definition_code: Process definition code
+
+        Returns:
+            Dict with processDefinition, processTaskRelationList and taskDefinitionList
+        """
+        endpoint = f"projects/{project_code}/process-definition/{process_definition_code}"
+        return self._get_request(endpoint, operation_name=f"Query process definition {process_definition_code}")
+
+    def get_process_definition_by_name(self, project_code: Union[str, int], name: str) -> Dict:
+        """
+        Get process definition by name
+
+        Args:
+            project_code: Project code identifier
+            name: Process definition name
+
+        Returns:
+            Dict with processDefinition, processTaskRelationList and taskDefinitionList
+        """
+        endpoint = f"projects/{project_code}/process-definition/query-by-name"
+        params = {"name": name}
+        return self._post_request(endpoint, params=params, operation_name=f"Query process definition '{name}'")
+
+    def verify_process_definition_name(self, project_code: Union[str, int], name: str) -> Dict:
+        """
+        Verify that a process definition name is not used in the project
+
+        Args:
+            project_code: Project code identifier
+            name: Process definition name to verify
+
+        Returns:
+            Verification result
+
+        Raises:
+            APIResponseError: If the name already exists
+        """
+        endpoint = f"projects/{project_code}/process-definition/verify-name"
+        params = {"name": name}
+        return self._get_request(endpoint, params=params, operation_name=f"Verify process definition name '{name}'")
+
+    def list_all_process_definitions(self, project_code: Union[str, int]) -> List[Dict]:
+        """
+        List all process definitions of a project with their tasks and relations
+
+        Args:
+            project_code: Project code identifier
+
+        Returns:
+            List of dicts with processDefinition, processTaskRelationList,
+            taskDefinitionList and schedule
+        """
+        endpoint = f"projects/{project_code}/process-definition/all"
+        return self._get_request(endpoint, operation_name=f"List all process definitions of project {project_code}")
+
+    def iter_all_process_definitions(self, project_code: Union[str, int]) -> Iterator[Dict]:
+        """
+        Stream all process definitions of a project with their tasks and relations
+
+        Streaming variant of list_all_process_definitions, one definition
+        is parsed and held in memory at a time
+
+        Args:
+            project_code: Project code identifier
+
+        Yields:
+            Dicts with processDefinition, processTaskRelationList,
+            taskDefinitionList and schedule
+        """
+        endpoint = f"projects/{project_code}/process-definition/all"
+        return self._stream_request('GET', endpoint,
+                                    operation_name=f"List all process definitions of project {project_code}")
+
+    def list_process_definitions(self, project_code: Union[str, int]) -> List[Dict]:
+        """
+        List process definitions of a project
+
+        Args:
+            project_code: Project code identifier
+
+        Returns:
+            List of process definitions
+        """
+        endpoint = f"projects/{project_code}/process-definition/query-process-definition-list"
+        return self._get_request(endpoint, operation_name=f"List process definitions of project {project_code}")
+
+    def iter_process_definitions(self, project_code: Union[str, int]) -> Iterator[Dict]:
+        """
+        Stream process definitions of a project
+
+        Streaming variant of list_process_definitions
+
+        Args:
+            project_code: Project code identifier
+
+        Yields:
+            Process definitions
+        """
+        endpoint = f"projects/{project_code}/process-definition/query-process-definition-list"
+        return self._stream_request('GET', endpoint,
+                                    operation_name=f"List process definitions of project {project_code}")
+
+    def release_process_definition(self,
+                                   project_code: Union[str, int],
+                                   process_definition_code: Union[str, int],
+                                   name: str,
+                                   release_state: str) -> Dict:
+        """
+        Set the release state of a process definition
+
+        Args:
+            project_code: Project code identifier
+            process_definition_code: Process definition code
+            name: Process definition name
+            release_state: ONLINE or OFFLINE
+
+        Returns:
+            Release operation result
+        """
+        endpoint = f"projects/{project_code}/process-definition/{process_definition_code}/release"
+        # NOTE: bound with @RequestParam, which does not read JSON bodies
+        form_data = {"releaseState": release_state, "name": name}
+        return self._post_request(endpoint, form_data=form_data,
+                                  operation_name=f"Release process definition {process_definition_code} {release_state}")
+
+    def delete_process_definition(self, project_code: Union[str, int], process_definition_code: Union[str, int]) -> Dict:
+        """
+        Delete a process definition by code
+
+        Args:
+            project_code: Project code identifier
+            process_definition_code: Process definition code
+
+        Returns:
+            Delete operation result
+        """
+        endpoint = f"projects/{project_code}/process-definition/{process_definition_code}"
+        return self._delete_request(endpoint, operation_name=f"Delete process definition {process_definition_code}")
@@ -0,0 +1,78 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+from common.api.base_api import BaseAPI
+from typing import Dict, List, Optional, Union
+
+class ProcessInstanceAPI(BaseAPI):
+    def list_process_instances(self,
+                               project_code: Union[str, int],
+                               page_no: int = 1,
+                               page_size: int = 10,
+                               process_definition_code: Optional[Union[str, int]] = None,
+                               state_type: Optional[str] = None,
+                               start_date: Optional[str] = None,
+                               end_date: Optional[str] = None,
+                               search_val: Optional[str] = None) -> Dict:
+        """
+        Query a page of process instances
+
+        Args:
+            project_code: Project code identifier
+            page_no: Page number, starting from 1
+            page_size: Page size
+            process_definition_code: Only instances of this process definition
+            state_type: Only instances in this state, e.g. SUCCESS
+            start_date: Instances started after (%Y-%m-%d %H:%M:%S)
+            end_date: Instances started before (%Y-%m-%d %H:%M:%S)
+            search_val: Search value of the instance name
+
+        Returns:
+            Page data with 'total' and 'totalList'
+        """
+        endpoint = f"projects/{project_code}/process-instances"
+        params = {
+            'pageNo': page_no,
+            'pageSize': page_size,
+        }
+        if process_definition_code is not None:
+            params['processDefineCode'] = process_definition_code
+        if state_type:
+            params['stateType'] = state_type
+        if start_date:
+            params['startDate'] = start_date
+        if end_date:
+            params['endDate'] = end_date
+        if search_val:
+            params['searchVal'] = search_val
+        return self._get_request(endpoint, params=params,
+                                 operation_name=f"List process instances of project {project_code}")
+
+    def get_process_instance(self, project_code: Union[str, int], process_instance_id: Union[str, int]) -> Dict:
+        """
+        Get a process instance by id
+
+        Args:
+            project_code: Project code identifier
+            process_instance_id: Process instance id
+
+        Returns:
+            Process instance details, with the executed definition in 'dagData'
+        """
+        endpoint = f"projects/{project_code}/process-instances/{process_instance_id}"
+        return self._get_request(endpoint, operation_name=f"Query process instance {process_instance_id}")
+
+    def list_task_instances(self, project_code: Union[str, int], process_instance_id: Union[str, int]) -> List[Dict]:
+        """
+        List the task instances of a process instance
+
+        Args:
+            project_code: Project code identifier
+            process_instance_id: Process instance id
+
+        Returns:
+            List of task instances
+        """
+        endpoint = f"projects/{project_code}/process-instances/{process_instance_id}/tasks"
+        data = self._get_request(endpoint, operation_name=f"List tasks of process instance {process_instance_id}")
+        return (data or {}).get('taskList') or []
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 
 from common.api.base_api import BaseAPI
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterator, List, Optional, Union
 
 class ProjectAPI(BaseAPI):
     def create_project(self, project_name: str, description: str = "", version: str = "v1") -> Dict:
@@ -106,6 +106,22 @@ class ProjectAPI(BaseAPI):
         endpoint = f"{version}/projects/list" if version == "v2" else "projects/list"
         return self._get_request(endpoint, operation_name="List all projects")
 
+    def iter_all_projects(self, version: str = "v1") -> Iterator[Dict]:
+        """
+        Stream all projects (requires admin privileges)
+
+        Streaming variant of list_all_projects, the projects are parsed
+        and yielded as the response body arrives
+
+        Args:
+            version: API version to use (v1 or v2)
+
+        Yields:
+            Projects
+        """
+        endpoint = f"{version}/projects/list" if version == "v2" else "projects/list"
+        return self._stream_request('GET', endpoint, operation_name="List all projects")
+
     def list_user_projects(self, version: str = "v1") -> List[Dict]:
         """
         List projects created by and authorized to the current user
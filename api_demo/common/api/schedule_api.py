@@ -0,0 +1,169 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+from common.api.base_api import BaseAPI
+from typing import Dict, List, Optional, Union
+
+class ScheduleAPI(BaseAPI):
+    def _schedule_params(self,
+                         start_time: str,
+                         end_time: str,
+                         crontab: str,
+                         timezone_id: str,
+                         tenant_code: str,
+                         warning_type: str = "NONE",
+                         warning_group_id: Union[str, int] = 0,
+                         failure_strategy: str = "CONTINUE",
+                         process_instance_priority: str = "MEDIUM",
+                         worker_group: Optional[str] = None,
+                         environment_code: Optional[Union[str, int]] = None) -> Dict:
+        schedule = {
+            'startTime': start_time,
+            'endTime': end_time,
+            'crontab': crontab,
+            'timezoneId': timezone_id,
+        }
+        params = {
+            'schedule': json.dumps(schedule),
+            'warningType': warning_type,
+            'warningGroupId': warning_group_id,
+            'failureStrategy': failure_strategy,
+            'tenantCode': tenant_code,
+            'processInstancePriority': process_instance_priority,
+        }
+        if worker_group is not None:
+            params['workerGroup'] = worker_group
+        if environment_code is not None:
+            params['environmentCode'] = environment_code
+        return params
+
+    def create_schedule(self,
+                        project_code: Union[str, int],
+                        process_definition_code: Union[str, int],
+                        start_time: str,
+                        end_time: str,
+                        crontab: str,
+                        timezone_id: str,
+                        tenant_code: str,
+                        **options) -> Dict:
+        """
+        Create a schedule for a process definition
+
+        Args:
+            project_code: Project code identifier
+            process_definition_code: Process definition code
+            start_time: Schedule start time (%Y-%m-%d %H:%M:%S)
+            end_time: Schedule end time (%Y-%m-%d %H:%M:%S)
+            crontab: Quartz crontab, e.g. '0 0 6 * * ? *'
+            timezone_id: Timezone, e.g. 'Asia/Shanghai'
+            tenant_code: Tenant, i.e. the linux user running the tasks
+            options: warning_type, warning_group_id, failure_strategy,
+                process_instance_priority, worker_group, environment_code
+
+        Returns:
+            Created schedule data
+        """
+        endpoint = f"projects/{project_code}/schedules"
+        params = self._schedule_params(start_time, end_time, crontab, timezone_id, tenant_code, **options)
+        params['processDefinitionCode'] = process_definition_code
+        return self._post_request(endpoint, params=params,
+                                  operation_name=f"Create schedule of process definition {process_definition_code}")
+
+    def update_schedule(self,
+                        project_code: Union[str, int],
+                        schedule_id: Union[str, int],
+                        start_time: str,
+                        end_time: str,
+                        crontab: str,
+                        timezone_id: str,
+                        tenant_code: str,
+                        **options) -> Dict:
+        """
+        Update a schedule, which must be OFFLINE
+
+        Args:
+            project_code: Project code identifier
+            schedule_id: Schedule id
+            start_time: Schedule start time (%Y-%m-%d %H:%M:%S)
+            end_time: Schedule end time (%Y-%m-%d %H:%M:%S)
+            crontab: Quartz crontab, e.g. '0 0 6 * * ? *'
+            timezone_id: Timezone, e.g. 'Asia/Shanghai'
+            tenant_code: Tenant, i.e. the linux user running the tasks
+            options: warning_type, warning_group_id, failure_strategy,
+                process_instance_priority, worker_group, environment_code
+
+        Returns:
+            Updated schedule data
+        """
+        endpoint = f"projects/{project_code}/schedules/{schedule_id}"
+        params = self._schedule_params(start_time, end_time, crontab, timezone_id, tenant_code, **options)
+        return self._put_request(endpoint, params=params, operation_name=f"Update schedule {schedule_id}")
+
+    def online_schedule(self, project_code: Union[str, int], schedule_id: Union[str, int]) -> Dict:
+        """
+        Put a schedule online
+
+        Args:
+            project_code: Project code identifier
+            schedule_id: Schedule id
+
+        Returns:
+            Online operation result
+        """
+        endpoint = f"projects/{project_code}/schedules/{schedule_id}/online"
+        return self._post_request(endpoint, operation_name=f"Online schedule {schedule_id}")
+
+    def offline_schedule(self, project_code: Union[str, int], schedule_id: Union[str, int]) -> Dict:
+        """
+        Take a schedule offline
+
+        Args:
+            project_code: Project code identifier
+            schedule_id: Schedule id
+
+        Returns:
+            Offline operation result
+        """
+        endpoint = f"projects/{project_code}/schedules/{schedule_id}/offline"
+        return self._post_request(endpoint, operation_name=f"Offline schedule {schedule_id}")
+
+    def delete_schedule(self, project_code: Union[str, int], schedule_id: Union[str, int]) -> Dict:
+        """
+        Delete a schedule by id
+
+        Args:
+            project_code: Project code identifier
+            schedule_id: Schedule id
+
+        Returns:
+            Delete operation result
+        """
+        endpoint = f"projects/{project_code}/schedules/{schedule_id}"
+        return self._delete_request(endpoint, operation_name=f"Delete schedule {schedule_id}")
+
+    def list_schedules(self, project_code: Union[str, int]) -> List[Dict]:
+        """
+        List all schedules of a project
+
+        Args:
+            project_code: Project code identifier
+
+        Returns:
+            List of schedules
+        """
+        endpoint = f"projects/{project_code}/schedules/list"
+        return self._post_request(endpoint, operation_name=f"List schedules of project {project_code}")
+
+    def get_schedule(self, schedule_id: Union[str, int]) -> Dict:
+        """
+        Get a schedule by id (v2)
+
+        Args:
+            schedule_id: Schedule id
+
+        Returns:
+            Schedule details
+        """
+        endpoint = f"v2/schedules/{schedule_id}"
+        return self._get_request(endpoint, operation_name=f"Get schedule {schedule_id}")
@@ -0,0 +1,66 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+from enum import Enum, IntEnum
+
+class ConnectorType(IntEnum):
+    TRINO = 12
+
+class RuleType(Enum):
+    SINGLE_TABLE = (0, "single_table")
+
+    # 枚举构造方法，初始化代码值和描述信息
+    def __init__(self, code, description):
+        self.code = code
+        self.description = description
+
+    @classmethod
+    def is_valid_rule_type(cls, rule_type):
+        return any(rule_type == item.code for item in cls)
+
+class Rule(Enum):
+    NULL_CHECK = (1, '$t(null_check)', RuleType.SINGLE_TABLE.code, 'null_items', 'null_count', 'nulls')
+    FIELD_LENGTH_CHECK = (5, '$t(field_length_check)', RuleType.SINGLE_TABLE.code, 'invalid_length_items', 'invalid_length_count', 'valids')
+    UNIQUENESS_CHECK = (6, '$t(uniqueness_check)', RuleType.SINGLE_TABLE.code, 'duplicate_items', 'duplicate_count', 'duplicates')
+    REGEXP_CHECK = (7, '$t(regexp_check)', RuleType.SINGLE_TABLE.code, 'regexp_items', 'invalid_format_count', 'invalids')
+    ENUMERATION_CHECK = (9, '$t(enumeration_check)', RuleType.SINGLE_TABLE.code, 'enum_items', 'invalid_enumeration_count', 'invalids')
+    TABLE_COUNT_CHECK = (10, '$t(table_count_check)', RuleType.SINGLE_TABLE.code, None, 'table_count', 'total')
+
+    def __init__(self, id, display_name, rule_type, output_items_table, output_count_table, field_alias):
+        self.id = id
+        self.display_name = display_name
+        self.rule_type = rule_type
+        self.output_items_table = output_items_table
+        self.output_count_table = output_count_table
+        self.field_alias = field_alias
+        self.statistics_name = f"{output_count_table}.{field_alias}"
+
+    @classmethod
+    def is_valid_rule_id(cls, rule_id):
+        return any(rule_id == item.id for item in cls)
+
+    @classmethod
+    def from_id(cls, rule_id):
+        return next((item for item in cls if item.id == rule_id), None)
+
+class ComparisonType(Enum):
+    FixValue = (1, 'FixValue', None, None)
+    DailyAvg = (2, 'DailyAvg', 'day_range', 'day_avg')
+    WeeklyAvg = (3, 'WeeklyAvg', 'week_range', 'week_avg')
+    MonthlyAvg = (4, 'MonthlyAvg', 'month_range', 'month_avg')
+    Last7DayAvg = (5, 'Last7DayAvg', 'last_seven_days', 'last_7_avg')
+    Last30DayAvg = (6, 'Last30DayAvg', 'last_thirty_days', 'last_30_avg')
+
+    def __init__(self, id, display_name, output_table, output_column):
+        self.id = id
+        self.display_name = display_name
+        self.output_table = output_table
+        self.output_column = output_column
+
+    @classmethod
+    def is_valid_comparison_type(cls, comparison_type_id):
+        return any(comparison_type_id == item.id for item in cls)
+
+    @classmethod
+    def from_id(cls, comparison_type_id):
+        return next((item for item in cls if item.id == comparison_type_id), None)
@@ -13,4 +13,16 @@ class APIResponseError(APIException):
     """Exception for API response errors"""
     def __init__(self, message, code=None):
         super().__init__(message)
-        self.code = code
\ No newline at end of file
+        self.code = code
+
+class DAGValidationError(ValueError):
+    """Exception for invalid process definition DAGs"""
+    def __init__(self, message, problems=None):
+        super().__init__(message)
+        self.problems = problems or []
+
+class DeploymentValidationError(ValueError):
+    """Exception for releases failing validation before deployment"""
+    def __init__(self, message, problems=None):
+        super().__init__(message)
+        self.problems = problems or []
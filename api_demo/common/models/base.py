@@ -0,0 +1,89 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import json
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple, Type, TypeVar
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+M = TypeVar('M', bound='Model')
+
+def slot_names(fields: Tuple[Tuple[str, str], ...]) -> Tuple[str, ...]:
+    """__slots__ of a model, one per (attribute, payload key) of its FIELDS"""
+    return tuple(attribute for attribute, _ in fields)
+
+def parse_time(value: Optional[str]) -> Optional[datetime.datetime]:
+    """Parse a timestamp of the API, None if empty"""
+    return datetime.datetime.strptime(value, DATETIME_FORMAT) if value else None
+
+class Model:
+    """
+    Compact read-only view of an API entity
+
+    Subclasses list the payload keys they keep in FIELDS and derive their
+    __slots__ from it, so that an instance holds one reference per kept
+    field instead of a dict of every key of the payload. Values are kept
+    as received; timestamps, nested JSON and other derived values are
+    decoded by properties when they are read. String fields listed in
+    INTERNED repeat across records (states, types, hosts) and are shared.
+    """
+    __slots__ = ()
+
+    FIELDS: Tuple[Tuple[str, str], ...] = ()
+    INTERNED: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Slot setters resolved once per class, as from_dict runs once per record
+        cls._setters = tuple((getattr(cls, attribute).__set__, key, attribute in cls.INTERNED)
+                             for attribute, key in cls.FIELDS)
+
+    @classmethod
+    def from_dict(cls: Type[M], data: Dict) -> M:
+        """Model of one payload record, keys missing from the record are None"""
+        model = object.__new__(cls)
+        get = data.get
+        for setter, key, interned in cls._setters:
+            value = get(key)
+            if interned and type(value) is str:
+                value = sys.intern(value)
+            setter(model, value)
+        return model
+
+    @classmethod
+    def from_list(cls: Type[M], records: Iterable[Dict]) -> List[M]:
+        """Models of payload records, e.g. a list response or an iter_* stream"""
+        from_dict = cls.from_dict
+        return [from_dict(record) for record in records]
+
+    def to_dict(self) -> Dict:
+        """Kept fields, under their payload keys"""
+        return {key: getattr(self, attribute) for attribute, key in self.FIELDS}
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, a) == getattr(other, a) for a in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash((type(self), getattr(self, self.__slots__[0])))
+
+    def __repr__(self) -> str:
+        shown = ', '.join(f"{a}={getattr(self, a)!r}" for a in self.__slots__[:3])
+        return f"{type(self).__name__}({shown})"
+
+    def __getstate__(self):
+        return tuple(getattr(self, a) for a in self.__slots__)
+
+    def __setstate__(self, state):
+        for attribute, value in zip(self.__slots__, state):
+            object.__setattr__(self, attribute, value)
+
+def parse_json(value):
+    """Decode a JSON string field, other values are returned as is"""
+    return json.loads(value) if isinstance(value, str) and value else value
@@ -0,0 +1,48 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+from typing import Optional
+
+from common.enums.data_quality import ComparisonType, Rule
+from common.models.base import Model, parse_time, slot_names
+
+class DQResult(Model):
+    FIELDS = (
+        ('id', 'id'), ('process_instance_id', 'processInstanceId'), ('task_instance_id', 'taskInstanceId'),
+        ('rule_type', 'ruleType'), ('rule_name', 'ruleName'), ('statistics_value', 'statisticsValue'),
+        ('comparison_value', 'comparisonValue'), ('comparison_type', 'comparisonType'),
+        ('check_type', 'checkType'), ('threshold', 'threshold'), ('operator', 'operator'),
+        ('failure_strategy', 'failureStrategy'), ('state', 'state'), ('error_output_path', 'errorOutputPath'),
+        ('create_time', 'createTime'),
+    )
+    INTERNED = ('rule_name',)
+    __slots__ = slot_names(FIELDS)
+
+    id: int
+    process_instance_id: int
+    task_instance_id: int
+    rule_type: int
+    rule_name: str
+    statistics_value: float
+    comparison_value: float
+    comparison_type: int
+    check_type: int
+    threshold: float
+    operator: int
+    failure_strategy: int
+    state: int
+    error_output_path: Optional[str]
+    create_time: str
+
+    @property
+    def rule(self) -> Optional[Rule]:
+        return next((r for r in Rule if r.display_name == self.rule_name), None)
+
+    @property
+    def comparison(self) -> Optional[ComparisonType]:
+        return next((c for c in ComparisonType if c.id == self.comparison_type), None)
+
+    @property
+    def created(self) -> Optional[datetime.datetime]:
+        return parse_time(self.create_time)
@@ -0,0 +1,37 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+from typing import Dict, Optional
+
+from common.models.base import Model, parse_json, parse_time, slot_names
+
+class Datasource(Model):
+    FIELDS = (
+        ('id', 'id'), ('name', 'name'), ('type', 'type'), ('note', 'note'),
+        ('host', 'host'), ('port', 'port'), ('database', 'database'), ('user_name', 'userName'),
+        ('connection_params', 'connectionParams'), ('create_time', 'createTime'), ('update_time', 'updateTime'),
+    )
+    INTERNED = ('type', 'host', 'user_name')
+    __slots__ = slot_names(FIELDS)
+
+    id: int
+    name: str
+    type: str
+    note: str
+    host: Optional[str]
+    port: Optional[int]
+    database: Optional[str]
+    user_name: str
+    connection_params: Optional[str]
+    create_time: Optional[str]
+    update_time: Optional[str]
+
+    @property
+    def connection(self) -> Dict:
+        """Decoded connection parameters of a listed datasource, empty for a detail record"""
+        return parse_json(self.connection_params) or {}
+
+    @property
+    def updated(self) -> Optional[datetime.datetime]:
+        return parse_time(self.update_time)
@@ -0,0 +1,51 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+from typing import List, Optional
+
+from common.models.base import Model, parse_json, parse_time, slot_names
+
+class ProcessDefinition(Model):
+    FIELDS = (
+        ('id', 'id'), ('code', 'code'), ('name', 'name'), ('version', 'version'),
+        ('release_state', 'releaseState'), ('project_code', 'projectCode'), ('description', 'description'),
+        ('global_params', 'globalParams'), ('locations', 'locations'), ('timeout', 'timeout'),
+        ('execution_type', 'executionType'), ('user_name', 'userName'),
+        ('create_time', 'createTime'), ('update_time', 'updateTime'),
+    )
+    INTERNED = ('release_state', 'execution_type', 'user_name')
+    __slots__ = slot_names(FIELDS)
+
+    id: int
+    code: int
+    name: str
+    version: int
+    release_state: str
+    project_code: int
+    description: str
+    global_params: Optional[str]
+    locations: Optional[str]
+    timeout: int
+    execution_type: str
+    user_name: str
+    create_time: str
+    update_time: str
+
+    @property
+    def online(self) -> bool:
+        return self.release_state == 'ONLINE'
+
+    @property
+    def global_param_list(self) -> List:
+        """Decoded global parameters"""
+        return parse_json(self.global_params) or []
+
+    @property
+    def location_list(self) -> List:
+        """Decoded task locations"""
+        return parse_json(self.locations) or []
+
+    @property
+    def updated(self) -> Optional[datetime.datetime]:
+        return parse_time(self.update_time)
@@ -0,0 +1,101 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+from typing import Optional
+
+from common.models.base import Model, parse_time, slot_names
+
+def _seconds_between(start: Optional[str], end: Optional[str]) -> Optional[float]:
+    if not start or not end:
+        return None
+    return (parse_time(end) - parse_time(start)).total_seconds()
+
+class ProcessInstance(Model):
+    FIELDS = (
+        ('id', 'id'), ('name', 'name'), ('process_definition_code', 'processDefinitionCode'),
+        ('process_definition_version', 'processDefinitionVersion'), ('project_code', 'projectCode'),
+        ('state', 'state'), ('command_type', 'commandType'), ('schedule_time', 'scheduleTime'),
+        ('command_start_time', 'commandStartTime'), ('start_time', 'startTime'), ('end_time', 'endTime'),
+        ('duration', 'duration'), ('run_times', 'runTimes'), ('host', 'host'), ('worker_group', 'workerGroup'),
+        ('tenant_code', 'tenantCode'), ('recovery', 'recovery'), ('dry_run', 'dryRun'),
+    )
+    INTERNED = ('state', 'command_type', 'host', 'worker_group', 'tenant_code', 'recovery')
+    __slots__ = slot_names(FIELDS)
+
+    id: int
+    name: str
+    process_definition_code: int
+    process_definition_version: int
+    project_code: int
+    state: str
+    command_type: str
+    schedule_time: Optional[str]
+    command_start_time: Optional[str]
+    start_time: Optional[str]
+    end_time: Optional[str]
+    duration: Optional[str]
+    run_times: int
+    host: Optional[str]
+    worker_group: str
+    tenant_code: str
+    recovery: str
+    dry_run: int
+
+    @property
+    def started(self) -> Optional[datetime.datetime]:
+        return parse_time(self.start_time)
+
+    @property
+    def ended(self) -> Optional[datetime.datetime]:
+        return parse_time(self.end_time)
+
+    @property
+    def duration_seconds(self) -> Optional[float]:
+        """Seconds from start to end, None while running"""
+        return _seconds_between(self.start_time, self.end_time)
+
+class TaskInstance(Model):
+    FIELDS = (
+        ('id', 'id'), ('name', 'name'), ('task_type', 'taskType'), ('task_code', 'taskCode'),
+        ('task_definition_version', 'taskDefinitionVersion'), ('process_instance_id', 'processInstanceId'),
+        ('state', 'state'), ('submit_time', 'submitTime'), ('start_time', 'startTime'), ('end_time', 'endTime'),
+        ('duration', 'duration'), ('host', 'host'), ('worker_group', 'workerGroup'),
+        ('task_instance_priority', 'taskInstancePriority'), ('retry_times', 'retryTimes'),
+    )
+    INTERNED = ('task_type', 'state', 'host', 'worker_group', 'task_instance_priority')
+    __slots__ = slot_names(FIELDS)
+
+    id: int
+    name: str
+    task_type: str
+    task_code: int
+    task_definition_version: int
+    process_instance_id: int
+    state: str
+    submit_time: Optional[str]
+    start_time: Optional[str]
+    end_time: Optional[str]
+    duration: Optional[str]
+    host: Optional[str]
+    worker_group: str
+    task_instance_priority: str
+    retry_times: int
+
+    @property
+    def started(self) -> Optional[datetime.datetime]:
+        return parse_time(self.start_time)
+
+    @property
+    def ended(self) -> Optional[datetime.datetime]:
+        return parse_time(self.end_time)
+
+    @property
+    def duration_seconds(self) -> Optional[float]:
+        """Seconds from start to end, None while running"""
+        return _seconds_between(self.start_time, self.end_time)
+
+    @property
+    def queued_seconds(self) -> Optional[float]:
+        """Seconds from submission to start"""
+        return _seconds_between(self.submit_time, self.start_time)
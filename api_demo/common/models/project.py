@@ -0,0 +1,27 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+from typing import Optional
+
+from common.models.base import Model, parse_time, slot_names
+
+class Project(Model):
+    FIELDS = (
+        ('id', 'id'), ('code', 'code'), ('name', 'name'), ('description', 'description'),
+        ('user_name', 'userName'), ('create_time', 'createTime'), ('update_time', 'updateTime'),
+    )
+    INTERNED = ('user_name',)
+    __slots__ = slot_names(FIELDS)
+
+    id: int
+    code: int
+    name: str
+    description: str
+    user_name: str
+    create_time: str
+    update_time: str
+
+    @property
+    def updated(self) -> Optional[datetime.datetime]:
+        return parse_time(self.update_time)
@@ -0,0 +1,47 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+from typing import Optional
+
+from common.models.base import Model, parse_time, slot_names
+
+class Schedule(Model):
+    FIELDS = (
+        ('id', 'id'), ('process_definition_code', 'processDefinitionCode'),
+        ('process_definition_name', 'processDefinitionName'), ('project_code', 'projectCode'),
+        ('release_state', 'releaseState'), ('crontab', 'crontab'), ('timezone_id', 'timezoneId'),
+        ('start_time', 'startTime'), ('end_time', 'endTime'), ('failure_strategy', 'failureStrategy'),
+        ('warning_type', 'warningType'), ('worker_group', 'workerGroup'),
+        ('process_instance_priority', 'processInstancePriority'), ('update_time', 'updateTime'),
+    )
+    INTERNED = ('release_state', 'timezone_id', 'failure_strategy', 'warning_type', 'worker_group',
+                'process_instance_priority')
+    __slots__ = slot_names(FIELDS)
+
+    id: int
+    process_definition_code: int
+    process_definition_name: str
+    project_code: int
+    release_state: str
+    crontab: str
+    timezone_id: str
+    start_time: str
+    end_time: str
+    failure_strategy: str
+    warning_type: str
+    worker_group: str
+    process_instance_priority: str
+    update_time: str
+
+    @property
+    def online(self) -> bool:
+        return self.release_state == 'ONLINE'
+
+    @property
+    def starts(self) -> Optional[datetime.datetime]:
+        return parse_time(self.start_time)
+
+    @property
+    def ends(self) -> Optional[datetime.datetime]:
+        return parse_time(self.end_time)
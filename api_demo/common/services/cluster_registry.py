@@ -0,0 +1,136 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Type, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.api.base_api import BaseAPI
+from common.utils.concurrent_util import TaskOutcome, run_bounded
+from common.utils.config_util import ClusterConfig, load_clusters
+from common.utils.http_util import TransferStats
+
+T = TypeVar('T', bound=BaseAPI)
+
+class ClusterRegistry:
+    def __init__(self, clusters: Optional[Dict[str, ClusterConfig]] = None,
+                 max_workers: int = 8, pool_size: int = 16):
+        """
+        Clients of several DolphinScheduler clusters and tenants
+
+        The configuration is loaded once. Every (cluster, token) pair gets
+        one requests.Session, shared by all the API clients of that pair,
+        so that connections are kept alive across calls and threads. The
+        clients of a cluster share the byte counters of stats[cluster].
+
+        Args:
+            clusters: Cluster name -> ClusterConfig, load_clusters() if None
+            max_workers: Maximum number of clusters called concurrently by fan_out
+            pool_size: Connections kept alive per (cluster, token)
+        """
+        self.clusters = clusters if clusters is not None else load_clusters()
+        self.max_workers = max_workers
+        self.pool_size = pool_size
+        self._sessions: Dict[tuple, requests.Session] = {}
+        self._clients: Dict[tuple, BaseAPI] = {}
+        self.stats: Dict[str, TransferStats] = {name: TransferStats() for name in self.clusters}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None, **kwargs) -> "ClusterRegistry":
+        """Registry of the clusters of a clusters file, see load_clusters()"""
+        return cls(load_clusters(path), **kwargs)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.clusters)
+
+    def cluster(self, name: str) -> ClusterConfig:
+        if name not in self.clusters:
+            raise ValueError(f"Unknown cluster '{name}', expected one of {', '.join(self.clusters)}")
+        return self.clusters[name]
+
+    def _session(self, key: tuple) -> requests.Session:
+        session = self._sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._sessions[key] = session
+        return session
+
+    def client(self, api_class: Type[T], cluster: str, tenant: Optional[str] = None) -> T:
+        """
+        Client of a cluster, created on first use and reused afterwards
+
+        Args:
+            api_class: BaseAPI subclass, e.g. ProjectAPI
+            cluster: Cluster name
+            tenant: Tenant whose token authenticates the calls, the default tenant if None
+
+        Raises:
+            ValueError: If the cluster or the tenant is unknown
+        """
+        config = self.cluster(cluster)
+        token = config.token(tenant)
+        with self._lock:
+            key = (api_class, cluster, token)
+            client = self._clients.get(key)
+            if client is None:
+                client = api_class(config.server_url, token, timeout=config.timeout,
+                                   session=self._session((cluster, token)), stats=self.stats[cluster])
+                self._clients[key] = client
+            return client
+
+    def fan_out(self, api_class: Type[T], func: Callable[[T], object],
+                clusters: Optional[Iterable[str]] = None, tenant: Optional[str] = None) -> Dict[str, TaskOutcome]:
+        """
+        Call the same operation on several clusters concurrently
+
+        Args:
+            api_class: BaseAPI subclass of the operation
+            func: Callable taking the client of one cluster, e.g.
+                lambda api: api.list_user_projects()
+            clusters: Cluster names, all the clusters if None
+            tenant: Tenant whose token authenticates the calls
+
+        Returns:
+            Cluster name -> TaskOutcome, a failed cluster does not fail the others
+        """
+        names = list(clusters) if clusters is not None else self.names
+        outcomes = run_bounded(lambda name: func(self.client(api_class, name, tenant)), names, self.max_workers)
+        return {o.item: o for o in outcomes}
+
+    def fan_out_merged(self, api_class: Type[T], func: Callable[[T], List[Dict]],
+                       clusters: Optional[Iterable[str]] = None, tenant: Optional[str] = None,
+                       key: str = 'cluster') -> Tuple[List[Dict], Dict[str, BaseException]]:
+        """
+        Call a listing operation on several clusters and merge the records
+
+        Returns:
+            (records tagged with their cluster under key, cluster name -> error of the failed clusters)
+        """
+        merged, errors = [], {}
+        for name, outcome in self.fan_out(api_class, func, clusters, tenant).items():
+            if not outcome.ok:
+                errors[name] = outcome.error
+                continue
+            merged.extend(dict(record, **{key: name}) for record in outcome.result or [])
+        return merged, errors
+
+    def close(self):
+        """Close the sessions, the clients must not be used afterwards"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._clients.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
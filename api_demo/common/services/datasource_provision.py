@@ -0,0 +1,220 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List, Optional
+
+from common.api.datasource_api import DatasourceAPI
+from common.utils.concurrent_util import TaskOutcome, fetch_pages, run_bounded
+from common.utils.config_util import expand_env
+
+PAGE_SIZE = 100
+
+# Connection fields compared by the diff, the password cannot be read back
+COMPARED_FIELDS = ('host', 'port', 'database', 'userName', 'note', 'other')
+
+class DesiredDatasource:
+    def __init__(self, data: Dict):
+        """
+        Desired state of a datasource, one entry of a manifest
+
+        Args:
+            data: type, name, host, port, userName, password, database,
+                note and other; ${VAR} references in strings are expanded
+                from the environment, which keeps passwords out of manifests
+
+        Raises:
+            ValueError: If the entry is incomplete or references an unset variable
+        """
+        data = _expand(data)
+        self.type = str(data.get('type') or '').upper()
+        self.name = data.get('name')
+        self.host = data.get('host')
+        self.port = data.get('port')
+        self.username = data.get('userName', data.get('username'))
+        self.password = data.get('password') or ''
+        self.database = data.get('database') or ''
+        self.note = data.get('note') or ''
+        self.other = data.get('other') or {}
+        if not self.name or not self.type or not self.host or self.port is None:
+            raise ValueError(f"Datasource '{self.name}' misses its name, type, host or port")
+
+    def fields(self) -> Dict:
+        return {'host': self.host, 'port': self.port, 'database': self.database, 'userName': self.username,
+                'note': self.note, 'other': self.other}
+
+    def params(self) -> Dict:
+        """Keyword arguments of DatasourceAPI.create_datasource/update_datasource"""
+        return {'datasource_type': self.type, 'name': self.name, 'host': self.host, 'port': int(self.port),
+                'username': self.username, 'password': self.password, 'database': self.database,
+                'note': self.note, 'other': self.other}
+
+def _expand(value):
+    if isinstance(value, str):
+        return expand_env(value)
+    if isinstance(value, dict):
+        return {k: _expand(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_expand(v) for v in value]
+    return value
+
+def load_manifest(path: str) -> List[DesiredDatasource]:
+    """
+    Load a datasource manifest
+
+    The manifest is a YAML file with a ``datasources`` list; keys of an
+    optional ``defaults`` mapping apply to every entry that does not set
+    them, e.g. the host and credentials shared by an environment.
+
+    ${VAR} references in strings are expanded from the environment; other
+    '$' characters are kept as is and $${VAR} is the literal ${VAR}.
+
+    Raises:
+        ValueError: If an entry is incomplete, references an unset variable or a name is duplicated
+    """
+    import yaml
+    with open(path, 'r') as f:
+        data = yaml.safe_load(f) or {}
+    defaults = data.get('defaults') or {}
+    desired = [DesiredDatasource(dict(defaults, **entry)) for entry in data.get('datasources') or []]
+    seen = set()
+    for d in desired:
+        if d.name in seen:
+            raise ValueError(f"Duplicate datasource name '{d.name}' in manifest {path}")
+        seen.add(d.name)
+    return desired
+
+def _comparable(value):
+    if isinstance(value, dict):
+        return {k: _comparable(v) for k, v in value.items()}
+    return '' if value is None else str(value)
+
+class ProvisionPlan:
+    """Planned provisioning of one datasource"""
+    CREATE = 'CREATE'
+    UPDATE = 'UPDATE'
+    NOOP = 'NOOP'
+    CONFLICT = 'CONFLICT'
+
+    def __init__(self, desired: DesiredDatasource, current: Optional[Dict] = None,
+                 force: bool = False, conflict: Optional[str] = None):
+        self.desired = desired
+        self.current = current
+        self.id = (current or {}).get('id')
+        self.changes = {}
+        self.conflict = conflict
+        if conflict:
+            self.action = self.CONFLICT
+            return
+        if current is None:
+            self.action = self.CREATE
+            return
+        if str(current.get('type') or '').upper() != desired.type:
+            self.action = self.CONFLICT
+            self.conflict = f"exists with type {current.get('type')}"
+            return
+        for field, new in desired.fields().items():
+            old = current.get(field)
+            if field == 'other':
+                # Extra keys filled in by the server do not count as changes
+                old = {k: v for k, v in (old or {}).items() if k in new}
+            if _comparable(old) != _comparable(new):
+                self.changes[field] = (old, new)
+        self.action = self.UPDATE if self.changes or force else self.NOOP
+
+    @property
+    def name(self) -> str:
+        return self.desired.name
+
+    def format(self, verbose: bool = False) -> str:
+        if self.action == self.CREATE:
+            return f"+ CREATE {self.name} ({self.desired.type} {self.desired.host}:{self.desired.port})"
+        if self.action == self.CONFLICT:
+            return f"! CONFLICT {self.name}: {self.conflict}"
+        if self.action == self.NOOP:
+            return f"= NOOP {self.name} [id {self.id}]"
+        line = f"~ UPDATE {self.name} [id {self.id}] ({', '.join(self.changes) or 'forced'})"
+        if not verbose:
+            return line
+        return "\n".join([line] + [f"  {field}: {old!r} -> {new!r}" for field, (old, new) in self.changes.items()])
+
+class DatasourceProvisioner:
+    def __init__(self, datasource_api: Optional[DatasourceAPI] = None, max_workers: int = 8):
+        """
+        Manifest-driven bulk upsert of datasources
+
+        Args:
+            datasource_api: DatasourceAPI client
+            max_workers: Maximum number of concurrent API calls
+        """
+        self.api = datasource_api or DatasourceAPI()
+        self.max_workers = max_workers
+
+    def existing(self) -> Dict[str, Dict]:
+        """All datasources of the user, fetched once and indexed by name"""
+        existing = {}
+        for _, page in fetch_pages(lambda _, page_no: self.api.list_datasources(page_no, PAGE_SIZE),
+                                   [None], PAGE_SIZE, self.max_workers):
+            existing.update((d.get('name'), d) for d in page)
+        return existing
+
+    def plan(self, desired: List[DesiredDatasource], force: bool = False) -> List[ProvisionPlan]:
+        """
+        Plan the creation or update of the desired datasources
+
+        Existing datasources are listed once. Only the matching ones are
+        fetched in detail, concurrently, for their connection fields; names
+        not listed are verified concurrently, as a name may be taken by a
+        datasource the user cannot see.
+
+        Args:
+            desired: Desired datasources
+            force: Update matching datasources even without a change, e.g. to rotate passwords
+
+        Returns:
+            One plan per desired datasource
+        """
+        existing = self.existing()
+        matched = [d for d in desired if d.name in existing]
+        details = {}
+        for outcome in run_bounded(lambda d: self.api.get_datasource(existing[d.name]['id']), matched, self.max_workers):
+            if not outcome.ok:
+                raise outcome.error
+            details[outcome.item.name] = dict(outcome.result or {}, id=existing[outcome.item.name]['id'])
+
+        conflicts = {}
+        unseen = [d for d in desired if d.name not in existing]
+        for outcome in run_bounded(lambda d: self.api.verify_datasource_name(d.name), unseen, self.max_workers):
+            if not outcome.ok:
+                conflicts[outcome.item.name] = f"name not available: {outcome.error}"
+
+        return [ProvisionPlan(d, details.get(d.name), force, conflicts.get(d.name)) for d in desired]
+
+    def _submit(self, plan: ProvisionPlan, connect_test: bool) -> Dict:
+        if plan.action == ProvisionPlan.CREATE:
+            data = self.api.create_datasource(**plan.desired.params())
+        else:
+            data = self.api.update_datasource(plan.id, **plan.desired.params())
+        if connect_test:
+            datasource_id = plan.id or (data.get('id') if isinstance(data, dict) else None)
+            if datasource_id:
+                self.api.connect_test_datasource(datasource_id)
+            else:
+                self.api.connect_datasource(dict(plan.desired.fields(), type=plan.desired.type,
+                                                 name=plan.name, password=plan.desired.password))
+        return data
+
+    def apply(self, plans: List[ProvisionPlan], connect_test: bool = False) -> List[TaskOutcome]:
+        """
+        Create or update the changed datasources with bounded concurrency
+
+        Args:
+            plans: Plans returned by plan(), no-ops and conflicts are skipped
+            connect_test: Connect-test every created or updated datasource,
+                a failed test fails the outcome of its plan
+
+        Returns:
+            One TaskOutcome per plan; skipped plans have a None result
+        """
+        pending = [p for p in plans if p.action in (ProvisionPlan.CREATE, ProvisionPlan.UPDATE)]
+        outcomes = {id(o.item): o for o in run_bounded(lambda p: self._submit(p, connect_test), pending, self.max_workers)}
+        return [outcomes.get(id(p), TaskOutcome(p)) for p in plans]
@@ -0,0 +1,417 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+from typing import Dict, List, Optional, Tuple, Union
+
+from common.api.process_definition_api import ProcessDefinitionAPI
+from common.api.schedule_api import ScheduleAPI
+from common.utils.concurrent_util import TaskOutcome, run_bounded
+from common.utils.dag_util import ProcessDAG
+
+# Process definition fields compared by the diff
+DEFINITION_FIELDS = {
+    'name': 'name',
+    'description': 'description',
+    'globalParams': 'global_params',
+    'timeout': 'timeout',
+    'executionType': 'execution_type',
+}
+
+# Task definition fields compared by the diff
+TASK_FIELDS = ('description', 'taskType', 'taskParams', 'flag', 'isCache', 'taskPriority', 'workerGroup',
+               'environmentCode', 'failRetryTimes', 'failRetryInterval', 'timeoutFlag', 'timeoutNotifyStrategy',
+               'timeout', 'delayTime', 'cpuQuota', 'memoryMax')
+
+# Upper bound of genNum for a single gen-task-codes call
+TASK_CODE_BATCH_SIZE = 500
+
+class DesiredDefinition:
+    def __init__(self,
+                 name: str,
+                 task_definitions: List[Dict],
+                 task_relations: List[Dict],
+                 description: str = "",
+                 global_params: str = "[]",
+                 locations: Optional[str] = None,
+                 timeout: int = 0,
+                 execution_type: str = "PARALLEL"):
+        """
+        Desired state of a process definition
+
+        Task codes of task_definitions are local: any distinct non-zero
+        integers referenced by task_relations, with 0 as the start node. They
+        are mapped to the codes of the existing tasks with the same name, or
+        to newly generated codes.
+
+        Args:
+            name: Process definition name
+            task_definitions: Task definitions with local codes
+            task_relations: Task relations between local codes
+            description: Process definition description
+            global_params: Global parameters JSON
+            locations: Node locations JSON, None keeps the current locations unless
+                the graph changes, in which case it is laid out again
+            timeout: Process timeout in minutes
+            execution_type: Execution type (e.g. PARALLEL, SERIAL_WAIT)
+        """
+        self.name = name
+        self.task_definitions = task_definitions
+        self.task_relations = task_relations
+        self.description = description
+        self.global_params = global_params
+        self.locations = locations
+        self.timeout = timeout
+        self.execution_type = execution_type
+
+    def task_names(self) -> Dict[int, str]:
+        """Local task code -> task name"""
+        return {t['code']: t['name'] for t in self.task_definitions}
+
+def _normalize(value):
+    if isinstance(value, str):
+        stripped = value.strip()
+        if stripped[:1] in ('{', '['):
+            try:
+                return _normalize(json.loads(stripped))
+            except ValueError:
+                return value
+        return value
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if value is None:
+        return None
+    return str(value)
+
+def _matches(current, desired) -> bool:
+    """
+    Compare a normalized current value with a normalized desired value
+
+    Dict keys absent from the desired value are ignored, so that defaults
+    filled in by the server do not count as changes.
+    """
+    if isinstance(desired, dict):
+        if not isinstance(current, dict):
+            return False
+        return all(_matches(current.get(k), v) for k, v in desired.items())
+    if isinstance(desired, list):
+        if not isinstance(current, list) or len(current) != len(desired):
+            return False
+        return all(_matches(c, d) for c, d in zip(current, desired))
+    if desired is None or desired == '':
+        return current is None or current == ''
+    return current == desired
+
+def _relation_keys(relations: List[Dict], task_names: Dict[int, str]) -> set:
+    keys = set()
+    for relation in relations:
+        pre_code = int(relation.get('preTaskCode') or 0)
+        post_code = int(relation.get('postTaskCode'))
+        keys.add((
+            task_names.get(pre_code) if pre_code else None,
+            task_names.get(post_code),
+            relation.get('conditionType') or 'NONE',
+        ))
+    return keys
+
+class DefinitionDiff:
+    def __init__(self):
+        self.definition_changes = {}
+        self.added_tasks = []
+        self.removed_tasks = []
+        self.changed_tasks = {}
+        self.added_relations = []
+        self.removed_relations = []
+
+    @property
+    def is_noop(self) -> bool:
+        return not (self.definition_changes or self.added_tasks or self.removed_tasks or self.changed_tasks
+                    or self.added_relations or self.removed_relations)
+
+    def summary(self) -> str:
+        return (f"+{len(self.added_tasks)} -{len(self.removed_tasks)} ~{len(self.changed_tasks)} tasks, "
+                f"+{len(self.added_relations)} -{len(self.removed_relations)} relations, "
+                f"{len(self.definition_changes)} definition fields")
+
+    def details(self) -> List[str]:
+        lines = [f"  definition {k}: {old!r} -> {new!r}" for k, (old, new) in self.definition_changes.items()]
+        lines += [f"  + task {name}" for name in self.added_tasks]
+        lines += [f"  - task {name}" for name in self.removed_tasks]
+        lines += [f"  ~ task {name}: {', '.join(fields)}" for name, fields in self.changed_tasks.items()]
+        lines += [f"  + relation {pre or '(start)'} -> {post} [{cond}]" for pre, post, cond in self.added_relations]
+        lines += [f"  - relation {pre or '(start)'} -> {post} [{cond}]" for pre, post, cond in self.removed_relations]
+        return lines
+
+def diff_definition(current: Optional[Dict], desired: DesiredDefinition) -> DefinitionDiff:
+    """
+    Compute the structural diff between a fetched definition and a desired one
+
+    Tasks are matched by name and relations compared as (pre task name,
+    post task name, condition type), so the diff does not depend on codes.
+
+    Args:
+        current: Fetched definition (processDefinition, processTaskRelationList
+            and taskDefinitionList), or None if it does not exist
+        desired: Desired definition
+
+    Returns:
+        DefinitionDiff
+    """
+    diff = DefinitionDiff()
+    current = current or {}
+    process_definition = current.get('processDefinition') or {}
+    current_tasks = {t.get('name'): t for t in current.get('taskDefinitionList') or []}
+    desired_tasks = {t.get('name'): t for t in desired.task_definitions}
+
+    for field, attr in DEFINITION_FIELDS.items():
+        old, new = process_definition.get(field), getattr(desired, attr)
+        if not _matches(_normalize(old), _normalize(new)):
+            diff.definition_changes[field] = (old, new)
+    if desired.locations is not None and not _matches(_normalize(process_definition.get('locations')),
+                                                      _normalize(desired.locations)):
+        diff.definition_changes['locations'] = (process_definition.get('locations'), desired.locations)
+
+    for name, task in desired_tasks.items():
+        current_task = current_tasks.get(name)
+        if current_task is None:
+            diff.added_tasks.append(name)
+            continue
+        fields = [f for f in TASK_FIELDS
+                  if f in task and not _matches(_normalize(current_task.get(f)), _normalize(task.get(f)))]
+        if fields:
+            diff.changed_tasks[name] = fields
+    diff.removed_tasks = [name for name in current_tasks if name not in desired_tasks]
+
+    current_relations = _relation_keys(current.get('processTaskRelationList') or [],
+                                       {t.get('code'): name for name, t in current_tasks.items()})
+    desired_relations = _relation_keys(desired.task_relations, desired.task_names())
+    diff.added_relations = sorted(desired_relations - current_relations, key=str)
+    diff.removed_relations = sorted(current_relations - desired_relations, key=str)
+    return diff
+
+class SyncPlan:
+    """Planned sync of one process definition"""
+    CREATE = 'CREATE'
+    UPDATE = 'UPDATE'
+    NOOP = 'NOOP'
+
+    def __init__(self, desired: DesiredDefinition, current: Optional[Dict] = None):
+        self.desired = desired
+        self.current = current
+        self.process_definition = (current or {}).get('processDefinition') or {}
+        self.code = self.process_definition.get('code')
+        self.diff = diff_definition(current, desired)
+        if not current:
+            self.action = self.CREATE
+        elif self.diff.is_noop:
+            self.action = self.NOOP
+        else:
+            self.action = self.UPDATE
+
+    @property
+    def name(self) -> str:
+        return self.desired.name
+
+    @property
+    def new_task_count(self) -> int:
+        return len(self.diff.added_tasks) if self.current else len(self.desired.task_definitions)
+
+    def format(self, verbose: bool = False) -> str:
+        if self.action == self.CREATE:
+            return f"+ CREATE {self.name} ({len(self.desired.task_definitions)} tasks)"
+        if self.action == self.NOOP:
+            return f"= NOOP {self.name} [code {self.code}]"
+        line = f"~ UPDATE {self.name} [code {self.code}] ({self.diff.summary()})"
+        return "\n".join([line] + self.diff.details()) if verbose else line
+
+class DefinitionSync:
+    def __init__(self,
+                 project_code: Union[str, int],
+                 api: Optional[ProcessDefinitionAPI] = None,
+                 max_workers: int = 8,
+                 schedule_api: Optional[ScheduleAPI] = None):
+        """
+        Idempotent sync of process definitions
+
+        Definitions are only updated when their structural diff is not empty,
+        existing task codes are reused, and only changed ONLINE definitions
+        are taken OFFLINE for the update and put back ONLINE afterwards,
+        together with their schedule if it was online.
+
+        Args:
+            project_code: Project code identifier
+            api: Process definition API client
+            max_workers: Maximum number of concurrent API calls
+            schedule_api: Schedule API client, built from api if None
+        """
+        self.project_code = project_code
+        self.api = api or ProcessDefinitionAPI()
+        self.schedule_api = schedule_api or ScheduleAPI(self.api.server_url, self.api.user_token,
+                                                        timeout=self.api.timeout, session=self.api.session,
+                                                        stats=self.api.stats)
+        self.max_workers = max_workers
+
+    def fetch(self, process_definition_code: Union[str, int]) -> Dict:
+        """Fetch the current state of a process definition"""
+        return self.api.get_process_definition(self.project_code, process_definition_code)
+
+    def plan(self, desired: DesiredDefinition,
+             process_definition_code: Optional[Union[str, int]] = None,
+             current: Optional[Dict] = None) -> SyncPlan:
+        """
+        Plan the sync of a desired definition
+
+        Args:
+            desired: Desired definition
+            process_definition_code: Code of the definition to update, None to create
+            current: Already fetched current state, skips the fetch
+
+        Returns:
+            SyncPlan
+
+        Raises:
+            DAGValidationError: If the desired tasks and relations are not a valid DAG
+        """
+        ProcessDAG.from_definition(desired.task_definitions, desired.task_relations).validate()
+        if current is None and process_definition_code is not None:
+            current = self.fetch(process_definition_code)
+        return SyncPlan(desired, current)
+
+    def allocate_task_codes(self, count: int) -> List[int]:
+        """Generate count task codes with as few gen-task-codes calls as possible"""
+        task_codes = []
+        while len(task_codes) < count:
+            gen_num = min(TASK_CODE_BATCH_SIZE, count - len(task_codes))
+            task_codes.extend(self.api.gen_task_codes(self.project_code, gen_num))
+        return task_codes
+
+    def build_payload(self, plan: SyncPlan, new_task_codes: List[int]) -> Dict:
+        """
+        Map the local codes of a plan to real codes
+
+        Existing tasks keep their code and version, new tasks consume
+        new_task_codes.
+        """
+        new_task_codes = iter(new_task_codes)
+        current_tasks = {t.get('name'): t for t in (plan.current or {}).get('taskDefinitionList') or []}
+        code_map = {0: 0}
+        versions = {0: 0}
+        task_definitions = []
+        for task in plan.desired.task_definitions:
+            current_task = current_tasks.get(task['name'])
+            if current_task:
+                code = current_task.get('code')
+                versions[code] = current_task.get('version', 1)
+            else:
+                code = next(new_task_codes)
+            code_map[task['code']] = code
+            task_definitions.append(dict(task, code=code))
+
+        task_relations = []
+        for relation in plan.desired.task_relations:
+            pre_code = code_map[int(relation.get('preTaskCode') or 0)]
+            post_code = code_map[int(relation['postTaskCode'])]
+            task_relations.append(dict(
+                relation,
+                preTaskCode=pre_code,
+                preTaskVersion=versions.get(pre_code, 1),
+                postTaskCode=post_code,
+                postTaskVersion=versions.get(post_code, 1),
+            ))
+
+        locations = plan.desired.locations
+        if locations is None:
+            diff = plan.diff
+            if plan.current and not (diff.added_tasks or diff.removed_tasks or diff.added_relations or diff.removed_relations):
+                locations = plan.process_definition.get('locations') or "[]"
+            else:
+                # NOTE: the graph changed, lay it out again
+                dag = ProcessDAG.from_definition(task_definitions, task_relations)
+                locations = json.dumps(dag.to_locations())
+        return {
+            'name': plan.desired.name,
+            'task_definitions': task_definitions,
+            'task_relations': task_relations,
+            'description': plan.desired.description,
+            'global_params': plan.desired.global_params,
+            'locations': locations,
+            'timeout': plan.desired.timeout,
+            'execution_type': plan.desired.execution_type,
+        }
+
+    def _online_schedules(self) -> Dict[int, int]:
+        """Process definition code -> id of its online schedule"""
+        return {int(s['processDefinitionCode']): s['id'] for s in self.schedule_api.list_schedules(self.project_code) or []
+                if s.get('releaseState') == 'ONLINE'}
+
+    def _submit(self, plan: SyncPlan, payload: Dict, online_schedules: Dict[int, int]) -> Dict:
+        if plan.action == SyncPlan.CREATE:
+            return self.api.create_process_definition(self.project_code, **payload)
+
+        if plan.process_definition.get('releaseState') != 'ONLINE':
+            return self.api.update_process_definition(self.project_code, plan.code, **payload)
+
+        # Taking the definition offline takes its schedule offline too
+        schedule_id = online_schedules.get(int(plan.code))
+        name = plan.process_definition.get('name')
+        self.api.release_process_definition(self.project_code, plan.code, name, 'OFFLINE')
+        try:
+            data = self.api.update_process_definition(self.project_code, plan.code, **payload)
+        except Exception as error:
+            # NOTE: put the definition and its schedule back online even if the update is rejected;
+            # the update error propagates, a failed restore is attached as its context
+            try:
+                self._restore_online(plan.code, name, schedule_id)
+            except Exception as restore_error:
+                error.__context__ = restore_error
+            raise
+        self._restore_online(plan.code, payload['name'], schedule_id)
+        return data
+
+    def _restore_online(self, code: int, name: str, schedule_id: Optional[int]):
+        self.api.release_process_definition(self.project_code, code, name, 'ONLINE')
+        if schedule_id is not None:
+            self.schedule_api.online_schedule(self.project_code, schedule_id)
+
+    def apply(self, plans: List[SyncPlan]) -> List[TaskOutcome]:
+        """
+        Apply plans with bounded concurrency, skipping no-op plans
+
+        Task codes of all new tasks are allocated up front in bulk.
+
+        Args:
+            plans: Plans returned by plan()
+
+        Returns:
+            One TaskOutcome per plan; no-op plans have a None result
+        """
+        pending = [p for p in plans if p.action != SyncPlan.NOOP]
+        task_codes = self.allocate_task_codes(sum(p.new_task_count for p in pending))
+        payloads = {}
+        offset = 0
+        for plan in pending:
+            payloads[id(plan)] = self.build_payload(plan, task_codes[offset:offset + plan.new_task_count])
+            offset += plan.new_task_count
+
+        online_updates = any(p.action == SyncPlan.UPDATE and p.process_definition.get('releaseState') == 'ONLINE'
+                             for p in pending)
+        online_schedules = self._online_schedules() if online_updates else {}
+        outcomes = {id(o.item): o for o in run_bounded(lambda p: self._submit(p, payloads[id(p)], online_schedules),
+                                                       pending, self.max_workers)}
+        return [outcomes.get(id(p), TaskOutcome(p)) for p in plans]
+
+    def sync(self, desired: DesiredDefinition,
+             process_definition_code: Optional[Union[str, int]] = None) -> Tuple[SyncPlan, Optional[Dict]]:
+        """
+        Plan and apply the sync of a single definition
+
+        Returns:
+            Tuple of (plan, response data), data is None for a no-op
+        """
+        plan = self.plan(desired, process_definition_code)
+        outcome = self.apply([plan])[0]
+        if not outcome.ok:
+            raise outcome.error
+        return plan, outcome.result
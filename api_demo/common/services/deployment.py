@@ -0,0 +1,308 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Union
+
+from common.api.datasource_api import DatasourceAPI
+from common.api.process_definition_api import ProcessDefinitionAPI
+from common.api.schedule_api import ScheduleAPI
+from common.exceptions import APIResponseError, DeploymentValidationError
+from common.services.definition_sync import DefinitionSync, DesiredDefinition, SyncPlan
+from common.utils.concurrent_util import run_bounded
+from common.utils.dag_util import ProcessDAG
+from common.utils.dq_task_util import build_parallel_task_relations, task_datasource_ids
+
+# Schedule fields required by ScheduleAPI.create_schedule
+SCHEDULE_FIELDS = ('start_time', 'end_time', 'crontab', 'timezone_id', 'tenant_code')
+
+class DeploymentSpec:
+    def __init__(self, data: Dict, defaults: Optional[Dict] = None):
+        """
+        One process definition of a release, with its optional schedule
+
+        Args:
+            data: name, tasks (task definitions with local codes, taskParams
+                as a mapping or JSON string), relations (parallel from the
+                start node if omitted), description, global_params, timeout,
+                execution_type, schedule (ScheduleAPI.create_schedule
+                arguments) and online (default true)
+            defaults: Release defaults, e.g. a 'schedule' mapping shared
+                by every schedule of the release
+        """
+        defaults = defaults or {}
+        self.name = data.get('name')
+        if not self.name:
+            raise ValueError("Process definition without a name in release")
+        tasks = [dict(t, taskParams=json.dumps(t['taskParams']) if isinstance(t.get('taskParams'), dict)
+                      else t.get('taskParams')) for t in data.get('tasks') or []]
+        relations = data.get('relations')
+        if relations is None:
+            relations = build_parallel_task_relations([t.get('code') for t in tasks])
+        global_params = data.get('global_params', defaults.get('global_params', "[]"))
+        self.desired = DesiredDefinition(
+            self.name, tasks, relations,
+            description=data.get('description', ''),
+            global_params=global_params if isinstance(global_params, str) else json.dumps(global_params),
+            timeout=int(data.get('timeout', defaults.get('timeout', 0))),
+            execution_type=data.get('execution_type', defaults.get('execution_type', 'PARALLEL')),
+        )
+        schedule = data.get('schedule')
+        self.schedule = dict(defaults.get('schedule') or {}, **schedule) if schedule else None
+        self.online = bool(data.get('online', True))
+
+    def datasource_ids(self) -> Set[int]:
+        """Datasource ids referenced by the task params"""
+        return task_datasource_ids(self.desired.task_definitions)
+
+def load_release(path: str) -> List[DeploymentSpec]:
+    """
+    Load a release manifest
+
+    The manifest is a YAML file with a ``definitions`` list of
+    DeploymentSpec entries and optional ``defaults``.
+
+    Raises:
+        ValueError: If an entry is incomplete
+    """
+    import yaml
+    with open(path, 'r') as f:
+        data = yaml.safe_load(f) or {}
+    defaults = data.get('defaults') or {}
+    return [DeploymentSpec(entry, defaults) for entry in data.get('definitions') or []]
+
+class StepFailure(NamedTuple):
+    step: str
+    name: str
+    error: BaseException
+
+class DeploymentResult:
+    """Outcome of a deployment, and of its rollback if it failed"""
+    def __init__(self):
+        self.definitions: Dict[str, int] = {}
+        self.schedules: Dict[str, int] = {}
+        self.failures: List[StepFailure] = []
+        self.rolled_back: List[str] = []
+        self.rollback_failures: List[StepFailure] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    def format(self) -> str:
+        lines = []
+        if self.ok:
+            lines.append(f"Deployed {len(self.definitions)} process definitions and {len(self.schedules)} schedules")
+            lines += [f"  {name}: code {code}" + (f", schedule {self.schedules[name]}" if name in self.schedules else "")
+                      for name, code in self.definitions.items()]
+            return "\n".join(lines)
+        lines += [f"! {f.step} {f.name} failed: {f.error}" for f in self.failures]
+        lines.append(f"Rolled back {len(self.rolled_back)} operations")
+        lines += [f"  {line}" for line in self.rolled_back]
+        lines += [f"! rollback {f.step} {f.name} failed: {f.error}" for f in self.rollback_failures]
+        return "\n".join(lines)
+
+class _Journal:
+    """Undo actions of the applied operations, grouped by deployment step"""
+    def __init__(self):
+        self.entries = []
+        self._lock = threading.Lock()
+
+    def record(self, stage: int, step: str, name: str, undo: Callable[[], object]):
+        with self._lock:
+            self.entries.append((stage, step, name, undo))
+
+    def stages(self) -> List[List[tuple]]:
+        """Undo actions, latest step first; actions of one step are independent"""
+        by_stage = {}
+        for entry in self.entries:
+            by_stage.setdefault(entry[0], []).append(entry)
+        return [by_stage[stage] for stage in sorted(by_stage, reverse=True)]
+
+class ReleaseDeployer:
+    def __init__(self,
+                 project_code: Union[str, int],
+                 process_definition_api: Optional[ProcessDefinitionAPI] = None,
+                 schedule_api: Optional[ScheduleAPI] = None,
+                 datasource_api: Optional[DatasourceAPI] = None,
+                 max_workers: int = 8):
+        """
+        All-or-nothing deployment of a set of new process definitions
+
+        Everything is validated up front, concurrently. The definitions are
+        then created, put online, scheduled and their schedules put online,
+        each step in parallel; if any operation fails, the operations
+        already applied are undone in reverse order.
+
+        Args:
+            project_code: Project code identifier
+            process_definition_api: Process definition API client
+            schedule_api: Schedule API client
+            datasource_api: Datasource API client
+            max_workers: Maximum number of concurrent API calls
+        """
+        self.project_code = project_code
+        self.process_definition_api = process_definition_api or ProcessDefinitionAPI()
+        api = self.process_definition_api
+        self.schedule_api = schedule_api or ScheduleAPI(api.server_url, api.user_token, timeout=api.timeout,
+                                                        session=api.session, stats=api.stats)
+        self.datasource_api = datasource_api or DatasourceAPI(api.server_url, api.user_token, timeout=api.timeout,
+                                                              session=api.session, stats=api.stats)
+        self.max_workers = max_workers
+        self.sync = DefinitionSync(project_code, self.process_definition_api, max_workers)
+
+    def _check_local(self, spec: DeploymentSpec) -> List[str]:
+        problems = []
+        dag = ProcessDAG.from_definition(spec.desired.task_definitions, spec.desired.task_relations)
+        problems += [f"{spec.name}: {p}" for p in dag.validate(raise_error=False)]
+        if not spec.desired.task_definitions:
+            problems.append(f"{spec.name}: no task")
+        if spec.schedule:
+            missing = [f for f in SCHEDULE_FIELDS if not spec.schedule.get(f)]
+            if missing:
+                problems.append(f"{spec.name}: schedule misses {', '.join(missing)}")
+            elif not spec.online:
+                problems.append(f"{spec.name}: a scheduled process definition must be online")
+            else:
+                # NOTE: imported on first use, cron parsing needs numpy
+                from common.utils.cron_util import parse_quartz_cron
+                try:
+                    parse_quartz_cron(spec.schedule['crontab'])
+                except ValueError as e:
+                    problems.append(f"{spec.name}: {e}")
+        return problems
+
+    def _check_remote(self, check: tuple):
+        kind, key = check
+        if kind == 'name':
+            self.process_definition_api.verify_process_definition_name(self.project_code, key)
+        else:
+            self.datasource_api.get_datasource(key)
+
+    def validate(self, specs: List[DeploymentSpec]) -> List[str]:
+        """
+        Validate a release without changing anything
+
+        DAGs, schedules and duplicate names are checked locally; name
+        availability and referenced datasources are checked with one
+        concurrent batch of API calls.
+
+        Returns:
+            Problems found, empty if the release can be deployed
+        """
+        problems = []
+        seen = set()
+        for spec in specs:
+            if spec.name in seen:
+                problems.append(f"{spec.name}: duplicate name in release")
+            seen.add(spec.name)
+            problems += self._check_local(spec)
+
+        checks = [('name', name) for name in sorted(seen)]
+        checks += [('datasource', i) for i in sorted(set().union(*(s.datasource_ids() for s in specs)))]
+        for outcome in run_bounded(self._check_remote, checks, self.max_workers):
+            if outcome.ok:
+                continue
+            kind, key = outcome.item
+            if kind == 'name':
+                problems.append(f"{key}: name not available: {outcome.error}")
+            elif isinstance(outcome.error, APIResponseError):
+                problems.append(f"datasource {key}: not found: {outcome.error}")
+            else:
+                raise outcome.error
+        return problems
+
+    def _run_step(self, stage: int, step: str, specs: List[DeploymentSpec], func: Callable[[DeploymentSpec], object],
+                  undo: Optional[Callable[[DeploymentSpec, object], Callable[[], object]]],
+                  journal: _Journal, result: DeploymentResult) -> Dict[str, object]:
+        def call(spec):
+            value = func(spec)
+            if undo is not None:
+                journal.record(stage, step, spec.name, undo(spec, value))
+            return value
+
+        values = {}
+        for outcome in run_bounded(call, specs, self.max_workers):
+            if outcome.ok:
+                values[outcome.item.name] = outcome.result
+            else:
+                result.failures.append(StepFailure(step, outcome.item.name, outcome.error))
+        return values
+
+    def _create(self, spec: DeploymentSpec, payload: Dict) -> int:
+        data = self.process_definition_api.create_process_definition(self.project_code, **payload)
+        return int(data['code'])
+
+    def _release(self, code: int, name: str, state: str):
+        return self.process_definition_api.release_process_definition(self.project_code, code, name, state)
+
+    def _create_schedule(self, spec: DeploymentSpec, code: int) -> int:
+        options = {k: v for k, v in spec.schedule.items() if k not in SCHEDULE_FIELDS}
+        data = self.schedule_api.create_schedule(self.project_code, code,
+                                                 *(spec.schedule[f] for f in SCHEDULE_FIELDS), **options)
+        return int(data['id'])
+
+    def deploy(self, specs: List[DeploymentSpec], rollback: bool = True) -> DeploymentResult:
+        """
+        Validate and deploy a release
+
+        Args:
+            specs: Process definitions of the release, none may exist yet
+            rollback: Undo the applied operations if any operation fails
+
+        Returns:
+            DeploymentResult
+
+        Raises:
+            DeploymentValidationError: If the release is not valid, nothing was changed
+        """
+        problems = self.validate(specs)
+        if problems:
+            raise DeploymentValidationError(f"Release has {len(problems)} problems", problems)
+
+        result = DeploymentResult()
+        journal = _Journal()
+        plans = [SyncPlan(spec.desired) for spec in specs]
+        task_codes = self.sync.allocate_task_codes(sum(p.new_task_count for p in plans))
+        payloads, offset = {}, 0
+        for spec, plan in zip(specs, plans):
+            payloads[spec.name] = self.sync.build_payload(plan, task_codes[offset:offset + plan.new_task_count])
+            offset += plan.new_task_count
+
+        codes = self._run_step(
+            1, 'create', specs, lambda s: self._create(s, payloads[s.name]),
+            lambda s, code: lambda: self.process_definition_api.delete_process_definition(self.project_code, code),
+            journal, result)
+        result.definitions = {s.name: codes[s.name] for s in specs if s.name in codes}
+
+        online = [s for s in specs if s.online]
+        scheduled = [s for s in specs if s.schedule]
+        steps = (
+            (2, 'online', online, lambda s: self._release(codes[s.name], s.name, 'ONLINE'),
+             lambda s, _: lambda: self._release(codes[s.name], s.name, 'OFFLINE')),
+            (3, 'schedule', scheduled, lambda s: self._create_schedule(s, codes[s.name]),
+             lambda s, schedule_id: lambda: self.schedule_api.delete_schedule(self.project_code, schedule_id)),
+            (4, 'online schedule', scheduled, lambda s: self.schedule_api.online_schedule(
+                self.project_code, result.schedules[s.name]),
+             lambda s, _: lambda: self.schedule_api.offline_schedule(self.project_code, result.schedules[s.name])),
+        )
+        for stage, step, step_specs, func, undo in steps:
+            if not result.ok:
+                break
+            values = self._run_step(stage, step, step_specs, func, undo, journal, result)
+            if step == 'schedule':
+                result.schedules = {s.name: values[s.name] for s in step_specs if s.name in values}
+
+        if not result.ok and rollback:
+            self._rollback(journal, result)
+        return result
+
+    def _rollback(self, journal: _Journal, result: DeploymentResult):
+        for entries in journal.stages():
+            for outcome in run_bounded(lambda entry: entry[3](), entries, self.max_workers):
+                _, step, name, _ = outcome.item
+                if outcome.ok:
+                    result.rolled_back.append(f"undo {step} {name}")
+                else:
+                    result.rollback_failures.append(StepFailure(step, name, outcome.error))
@@ -0,0 +1,198 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import glob
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
+
+import yaml
+
+from common.api.data_quality_api import DataQualityAPI
+from common.api.process_definition_api import ProcessDefinitionAPI
+from common.enums.data_quality import Rule
+from common.services.definition_sync import DefinitionSync, DesiredDefinition, SyncPlan
+from common.utils.concurrent_util import TaskOutcome, run_bounded
+from common.utils.dq_task_util import (build_data_quality_task_params, build_parallel_task_relations,
+                                       build_task_definition, build_trnio_sql_task_params)
+
+TASK_TYPE_DATA_QUALITY = 'DATA_QUALITY'
+TASK_TYPE_SQL = 'SQL'
+
+class CheckSpec:
+    """A single data quality check, in the YAML format of the single check scripts"""
+    def __init__(self, path: str, data: Dict):
+        self.path = path
+        self.definition_name = data.get('name')
+        self.description = data.get('description') or ""
+        self.task_definition = data.get('taskDefinition') or {}
+        self.task_name = self.task_definition.get('name')
+        self.task_type = self.task_definition.get('taskType', TASK_TYPE_DATA_QUALITY)
+        self.task_params = self.task_definition.get('taskParams') or {}
+
+    @property
+    def rule_id(self) -> int:
+        return int(self.task_params.get('ruleId'))
+
+def load_check_specs(source: str) -> List[CheckSpec]:
+    """
+    Load check specs from a directory, a manifest or a single spec file
+
+    A directory is scanned recursively for ``*.yaml``/``*.yml`` specs. A manifest
+    is a YAML file with a ``checks`` list of spec paths or glob patterns,
+    relative to the manifest.
+
+    Args:
+        source: Directory, manifest or spec path
+
+    Returns:
+        List of check specs, in a stable order
+
+    Raises:
+        ValueError: If a manifest pattern matches nothing or a spec has no valid ruleId
+    """
+    specs = _read_check_specs(source)
+    for spec in specs:
+        try:
+            spec.rule_id
+        except (TypeError, ValueError):
+            raise ValueError(f"Check spec {spec.path} misses an integer taskParams.ruleId") from None
+    return specs
+
+def _read_check_specs(source: str) -> List[CheckSpec]:
+    if os.path.isdir(source):
+        paths = glob.glob(os.path.join(source, '**', '*.yaml'), recursive=True)
+        paths += glob.glob(os.path.join(source, '**', '*.yml'), recursive=True)
+        return [_load_check_spec(path) for path in sorted(paths)]
+
+    with open(source, 'r') as f:
+        data = yaml.safe_load(f)
+
+    if isinstance(data, dict) and 'checks' in data:
+        base_dir = os.path.dirname(os.path.abspath(source))
+        paths = []
+        for pattern in data.get('checks') or []:
+            matched = sorted(glob.glob(os.path.join(base_dir, pattern), recursive=True))
+            if not matched:
+                raise ValueError(f"No check spec matches '{pattern}' in manifest {source}")
+            paths.extend(p for p in matched if p not in paths)
+        return [_load_check_spec(path) for path in paths]
+
+    return [CheckSpec(source, data)]
+
+def _load_check_spec(path: str) -> CheckSpec:
+    with open(path, 'r') as f:
+        return CheckSpec(path, yaml.safe_load(f))
+
+def group_check_specs(specs: List[CheckSpec]) -> "OrderedDict[str, List[CheckSpec]]":
+    """
+    Group check specs by process definition name
+
+    Raises:
+        ValueError: If a spec is incomplete or a task name is duplicated in a definition
+    """
+    groups = OrderedDict()
+    for spec in specs:
+        if not spec.definition_name or not spec.task_name:
+            raise ValueError(f"Check spec {spec.path} misses the process definition or task name")
+        if spec.task_type not in (TASK_TYPE_DATA_QUALITY, TASK_TYPE_SQL):
+            raise ValueError(f"Check spec {spec.path} has unsupported task type {spec.task_type}")
+        if not Rule.is_valid_rule_id(spec.rule_id):
+            raise ValueError(f"Check spec {spec.path} has invalid data quality rule id: {spec.rule_id}")
+        groups.setdefault(spec.definition_name, []).append(spec)
+
+    for name, group in groups.items():
+        seen = set()
+        for spec in group:
+            if spec.task_name in seen:
+                raise ValueError(f"Duplicate task name '{spec.task_name}' in process definition '{name}'")
+            seen.add(spec.task_name)
+    return groups
+
+class DataQualityCompiler:
+    def __init__(self,
+                 project_code: Union[str, int],
+                 process_definition_api: Optional[ProcessDefinitionAPI] = None,
+                 data_quality_api: Optional[DataQualityAPI] = None,
+                 max_workers: int = 8):
+        """
+        Compiler of data quality check specs into process definitions
+
+        Checks sharing a process definition name become parallel tasks of
+        that definition.
+
+        Args:
+            project_code: Project code identifier
+            process_definition_api: Process definition API client
+            data_quality_api: Data quality API client
+            max_workers: Maximum number of concurrent API calls
+        """
+        self.project_code = project_code
+        self.process_definition_api = process_definition_api or ProcessDefinitionAPI()
+        self.data_quality_api = data_quality_api or DataQualityAPI(
+            self.process_definition_api.server_url, self.process_definition_api.user_token)
+        self.max_workers = max_workers
+        self.sync = DefinitionSync(project_code, self.process_definition_api, max_workers)
+
+    def plan(self, specs: List[CheckSpec]) -> List[SyncPlan]:
+        """
+        Plan the creation or update of the process definitions of the specs
+
+        Existing definitions are fetched once for the whole project, and the
+        rule form-create json once per distinct rule. Definitions whose
+        compiled tasks match the existing ones are planned as no-ops.
+
+        Args:
+            specs: Check specs
+
+        Returns:
+            One plan per process definition
+        """
+        groups = group_check_specs(specs)
+
+        existing = {}
+        for x in self.process_definition_api.list_all_process_definitions(self.project_code) or []:
+            process_definition = x.get('processDefinition') or {}
+            existing[process_definition.get('name')] = x
+
+        rule_ids = sorted(set(s.rule_id for s in specs if s.task_type == TASK_TYPE_DATA_QUALITY))
+        rule_keys = {}
+        for outcome in run_bounded(self.data_quality_api.get_rule_input_parameter_keys, rule_ids, self.max_workers):
+            if not outcome.ok:
+                raise outcome.error
+            if not outcome.result:
+                raise ValueError(f"Failed to get input parameter keys of rule {outcome.item}")
+            rule_keys[outcome.item] = outcome.result
+
+        plans = []
+        for name, group in groups.items():
+            task_definitions = []
+            for local_code, spec in enumerate(group, start=1):
+                if spec.task_type == TASK_TYPE_DATA_QUALITY:
+                    task_params = build_data_quality_task_params(spec.task_params, rule_keys[spec.rule_id])
+                else:
+                    task_params = build_trnio_sql_task_params(spec.task_params)
+                    if task_params is None:
+                        raise ValueError(f"Failed to build SQL of check spec {spec.path}")
+                task_definitions.append(build_task_definition(spec.task_definition, local_code, spec.task_type, task_params))
+
+            desired = DesiredDefinition(
+                name,
+                task_definitions,
+                build_parallel_task_relations([t['code'] for t in task_definitions]),
+                description=group[0].description,
+            )
+            plans.append(self.sync.plan(desired, current=existing.get(name)))
+        return plans
+
+    def apply(self, plans: List[SyncPlan]) -> List[TaskOutcome]:
+        """
+        Submit the plans with bounded concurrency, skipping no-ops
+
+        Args:
+            plans: Plans returned by plan()
+
+        Returns:
+            One TaskOutcome per plan
+        """
+        return self.sync.apply(plans)
@@ -0,0 +1,97 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import fnmatch
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from common.analytics.datasource_health import CheckResult, HealthStore
+from common.analytics.history_store import DATETIME_FORMAT
+from common.api.datasource_api import DatasourceAPI
+from common.utils.concurrent_util import RateLimiter, TaskOutcome, fetch_pages, run_bounded
+
+PAGE_SIZE = 100
+
+class DatasourceHealthCheck:
+    def __init__(self,
+                 store: HealthStore,
+                 datasource_api: Optional[DatasourceAPI] = None,
+                 max_workers: int = 32,
+                 timeout: float = 10.0,
+                 rate: Optional[float] = None):
+        """
+        Connection test sweep over all datasources
+
+        Connection tests mostly wait on the remote database, so they run
+        with a high concurrency; every test is bounded by the timeout,
+        which makes a sweep last about ceil(n / max_workers) * timeout in
+        the worst case.
+
+        Args:
+            store: Time series of the results
+            datasource_api: DatasourceAPI client, one with the timeout is created if None
+            max_workers: Maximum number of tests in flight
+            timeout: Seconds after which a test counts as failed, only used for the
+                client created here; a given datasource_api keeps its own timeout
+            rate: Maximum number of tests started per second, unlimited if None
+        """
+        self.store = store
+        self.api = datasource_api or DatasourceAPI(timeout=timeout)
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rate, burst=max_workers) if rate else None
+
+    def list_datasources(self, types: Iterable[str] = (), name_pattern: Optional[str] = None) -> List[Dict]:
+        """
+        All datasources of the user, paged across types
+
+        Args:
+            types: Only these types, e.g. MYSQL; all types if empty
+            name_pattern: Only names matching this glob pattern
+        """
+        types = {t.upper() for t in types}
+        datasources = []
+        for _, page in fetch_pages(lambda _, page_no: self.api.list_datasources(page_no, PAGE_SIZE),
+                                   [None], PAGE_SIZE, self.max_workers):
+            datasources.extend(page)
+        return [d for d in datasources
+                if (not types or str(d.get('type')).upper() in types)
+                and (not name_pattern or fnmatch.fnmatchcase(d.get('name') or '', name_pattern))]
+
+    def _test(self, datasource: Dict) -> CheckResult:
+        if self.limiter is not None:
+            self.limiter.acquire()
+        checked_at = datetime.datetime.now().strftime(DATETIME_FORMAT)
+        started = time.perf_counter()
+        try:
+            self.api.connect_test_datasource(datasource['id'])
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, str(e)
+        return CheckResult(int(datasource['id']), checked_at, ok, (time.perf_counter() - started) * 1000, error)
+
+    def sweep(self,
+              types: Iterable[str] = (),
+              name_pattern: Optional[str] = None,
+              on_result: Optional[Callable[[Dict, CheckResult], None]] = None) -> List[CheckResult]:
+        """
+        Test every datasource once and record the results
+
+        Args:
+            types: Only these types, all types if empty
+            name_pattern: Only names matching this glob pattern
+            on_result: Called with (datasource, result) as soon as each test ends
+
+        Returns:
+            One CheckResult per datasource
+        """
+        datasources = self.list_datasources(types, name_pattern)
+        self.store.upsert_datasources(datasources, datetime.datetime.now().strftime(DATETIME_FORMAT))
+
+        def done(outcome: TaskOutcome):
+            if on_result is not None and outcome.ok:
+                on_result(outcome.item, outcome.result)
+
+        results = [outcome.result for outcome in run_bounded(self._test, datasources, self.max_workers, done)]
+        self.store.record(results)
+        return results
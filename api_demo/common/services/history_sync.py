@@ -0,0 +1,110 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+from typing import Dict, Iterable, List, Optional, Union
+
+from common.analytics.history_store import DATETIME_FORMAT, HistoryStore
+from common.api.process_definition_api import ProcessDefinitionAPI
+from common.api.process_instance_api import ProcessInstanceAPI
+from common.api.project_api import ProjectAPI
+from common.utils.concurrent_util import fetch_pages, run_bounded
+
+PAGE_SIZE = 100
+TASK_SYNC_CHUNK = 200
+
+class HistorySync:
+    def __init__(self,
+                 store: HistoryStore,
+                 process_instance_api: Optional[ProcessInstanceAPI] = None,
+                 project_api: Optional[ProjectAPI] = None,
+                 max_workers: int = 8,
+                 process_definition_api: Optional[ProcessDefinitionAPI] = None):
+        """
+        Incremental export of process and task instances into a HistoryStore
+
+        Args:
+            store: Destination store
+            process_instance_api: ProcessInstanceAPI client
+            project_api: ProjectAPI client, used when no project is given
+            max_workers: Maximum number of concurrent API calls
+            process_definition_api: ProcessDefinitionAPI client, for task definitions
+        """
+        self.store = store
+        self.api = process_instance_api or ProcessInstanceAPI()
+        api = self.api
+        self.project_api = project_api or ProjectAPI(api.server_url, api.user_token, timeout=api.timeout,
+                                                     session=api.session, stats=api.stats)
+        self.max_workers = max_workers
+        self.process_definition_api = process_definition_api or ProcessDefinitionAPI(
+            api.server_url, api.user_token, timeout=api.timeout, session=api.session, stats=api.stats)
+
+    def sync(self,
+             project_codes: Optional[Iterable[Union[str, int]]] = None,
+             since: Optional[datetime.datetime] = None,
+             with_tasks: bool = True,
+             with_definitions: bool = True) -> Dict[str, Dict[str, int]]:
+        """
+        Sync the instances started since the high-water mark of each project
+
+        Pages are requested concurrently and written chunk by chunk; the
+        end of the window is fixed when the sync starts, so that new runs do
+        not shift the pages being read.
+
+        Args:
+            project_codes: Projects to sync, all projects of the user if empty
+            since: Start of the window for projects never synced, all history if None
+            with_tasks: Also sync the task instances of finished process instances
+            with_definitions: Also refresh the task definitions (worker group, priority, quotas)
+
+        Returns:
+            Project code -> {'process_instances': n, 'task_instances': n, 'task_definitions': n, 'watermark': ...}
+        """
+        project_codes = [str(code) for code in project_codes or []]
+        if not project_codes:
+            project_codes = [str(p['code']) for p in self.project_api.list_user_projects() or []]
+
+        until = datetime.datetime.now().strftime(DATETIME_FORMAT)
+        default_since = since.strftime(DATETIME_FORMAT) if since else None
+        windows = {code: self.store.watermark(code) or default_since for code in project_codes}
+
+        def page(project_code, page_no):
+            return self.api.list_process_instances(project_code, page_no, PAGE_SIZE,
+                                                   start_date=windows[project_code], end_date=until)
+
+        stats = {code: {'process_instances': 0, 'task_instances': 0, 'task_definitions': 0} for code in project_codes}
+        for project_code, instances in fetch_pages(page, project_codes, PAGE_SIZE, self.max_workers):
+            stats[project_code]['process_instances'] += self.store.upsert_process_instances(project_code, instances)
+
+        if with_tasks:
+            for project_code in project_codes:
+                stats[project_code]['task_instances'] = self.sync_tasks(project_code)
+
+        if with_definitions:
+            for outcome in run_bounded(self.process_definition_api.list_all_process_definitions, project_codes, self.max_workers):
+                if not outcome.ok:
+                    raise outcome.error
+                stats[outcome.item]['task_definitions'] = self.store.upsert_task_definitions(outcome.item, outcome.result or [])
+
+        for project_code in project_codes:
+            stats[project_code]['watermark'] = self.store.update_watermark(project_code)
+        return stats
+
+    def sync_tasks(self, project_code: Union[str, int]) -> int:
+        """
+        Fetch the task instances of the finished process instances not synced yet
+
+        Returns:
+            Number of task instances written
+        """
+        pending = self.store.pending_task_syncs(project_code)
+        written = 0
+        for i in range(0, len(pending), TASK_SYNC_CHUNK):
+            chunk: List[int] = pending[i:i + TASK_SYNC_CHUNK]
+            outcomes = run_bounded(lambda instance_id: self.api.list_task_instances(project_code, instance_id),
+                                   chunk, self.max_workers)
+            for outcome in outcomes:
+                if not outcome.ok:
+                    raise outcome.error
+                written += self.store.upsert_task_instances(project_code, outcome.item, outcome.result)
+        return written
@@ -0,0 +1,505 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import gzip
+import json
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from common.api.datasource_api import DatasourceAPI
+from common.api.process_definition_api import ProcessDefinitionAPI
+from common.api.project_api import ProjectAPI
+from common.api.schedule_api import ScheduleAPI
+from common.services.datasource_provision import DatasourceProvisioner
+from common.services.definition_sync import DefinitionSync
+from common.services.deployment import StepFailure
+from common.utils.concurrent_util import run_bounded
+from common.utils.dag_util import ProcessDAG
+from common.utils.dq_task_util import map_task_datasources, task_datasource_ids
+
+SNAPSHOT_VERSION = 1
+
+# Task fields set by the server, not sent back when a task is recreated
+TASK_SERVER_FIELDS = ('id', 'version', 'projectCode', 'userId', 'userName', 'createTime', 'updateTime',
+                      'operator', 'operateTime', 'projectName', 'modifyBy')
+
+# Schedule fields -> ScheduleAPI.create_schedule options
+SCHEDULE_OPTIONS = (('warningType', 'warning_type'), ('warningGroupId', 'warning_group_id'),
+                    ('failureStrategy', 'failure_strategy'), ('processInstancePriority', 'process_instance_priority'),
+                    ('workerGroup', 'worker_group'), ('environmentCode', 'environment_code'))
+
+def save_snapshot(snapshot: Dict, path: str):
+    """Write a snapshot as gzip compressed JSON"""
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+
+def load_snapshot(path: str) -> Dict:
+    """
+    Read a snapshot written by save_snapshot
+
+    Raises:
+        ValueError: If the file is not a snapshot of a supported version
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"{path} is not a project snapshot of version {SNAPSHOT_VERSION}")
+    return snapshot
+
+def _first_error(outcomes) -> list:
+    for outcome in outcomes:
+        if not outcome.ok:
+            raise outcome.error
+    return [outcome.result for outcome in outcomes]
+
+class ProjectExporter:
+    def __init__(self,
+                 project_api: Optional[ProjectAPI] = None,
+                 process_definition_api: Optional[ProcessDefinitionAPI] = None,
+                 schedule_api: Optional[ScheduleAPI] = None,
+                 datasource_api: Optional[DatasourceAPI] = None,
+                 max_workers: int = 8):
+        """
+        Snapshot of the process definitions, schedules and datasources of a project
+
+        The project, the definition list and the schedules are fetched
+        together, then every definition with its tasks and relations, then
+        the datasources referenced by the tasks, each batch concurrently.
+
+        Args:
+            project_api: Project API client
+            process_definition_api: Process definition API client
+            schedule_api: Schedule API client
+            datasource_api: Datasource API client
+            max_workers: Maximum number of concurrent API calls
+        """
+        self.process_definition_api = process_definition_api or ProcessDefinitionAPI()
+        api = self.process_definition_api
+        shared = dict(timeout=api.timeout, session=api.session, stats=api.stats)
+        self.project_api = project_api or ProjectAPI(api.server_url, api.user_token, **shared)
+        self.schedule_api = schedule_api or ScheduleAPI(api.server_url, api.user_token, **shared)
+        self.datasource_api = datasource_api or DatasourceAPI(api.server_url, api.user_token, **shared)
+        self.max_workers = max_workers
+
+    def export(self, project_code: Union[str, int]) -> Dict:
+        """
+        Fetch a snapshot of a project
+
+        Datasources are kept for their names and connection fields,
+        passwords cannot be read back.
+
+        Returns:
+            Snapshot with version, exported_at, project, process_definitions
+            (processDefinition, taskDefinitionList and processTaskRelationList
+            of each definition), schedules and datasources
+
+        Raises:
+            APIException: The first failed call
+        """
+        project, definitions, schedules = _first_error(run_bounded(lambda call: call(), [
+            lambda: self.project_api.get_project(project_code),
+            lambda: self.process_definition_api.list_process_definitions(project_code),
+            lambda: self.schedule_api.list_schedules(project_code),
+        ], self.max_workers))
+
+        codes = sorted(d['code'] for d in definitions or [])
+        details = _first_error(run_bounded(
+            lambda code: self.process_definition_api.get_process_definition(project_code, code), codes,
+            self.max_workers))
+
+        tasks = [t for d in details for t in d.get('taskDefinitionList') or []]
+        datasources = _first_error(run_bounded(self.datasource_api.get_datasource, sorted(task_datasource_ids(tasks)),
+                                               self.max_workers))
+        return {
+            'version': SNAPSHOT_VERSION,
+            'exported_at': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'project': project,
+            'process_definitions': [{k: d.get(k) for k in ('processDefinition', 'taskDefinitionList',
+                                                           'processTaskRelationList')} for d in details],
+            'schedules': sorted(schedules or [], key=lambda s: s['processDefinitionCode']),
+            'datasources': datasources,
+        }
+
+class ImportPlan:
+    """Definitions of a snapshot to create, in dependency waves"""
+    def __init__(self, snapshot: Dict):
+        self.snapshot = snapshot
+        self.source_project_code = int(snapshot['project']['code'])
+        self.definitions = {int(d['processDefinition']['code']): d for d in snapshot['process_definitions']}
+        self.schedules = {int(s['processDefinitionCode']): s for s in snapshot.get('schedules') or []}
+        # Source definition code -> target code of the existing definitions kept as is
+        self.existing: Dict[int, int] = {}
+        # Source codes of the existing definitions online in the target
+        self.existing_online: Set[int] = set()
+        # Source definition code -> schedule of the existing definition in the target
+        self.existing_schedules: Dict[int, Dict] = {}
+        # Source datasource id -> target datasource id
+        self.datasource_map: Dict[int, int] = {}
+        # Source task code -> target task code of the tasks of existing definitions
+        # referenced by DEPENDENT tasks, matched by name
+        self.existing_task_codes: Dict[int, int] = {}
+        self.waves: List[List[int]] = []
+        self.problems: List[str] = []
+
+    def name(self, code: int) -> str:
+        return self.definitions[code]['processDefinition']['name']
+
+    @property
+    def skipped(self) -> List[str]:
+        return [self.name(code) for code in self.existing]
+
+    @property
+    def task_count(self) -> int:
+        return sum(len(self.definitions[code].get('taskDefinitionList') or []) for wave in self.waves for code in wave)
+
+    @property
+    def to_release(self) -> List[int]:
+        """Existing definitions online in the snapshot but not in the target"""
+        return [code for code in self.existing if code not in self.existing_online
+                and self.definitions[code]['processDefinition'].get('releaseState') == 'ONLINE']
+
+    @property
+    def unscheduled(self) -> List[int]:
+        """Existing definitions with a schedule in the snapshot but not in the target"""
+        return [code for code in self.existing if code in self.schedules and code not in self.existing_schedules]
+
+    def format(self) -> str:
+        to_release, unscheduled = set(self.to_release), set(self.unscheduled)
+        lines = []
+        for code, target in self.existing.items():
+            missing = [step for step, pending in (('online', code in to_release), ('schedule', code in unscheduled))
+                       if pending]
+            lines.append(f"= SKIP {self.name(code)} (exists as {target}"
+                         + (f", missing {' and '.join(missing)})" if missing else ")"))
+        for i, wave in enumerate(self.waves):
+            lines += [f"+ CREATE {self.name(code)} (wave {i + 1})" for code in wave]
+        lines += [f"! {problem}" for problem in self.problems]
+        return "\n".join(lines)
+
+def dependency_waves(plan: ImportPlan, codes) -> Tuple[List[List[int]], List[int]]:
+    """
+    Layers of the reference graph between the given definitions, referenced definitions first
+
+    Returns:
+        (waves, codes left out by circular references)
+    """
+    pending = {code: definition_references(plan.definitions[code], plan.source_project_code) & set(codes) - {code}
+               for code in codes}
+    waves = []
+    while pending:
+        wave = sorted(code for code, deps in pending.items() if not deps)
+        if not wave:
+            return waves, sorted(pending)
+        waves.append(wave)
+        for code in wave:
+            del pending[code]
+        for deps in pending.values():
+            deps.difference_update(wave)
+    return waves, []
+
+def _task_params(definition: Dict) -> Iterator[Dict]:
+    for task in definition.get('taskDefinitionList') or []:
+        params = task.get('taskParams')
+        yield json.loads(params) if isinstance(params, str) and params else params or {}
+
+def dependent_items(definition: Dict, project_code: int) -> Iterator[Dict]:
+    """Items of the DEPENDENT tasks on definitions of the same project"""
+    for params in _task_params(definition):
+        for dependent in (params.get('dependence') or {}).get('dependTaskList') or []:
+            for item in dependent.get('dependItemList') or []:
+                if int(item.get('projectCode') or 0) == project_code and item.get('definitionCode'):
+                    yield item
+
+def definition_references(definition: Dict, project_code: int) -> Set[int]:
+    """Codes of the definitions of the same project referenced by SUB_PROCESS and DEPENDENT tasks"""
+    codes = {int(params['processDefinitionCode']) for params in _task_params(definition)
+             if params.get('processDefinitionCode')}
+    codes.update(int(item['definitionCode']) for item in dependent_items(definition, project_code))
+    return codes
+
+class ImportResult:
+    def __init__(self):
+        self.definitions: Dict[str, int] = {}
+        self.skipped: List[str] = []
+        self.online: List[str] = []
+        self.schedules: Dict[str, int] = {}
+        # Schedules not created because their definition is offline
+        self.unscheduled: List[str] = []
+        self.failures: List[StepFailure] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    def format(self) -> str:
+        lines = [f"Created {len(self.definitions)} process definitions ({len(self.online)} online) and "
+                 f"{len(self.schedules)} schedules, skipped {len(self.skipped)} existing"]
+        if self.unscheduled:
+            lines.append(f"Schedules not created, process definitions offline: {', '.join(self.unscheduled)}")
+        lines += [f"! {f.step} {f.name} failed: {f.error}" for f in self.failures]
+        return "\n".join(lines)
+
+class ProjectImporter:
+    def __init__(self,
+                 project_code: Union[str, int],
+                 process_definition_api: Optional[ProcessDefinitionAPI] = None,
+                 schedule_api: Optional[ScheduleAPI] = None,
+                 datasource_api: Optional[DatasourceAPI] = None,
+                 max_workers: int = 8):
+        """
+        Bulk recreation of a project snapshot in another project or cluster
+
+        Task codes are allocated in bulk and every reference is remapped:
+        task codes of tasks, relations and locations, definition codes of
+        SUB_PROCESS and DEPENDENT tasks of the same project, and datasource
+        ids, matched by name in the target, like the tasks of existing
+        definitions that DEPENDENT tasks depend on. Definitions referenced
+        by others are created first; each wave of independent definitions
+        is created concurrently.
+
+        Args:
+            project_code: Target project code
+            process_definition_api: Process definition API client
+            schedule_api: Schedule API client
+            datasource_api: Datasource API client
+            max_workers: Maximum number of concurrent API calls
+        """
+        self.project_code = int(project_code)
+        self.process_definition_api = process_definition_api or ProcessDefinitionAPI()
+        api = self.process_definition_api
+        shared = dict(timeout=api.timeout, session=api.session, stats=api.stats)
+        self.schedule_api = schedule_api or ScheduleAPI(api.server_url, api.user_token, **shared)
+        self.datasource_api = datasource_api or DatasourceAPI(api.server_url, api.user_token, **shared)
+        self.max_workers = max_workers
+        self.sync = DefinitionSync(project_code, self.process_definition_api, max_workers)
+
+    def plan(self, snapshot: Dict, datasource_map: Optional[Dict[int, int]] = None) -> ImportPlan:
+        """
+        Plan the import of a snapshot without changing anything
+
+        Definitions whose name exists in the target are kept and skipped,
+        their release state and schedule in the target are read so that
+        apply completes the steps a previous import left undone.
+        Datasources not in datasource_map are matched by name.
+
+        Args:
+            snapshot: Snapshot of ProjectExporter.export or load_snapshot
+            datasource_map: Source datasource id -> target datasource id
+        """
+        plan = ImportPlan(snapshot)
+        existing_definitions, existing_datasources, existing_schedules = _first_error(run_bounded(
+            lambda call: call(), [
+                lambda: self.process_definition_api.list_process_definitions(self.project_code),
+                lambda: DatasourceProvisioner(self.datasource_api, self.max_workers).existing(),
+                lambda: self.schedule_api.list_schedules(self.project_code),
+            ], self.max_workers))
+
+        names = {d['name']: d for d in existing_definitions or []}
+        schedules = {int(s['processDefinitionCode']): s for s in existing_schedules or []}
+        for code in plan.definitions:
+            target = names.get(plan.name(code))
+            if target is None:
+                continue
+            plan.existing[code] = int(target['code'])
+            if target.get('releaseState') == 'ONLINE':
+                plan.existing_online.add(code)
+            if int(target['code']) in schedules:
+                plan.existing_schedules[code] = schedules[int(target['code'])]
+
+        datasource_map = {int(k): int(v) for k, v in (datasource_map or {}).items()}
+        for datasource in snapshot.get('datasources') or []:
+            source_id = int(datasource['id'])
+            if source_id in datasource_map:
+                plan.datasource_map[source_id] = datasource_map[source_id]
+            elif datasource.get('name') in existing_datasources:
+                plan.datasource_map[source_id] = int(existing_datasources[datasource['name']]['id'])
+            else:
+                plan.problems.append(f"datasource {datasource.get('name')} [id {source_id}] missing in target")
+
+        # Layers of the reference graph, referenced definitions first
+        plan.waves, circular = dependency_waves(plan, [code for code in plan.definitions if code not in plan.existing])
+        plan.problems += [f"{plan.name(code)}: circular process definition references" for code in circular]
+        self._map_existing_tasks(plan)
+        return plan
+
+    def _map_existing_tasks(self, plan: ImportPlan):
+        """Match by name the tasks of existing definitions that created DEPENDENT tasks depend on"""
+        referenced: Dict[int, Set[int]] = {}
+        for code in plan.definitions:
+            if code in plan.existing:
+                continue
+            for item in dependent_items(plan.definitions[code], plan.source_project_code):
+                if int(item['definitionCode']) in plan.existing and item.get('depTaskCode'):
+                    referenced.setdefault(int(item['definitionCode']), set()).add(int(item['depTaskCode']))
+        if not referenced:
+            return
+
+        codes = sorted(referenced)
+        targets = _first_error(run_bounded(lambda code: self.process_definition_api.get_process_definition(
+            self.project_code, plan.existing[code]), codes, self.max_workers))
+        for code, target in zip(codes, targets):
+            source_names = {int(t['code']): t['name'] for t in plan.definitions[code].get('taskDefinitionList') or []}
+            target_codes = {t['name']: int(t['code']) for t in (target or {}).get('taskDefinitionList') or []}
+            for task_code in sorted(referenced[code]):
+                name = source_names.get(task_code)
+                if name in target_codes:
+                    plan.existing_task_codes[task_code] = target_codes[name]
+                else:
+                    plan.problems.append(f"{plan.name(code)}: task {name or task_code} referenced by a DEPENDENT "
+                                         f"task missing in the existing definition {plan.existing[code]}")
+
+    def _remap_params(self, params, task_codes: Dict[int, int], definition_codes: Dict[int, int],
+                      plan: ImportPlan):
+        params = map_task_datasources(params, lambda i: plan.datasource_map.get(i, i))
+        if not isinstance(params, dict):
+            return params
+        if params.get('processDefinitionCode'):
+            params['processDefinitionCode'] = definition_codes.get(int(params['processDefinitionCode']),
+                                                                   params['processDefinitionCode'])
+        for dependent in (params.get('dependence') or {}).get('dependTaskList') or []:
+            for item in dependent.get('dependItemList') or []:
+                if int(item.get('projectCode') or 0) != plan.source_project_code:
+                    continue
+                item['projectCode'] = self.project_code
+                item['definitionCode'] = definition_codes.get(int(item.get('definitionCode') or 0),
+                                                              item.get('definitionCode'))
+                if item.get('depTaskCode'):
+                    item['depTaskCode'] = task_codes.get(int(item['depTaskCode']), item['depTaskCode'])
+        return params
+
+    def _payload(self, definition: Dict, task_codes: Dict[int, int], definition_codes: Dict[int, int],
+                 plan: ImportPlan) -> Dict:
+        tasks = []
+        for task in definition.get('taskDefinitionList') or []:
+            params = task.get('taskParams')
+            params = json.loads(params) if isinstance(params, str) and params else params
+            task = {k: v for k, v in task.items() if k not in TASK_SERVER_FIELDS}
+            task['code'] = task_codes[int(task['code'])]
+            task['taskParams'] = json.dumps(self._remap_params(params, task_codes, definition_codes, plan))
+            tasks.append(task)
+
+        relations = []
+        for relation in definition.get('processTaskRelationList') or []:
+            pre_code = task_codes.get(int(relation.get('preTaskCode') or 0), 0)
+            relations.append({
+                'name': relation.get('name') or '',
+                'preTaskCode': pre_code,
+                'preTaskVersion': 1 if pre_code else 0,
+                'postTaskCode': task_codes[int(relation['postTaskCode'])],
+                'postTaskVersion': 1,
+                'conditionType': relation.get('conditionType') or 'NONE',
+                'conditionParams': relation.get('conditionParams') or {},
+            })
+
+        process_definition = definition['processDefinition']
+        try:
+            locations = [dict(location, taskCode=task_codes[int(location['taskCode'])])
+                         for location in json.loads(process_definition.get('locations') or '[]')]
+        except (ValueError, KeyError, TypeError):
+            locations = None
+        if not locations:
+            locations = ProcessDAG.from_definition(tasks, relations).to_locations()
+        return {
+            'name': process_definition['name'],
+            'task_definitions': tasks,
+            'task_relations': relations,
+            'description': process_definition.get('description') or '',
+            'global_params': process_definition.get('globalParams') or '[]',
+            'locations': json.dumps(locations),
+            'timeout': int(process_definition.get('timeout') or 0),
+            'execution_type': process_definition.get('executionType') or 'PARALLEL',
+        }
+
+    def _create_schedule(self, schedule: Dict, code: int) -> int:
+        options = {option: schedule[field] for field, option in SCHEDULE_OPTIONS if schedule.get(field) is not None}
+        data = self.schedule_api.create_schedule(self.project_code, code, schedule['startTime'], schedule['endTime'],
+                                                 schedule['crontab'], schedule['timezoneId'],
+                                                 schedule.get('tenantCode') or 'default', **options)
+        return int(data['id'])
+
+    def apply(self, plan: ImportPlan, release: bool = True, with_schedules: bool = True) -> ImportResult:
+        """
+        Import a planned snapshot
+
+        A definition is not created if a definition it references failed.
+        Nothing is undone on failure: the import can be run again, created
+        definitions are then skipped but still put online and scheduled
+        if that failed the first time. Schedules are only created for
+        definitions online in the target, the server refuses the others.
+
+        Args:
+            plan: Plan of ProjectImporter.plan, without problems
+            release: Put online the definitions and schedules that were online
+            with_schedules: Recreate the schedules of online definitions
+
+        Raises:
+            ValueError: If the plan has problems
+        """
+        if plan.problems:
+            raise ValueError(f"Import plan has {len(plan.problems)} problems")
+        result = ImportResult()
+        result.skipped = plan.skipped
+
+        source_tasks = [int(t['code']) for wave in plan.waves for code in wave
+                        for t in plan.definitions[code].get('taskDefinitionList') or []]
+        task_codes = dict(zip(source_tasks, self.sync.allocate_task_codes(len(source_tasks))))
+        task_codes.update(plan.existing_task_codes)
+        definition_codes = dict(plan.existing)
+        failed: Set[int] = set()
+
+        def create(code):
+            payload = self._payload(plan.definitions[code], task_codes, definition_codes, plan)
+            data = self.process_definition_api.create_process_definition(self.project_code, **payload)
+            return int(data['code'])
+
+        created_waves = []
+        for wave in plan.waves:
+            blocked = [c for c in wave if definition_references(plan.definitions[c], plan.source_project_code) & failed]
+            for code in blocked:
+                failed.add(code)
+                result.failures.append(StepFailure('create', plan.name(code), ValueError("referenced definition failed")))
+            created = []
+            for outcome in run_bounded(create, [c for c in wave if c not in failed], self.max_workers):
+                if outcome.ok:
+                    definition_codes[outcome.item] = outcome.result
+                    result.definitions[plan.name(outcome.item)] = outcome.result
+                    created.append(outcome.item)
+                else:
+                    failed.add(outcome.item)
+                    result.failures.append(StepFailure('create', plan.name(outcome.item), outcome.error))
+            created_waves.append(created)
+
+        online: Set[int] = set(plan.existing_online)
+        if release:
+            # Referenced definitions go online before the definitions referencing them,
+            # skipped definitions first as created ones may reference them
+            for wave in dependency_waves(plan, plan.to_release)[0] + created_waves:
+                was_online = [c for c in wave if plan.definitions[c]['processDefinition'].get('releaseState') == 'ONLINE']
+                for outcome in run_bounded(lambda c: self.process_definition_api.release_process_definition(
+                        self.project_code, definition_codes[c], plan.name(c), 'ONLINE'), was_online, self.max_workers):
+                    if outcome.ok:
+                        online.add(outcome.item)
+                        if outcome.item not in plan.existing:
+                            result.online.append(plan.name(outcome.item))
+                    else:
+                        result.failures.append(StepFailure('online', plan.name(outcome.item), outcome.error))
+
+        if with_schedules:
+            unscheduled = plan.unscheduled + [c for wave in created_waves for c in wave if c in plan.schedules]
+            scheduled = [c for c in unscheduled if c in online]
+            result.unscheduled = [plan.name(c) for c in unscheduled if c not in online]
+            schedule_ids = {c: int(s['id']) for c, s in plan.existing_schedules.items()
+                            if c in online and s.get('releaseState') != 'ONLINE'}
+            for outcome in run_bounded(lambda c: self._create_schedule(plan.schedules[c], definition_codes[c]),
+                                       scheduled, self.max_workers):
+                if outcome.ok:
+                    schedule_ids[outcome.item] = outcome.result
+                    result.schedules[plan.name(outcome.item)] = outcome.result
+                else:
+                    result.failures.append(StepFailure('schedule', plan.name(outcome.item), outcome.error))
+            to_online = [c for c in schedule_ids if release and plan.schedules.get(c, {}).get('releaseState') == 'ONLINE']
+            for outcome in run_bounded(lambda c: self.schedule_api.online_schedule(self.project_code, schedule_ids[c]),
+                                       to_online, self.max_workers):
+                if not outcome.ok:
+                    result.failures.append(StepFailure('online schedule', plan.name(outcome.item), outcome.error))
+        return result
@@ -0,0 +1,242 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from common.analytics.history_store import DATETIME_FORMAT
+from common.api.process_instance_api import ProcessInstanceAPI
+from common.api.project_api import ProjectAPI
+from common.utils.concurrent_util import fetch_pages, run_bounded
+
+# States of a process instance that has not finished yet
+ACTIVE_STATES = ('SUBMITTED_SUCCESS', 'RUNNING_EXECUTION', 'READY_PAUSE', 'READY_STOP',
+                 'DELAY_EXECUTION', 'SERIAL_WAIT', 'WAIT_TO_RUN', 'READY_BLOCK')
+
+class RunTransition(NamedTuple):
+    project_code: str
+    process_instance_id: int
+    name: str
+    previous: Optional[str]
+    state: str
+    at: str
+    duration: Optional[str]
+
+class _Run(NamedTuple):
+    project_code: str
+    name: str
+    state: str
+    update_time: Optional[str]
+
+class CycleStats(NamedTuple):
+    projects: int
+    tracked: int
+    transitions: int
+    api_calls: int
+    pending: int
+    interval: float
+
+class RunMonitor:
+    def __init__(self,
+                 process_instance_api: Optional[ProcessInstanceAPI] = None,
+                 project_api: Optional[ProjectAPI] = None,
+                 project_codes: Optional[Iterable[Union[str, int]]] = None,
+                 states: Iterable[str] = ('RUNNING_EXECUTION',),
+                 page_size: int = 100,
+                 max_workers: int = 8,
+                 max_detail_calls: int = 20,
+                 idle_every: int = 5,
+                 min_interval: float = 5.0,
+                 max_interval: float = 60.0,
+                 project_refresh: int = 120):
+        """
+        Track active process instances across projects and report only their transitions
+
+        Every cycle lists the watched states of the active projects,
+        page_size runs per call, and diffs them with the local state. Runs
+        whose state and update time did not change are not looked at
+        again; runs that left the list are resolved with a detail call,
+        at most max_detail_calls per cycle, the rest waiting for the next
+        cycle. Projects without tracked runs are only listed every
+        idle_every cycles, spread over the cycles. A cycle therefore costs
+        about sum(ceil(runs / page_size)) + idle projects / idle_every +
+        max_detail_calls calls, whatever the number of runs.
+
+        Args:
+            process_instance_api: ProcessInstanceAPI client
+            project_api: ProjectAPI client, used when no project is given
+            project_codes: Projects to watch, all projects of the user if empty
+            states: Process instance states listed every cycle
+            page_size: Page size of the list calls
+            max_workers: Maximum number of concurrent API calls
+            max_detail_calls: Maximum number of detail calls per cycle
+            idle_every: Cycles between two polls of a project without tracked runs
+            min_interval: Seconds between cycles while runs are changing
+            max_interval: Longest interval, reached after quiet cycles
+            project_refresh: Cycles between two refreshes of the project list
+        """
+        states = list(states)
+        unknown = [state for state in states if state not in ACTIVE_STATES]
+        if unknown:
+            raise ValueError(f"Not an active state: {', '.join(unknown)}")
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Expected 0 < min_interval <= max_interval")
+        self.api = process_instance_api or ProcessInstanceAPI()
+        api = self.api
+        self.project_api = project_api or ProjectAPI(api.server_url, api.user_token, timeout=api.timeout,
+                                                     session=api.session, stats=api.stats)
+        self.fixed_projects = [str(code) for code in project_codes or []]
+        self.states = states
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.max_detail_calls = max_detail_calls
+        self.idle_every = max(1, idle_every)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.project_refresh = project_refresh
+        self.interval = min_interval
+        self.cycle = 0
+        self.runs: Dict[int, _Run] = {}
+        # Runs that left the listed states, waiting for a detail call
+        self.pending: Dict[int, _Run] = {}
+        self._projects: List[str] = []
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def _count(self, func, *args, **kwargs):
+        with self._lock:
+            self._calls += 1
+        return func(*args, **kwargs)
+
+    def _refresh_projects(self):
+        if self.fixed_projects:
+            self._projects = self.fixed_projects
+        elif not self._projects or self.cycle % self.project_refresh == 0:
+            self._projects = [str(p['code']) for p in self._count(self.project_api.list_user_projects) or []]
+
+    def _due_projects(self) -> List[str]:
+        busy = {run.project_code for run in self.runs.values()}
+        # Idle projects are spread over idle_every cycles by a stable hash
+        return [code for code in self._projects
+                if code in busy or self.cycle == 0
+                or zlib.crc32(code.encode()) % self.idle_every == self.cycle % self.idle_every]
+
+    def poll(self) -> Tuple[List[RunTransition], CycleStats]:
+        """
+        Run one cycle
+
+        The first cycle reports every listed run as a transition from None.
+
+        Returns:
+            (transitions, stats of the cycle)
+        """
+        self._calls = 0
+        now = datetime.datetime.now().strftime(DATETIME_FORMAT)
+        self._refresh_projects()
+        projects = self._due_projects()
+
+        def page(key, page_no):
+            project_code, state = key
+            return self._count(self.api.list_process_instances, project_code, page_no, self.page_size,
+                               state_type=state)
+
+        listed: Dict[int, Dict] = {}
+        keys = [(code, state) for code in projects for state in self.states]
+        for (project_code, _), instances in fetch_pages(page, keys, self.page_size, self.max_workers):
+            for instance in instances:
+                instance['projectCode'] = project_code
+                listed[int(instance['id'])] = instance
+
+        transitions = []
+        for instance_id, instance in listed.items():
+            run = self.runs.get(instance_id) or self.pending.pop(instance_id, None)
+            if run is not None and run.state == instance['state'] and run.update_time == instance.get('updateTime'):
+                self.runs[instance_id] = run
+                continue
+            self.runs[instance_id] = self._remember(instance)
+            if run is None or run.state != instance['state']:
+                transitions.append(self._transition(instance_id, instance, run, now))
+
+        # Tracked runs of the polled projects that left the listed states
+        polled = set(projects)
+        for instance_id in [i for i, run in self.runs.items() if run.project_code in polled and i not in listed]:
+            self.pending[instance_id] = self.runs.pop(instance_id)
+        transitions.extend(self._resolve_pending(now))
+
+        self.cycle += 1
+        if transitions or len(self.pending) > self.max_detail_calls:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        return transitions, CycleStats(len(projects), len(self.runs), len(transitions), self._calls,
+                                       len(self.pending), self.interval)
+
+    def _resolve_pending(self, now: str) -> List[RunTransition]:
+        batch = list(self.pending)[:self.max_detail_calls]
+
+        def detail(instance_id):
+            return self._count(self.api.get_process_instance, self.pending[instance_id].project_code, instance_id)
+
+        transitions = []
+        for outcome in run_bounded(detail, batch, self.max_workers):
+            run = self.pending.pop(outcome.item)
+            if not outcome.ok or not outcome.result:
+                # NOTE: the state is unknown, check again later without reporting a transition
+                self.pending[outcome.item] = run
+                continue
+            instance = outcome.result
+            instance['projectCode'] = run.project_code
+            if instance['state'] != run.state:
+                transitions.append(self._transition(outcome.item, instance, run, now))
+            if instance['state'] in self.states:
+                # Missed by one listing, e.g. pages shifted while paging: still tracked
+                self.runs[outcome.item] = self._remember(instance)
+            elif instance['state'] in ACTIVE_STATES:
+                # Still active in a state that is not listed, e.g. READY_STOP: check again later
+                self.pending[outcome.item] = self._remember(instance)
+        return transitions
+
+    @staticmethod
+    def _remember(instance: Dict) -> _Run:
+        return _Run(str(instance['projectCode']), instance.get('name') or '', instance['state'],
+                    instance.get('updateTime'))
+
+    @staticmethod
+    def _transition(instance_id: int, instance: Dict, run: Optional[_Run], now: str) -> RunTransition:
+        return RunTransition(str(instance['projectCode']), instance_id, instance.get('name') or '',
+                             run.state if run else None, instance['state'],
+                             instance.get('endTime') or instance.get('updateTime') or now,
+                             instance.get('duration'))
+
+    def watch(self,
+              on_transition: Callable[[RunTransition], None],
+              on_cycle: Optional[Callable[[CycleStats], None]] = None,
+              report_initial: bool = False,
+              cycles: Optional[int] = None,
+              stop: Optional[threading.Event] = None):
+        """
+        Poll until stopped, sleeping the adaptive interval between cycles
+
+        Args:
+            on_transition: Called with every transition
+            on_cycle: Called with the stats of every cycle
+            report_initial: Also report the runs found by the first cycle
+            cycles: Number of cycles, unlimited if None
+            stop: Event ending the watch
+        """
+        stop = stop or threading.Event()
+        while cycles is None or self.cycle < cycles:
+            initial = self.cycle == 0
+            started = time.monotonic()
+            transitions, stats = self.poll()
+            if report_initial or not initial:
+                for transition in transitions:
+                    on_transition(transition)
+            if on_cycle is not None:
+                on_cycle(stats)
+            if (cycles is not None and self.cycle >= cycles) or stop.wait(
+                    max(0.0, self.interval - (time.monotonic() - started))):
+                break
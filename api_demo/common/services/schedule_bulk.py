@@ -0,0 +1,330 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import fnmatch
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Union
+
+from common.api.project_api import ProjectAPI
+from common.api.schedule_api import ScheduleAPI
+from common.utils.concurrent_util import RateLimiter, TaskOutcome, run_bounded
+
+OPERATIONS = ('online', 'offline', 'update', 'delete')
+
+# Schedule fields that can be changed by a bulk update, keyed by the update
+# option name, with the schedule field they are read from.
+UPDATE_FIELDS = {
+    'start_time': 'startTime',
+    'end_time': 'endTime',
+    'crontab': 'crontab',
+    'timezone_id': 'timezoneId',
+    'tenant_code': 'tenantCode',
+    'warning_type': 'warningType',
+    'warning_group_id': 'warningGroupId',
+    'failure_strategy': 'failureStrategy',
+    'process_instance_priority': 'processInstancePriority',
+    'worker_group': 'workerGroup',
+    'environment_code': 'environmentCode',
+}
+
+# Update options required by ScheduleAPI.update_schedule
+REQUIRED_UPDATE_FIELDS = ('start_time', 'end_time', 'crontab', 'timezone_id', 'tenant_code')
+
+class ScheduleSelector:
+    def __init__(self,
+                 project_codes: Optional[Iterable[Union[str, int]]] = None,
+                 name_pattern: Optional[str] = None,
+                 worker_group: Optional[str] = None,
+                 release_state: Optional[str] = None):
+        """
+        Select schedules for a bulk operation
+
+        Args:
+            project_codes: Projects to scan, all projects of the user if empty
+            name_pattern: Glob matched against the process definition name
+            worker_group: Worker group of the schedule
+            release_state: ONLINE or OFFLINE
+        """
+        self.project_codes = [str(code) for code in project_codes or []]
+        self.name_pattern = name_pattern
+        self.worker_group = worker_group
+        self.release_state = release_state
+
+    def matches(self, schedule: Dict) -> bool:
+        if self.name_pattern and not fnmatch.fnmatchcase(schedule.get('processDefinitionName') or '', self.name_pattern):
+            return False
+        if self.worker_group and schedule.get('workerGroup') != self.worker_group:
+            return False
+        if self.release_state and schedule.get('releaseState') != self.release_state:
+            return False
+        return True
+
+class ScheduleTarget(NamedTuple):
+    project_code: str
+    schedule: Dict
+
+    @property
+    def id(self) -> int:
+        return self.schedule['id']
+
+    @property
+    def key(self) -> str:
+        return f"{self.project_code}/{self.id}"
+
+    @property
+    def name(self) -> str:
+        return self.schedule.get('processDefinitionName') or ''
+
+class ScheduleOutcome(NamedTuple):
+    target: ScheduleTarget
+    status: str
+    detail: str = ''
+
+    DONE = 'DONE'
+    SKIPPED = 'SKIPPED'
+    RESUMED = 'RESUMED'
+    PLANNED = 'PLANNED'
+    FAILED = 'FAILED'
+
+    @property
+    def ok(self) -> bool:
+        return self.status != self.FAILED
+
+class Checkpoint:
+    def __init__(self, path: str, operation: str):
+        """
+        Append-only progress file of a bulk operation
+
+        One JSON line is appended per finished schedule, so that a run can
+        be interrupted at any point and resumed with the same path. Lines of
+        other operations are ignored.
+
+        Args:
+            path: Checkpoint file path
+            operation: Operation identifier, including its parameters
+        """
+        self.path = path
+        self.operation = operation
+        self._lock = threading.Lock()
+
+    def finished_keys(self) -> Set[str]:
+        """Keys of the schedules already handled successfully"""
+        keys = set()
+        if not os.path.exists(self.path):
+            return keys
+        with open(self.path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # NOTE: last line may be truncated by an interrupted run
+                    continue
+                if entry.get('operation') == self.operation and entry.get('status') != ScheduleOutcome.FAILED:
+                    keys.add(entry.get('key'))
+        return keys
+
+    def record(self, outcome: ScheduleOutcome):
+        line = json.dumps({
+            'operation': self.operation,
+            'key': outcome.target.key,
+            'name': outcome.target.name,
+            'status': outcome.status,
+            'detail': outcome.detail,
+        }, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+                f.flush()
+
+class BulkScheduleManager:
+    def __init__(self,
+                 schedule_api: Optional[ScheduleAPI] = None,
+                 project_api: Optional[ProjectAPI] = None,
+                 max_workers: int = 8,
+                 rate: Optional[float] = None):
+        """
+        Apply one operation to many schedules
+
+        Args:
+            schedule_api: ScheduleAPI client
+            project_api: ProjectAPI client, used when the selector has no project
+            max_workers: Maximum number of schedules handled concurrently
+            rate: Maximum number of API calls per second, unlimited if None
+        """
+        self.schedule_api = schedule_api or ScheduleAPI()
+        api = self.schedule_api
+        self.project_api = project_api or ProjectAPI(api.server_url, api.user_token, timeout=api.timeout,
+                                                     session=api.session, stats=api.stats)
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate, burst=max(1, max_workers)) if rate else None
+
+    def _call(self, func: Callable, *args, **kwargs):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        return func(*args, **kwargs)
+
+    def select(self, selector: ScheduleSelector) -> List[ScheduleTarget]:
+        """
+        List the schedules matching a selector
+
+        Raises:
+            APIException: If a project cannot be listed
+        """
+        project_codes = selector.project_codes
+        if not project_codes:
+            project_codes = [str(p['code']) for p in self._call(self.project_api.list_user_projects) or []]
+
+        outcomes = run_bounded(lambda code: self._call(self.schedule_api.list_schedules, code),
+                               project_codes, self.max_workers)
+        targets = []
+        for outcome in outcomes:
+            if not outcome.ok:
+                raise outcome.error
+            for schedule in outcome.result or []:
+                if selector.matches(schedule):
+                    targets.append(ScheduleTarget(outcome.item, schedule))
+        return targets
+
+    @staticmethod
+    def operation_id(operation: str, changes: Optional[Dict] = None,
+                     changes_by_key: Optional[Dict[str, Dict]] = None) -> str:
+        """Identifier of an operation in checkpoint files"""
+        if operation == 'update' and changes_by_key:
+            content = json.dumps([changes or {}, changes_by_key], sort_keys=True)
+            digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+            return f"update:{digest}"
+        if operation == 'update':
+            return f"update:{json.dumps(changes or {}, sort_keys=True)}"
+        return operation
+
+    def run(self,
+            operation: str,
+            targets: List[ScheduleTarget],
+            changes: Optional[Dict] = None,
+            checkpoint_path: Optional[str] = None,
+            dry_run: bool = False,
+            on_outcome: Optional[Callable[[ScheduleOutcome], None]] = None,
+            changes_by_key: Optional[Dict[str, Dict]] = None,
+            operation_id: Optional[str] = None) -> List[ScheduleOutcome]:
+        """
+        Apply an operation to the targets
+
+        Schedules already in the requested state are skipped. Updates and
+        deletes of ONLINE schedules take them offline first; updated
+        schedules are put back online afterwards.
+
+        Args:
+            operation: One of OPERATIONS
+            targets: Schedules to operate on, see select()
+            changes: Update options (keys of UPDATE_FIELDS), for 'update'
+            checkpoint_path: Progress file; schedules recorded in it are not touched again
+            dry_run: Only report what would be done
+            on_outcome: Callback invoked as soon as each schedule is handled
+            changes_by_key: Update options per target key, merged over changes
+            operation_id: Identifier of the operation in the checkpoint, see
+                operation_id(); give a stable one when a resumed run plans its
+                changes again, so that finished schedules are keyed by id only
+
+        Returns:
+            One ScheduleOutcome per target, in the order of targets
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{operation}', expected one of {', '.join(OPERATIONS)}")
+        changes = dict(changes or {})
+        changes_by_key = changes_by_key or {}
+        for options in [changes] + list(changes_by_key.values()):
+            unknown = set(options) - set(UPDATE_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown update options: {', '.join(sorted(unknown))}")
+        if operation == 'update' and not changes and not changes_by_key:
+            raise ValueError("Update needs at least one change")
+
+        checkpoint = None
+        finished = set()
+        if checkpoint_path and not dry_run:
+            checkpoint = Checkpoint(checkpoint_path,
+                                    operation_id or self.operation_id(operation, changes, changes_by_key))
+            finished = checkpoint.finished_keys()
+
+        handler = getattr(self, f"_{operation}")
+
+        def handle(target: ScheduleTarget) -> ScheduleOutcome:
+            if target.key in finished:
+                return ScheduleOutcome(target, ScheduleOutcome.RESUMED, 'done in a previous run')
+            if target.key in changes_by_key:
+                return handler(target, {**changes, **changes_by_key[target.key]}, dry_run)
+            return handler(target, changes, dry_run)
+
+        def done(outcome: TaskOutcome):
+            if outcome.ok:
+                result = outcome.result
+            else:
+                result = ScheduleOutcome(outcome.item, ScheduleOutcome.FAILED, str(outcome.error))
+            if checkpoint is not None and result.status != ScheduleOutcome.RESUMED:
+                checkpoint.record(result)
+            if on_outcome is not None:
+                on_outcome(result)
+
+        outcomes = run_bounded(handle, targets, self.max_workers, on_done=done)
+        return [o.result if o.ok else ScheduleOutcome(o.item, ScheduleOutcome.FAILED, str(o.error))
+                for o in outcomes]
+
+    def _online(self, target: ScheduleTarget, changes: Dict, dry_run: bool) -> ScheduleOutcome:
+        if target.schedule.get('releaseState') == 'ONLINE':
+            return ScheduleOutcome(target, ScheduleOutcome.SKIPPED, 'already online')
+        if dry_run:
+            return ScheduleOutcome(target, ScheduleOutcome.PLANNED, 'online')
+        self._call(self.schedule_api.online_schedule, target.project_code, target.id)
+        return ScheduleOutcome(target, ScheduleOutcome.DONE, 'online')
+
+    def _offline(self, target: ScheduleTarget, changes: Dict, dry_run: bool) -> ScheduleOutcome:
+        if target.schedule.get('releaseState') != 'ONLINE':
+            return ScheduleOutcome(target, ScheduleOutcome.SKIPPED, 'already offline')
+        if dry_run:
+            return ScheduleOutcome(target, ScheduleOutcome.PLANNED, 'offline')
+        self._call(self.schedule_api.offline_schedule, target.project_code, target.id)
+        return ScheduleOutcome(target, ScheduleOutcome.DONE, 'offline')
+
+    def _delete(self, target: ScheduleTarget, changes: Dict, dry_run: bool) -> ScheduleOutcome:
+        online = target.schedule.get('releaseState') == 'ONLINE'
+        if dry_run:
+            return ScheduleOutcome(target, ScheduleOutcome.PLANNED, 'offline, delete' if online else 'delete')
+        if online:
+            self._call(self.schedule_api.offline_schedule, target.project_code, target.id)
+        self._call(self.schedule_api.delete_schedule, target.project_code, target.id)
+        return ScheduleOutcome(target, ScheduleOutcome.DONE, 'deleted')
+
+    def _update(self, target: ScheduleTarget, changes: Dict, dry_run: bool) -> ScheduleOutcome:
+        schedule = target.schedule
+        options = {option: schedule.get(field) for option, field in UPDATE_FIELDS.items()}
+        changed = {option: value for option, value in changes.items() if options[option] != value}
+        if not changed:
+            return ScheduleOutcome(target, ScheduleOutcome.SKIPPED, 'unchanged')
+        options.update(changed)
+        options = {option: value for option, value in options.items() if value is not None}
+        # NOTE: checked before the schedule goes offline, the update could not be sent
+        missing = [UPDATE_FIELDS[option] for option in REQUIRED_UPDATE_FIELDS if option not in options]
+        if missing:
+            return ScheduleOutcome(target, ScheduleOutcome.SKIPPED, f"missing {', '.join(missing)}")
+
+        detail = ', '.join(f"{UPDATE_FIELDS[o]}: {schedule.get(UPDATE_FIELDS[o])!r} -> {v!r}"
+                           for o, v in sorted(changed.items()))
+        if dry_run:
+            return ScheduleOutcome(target, ScheduleOutcome.PLANNED, detail)
+
+        online = schedule.get('releaseState') == 'ONLINE'
+        if online:
+            self._call(self.schedule_api.offline_schedule, target.project_code, target.id)
+        try:
+            self._call(self.schedule_api.update_schedule, target.project_code, target.id, **options)
+        finally:
+            # NOTE: put the schedule back online even if the update is rejected
+            if online:
+                self._call(self.schedule_api.online_schedule, target.project_code, target.id)
+        return ScheduleOutcome(target, ScheduleOutcome.DONE, detail)
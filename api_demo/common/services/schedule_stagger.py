@@ -0,0 +1,237 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import heapq
+import json
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+from common.analytics.schedule_load import schedule_fire_times
+from common.api.process_definition_api import ProcessDefinitionAPI
+from common.services.schedule_bulk import ScheduleTarget
+from common.utils.concurrent_util import run_bounded
+from common.utils.cron_util import shift_crontab, shift_range
+
+TASK_TYPE_DEPENDENT = 'DEPENDENT'
+
+class StaggerChange(NamedTuple):
+    target: ScheduleTarget
+    crontab: str
+    new_crontab: str
+    delay_seconds: int
+
+def workflow_dependencies(project_codes: Iterable[Union[str, int]],
+                          process_definition_api: Optional[ProcessDefinitionAPI] = None,
+                          max_workers: int = 8) -> Dict[int, Set[int]]:
+    """
+    Upstream workflows of every process definition, from its DEPENDENT tasks
+
+    Args:
+        project_codes: Projects to scan
+        process_definition_api: ProcessDefinitionAPI client
+        max_workers: Maximum number of concurrent API calls
+
+    Returns:
+        Process definition code -> codes of the definitions it depends on
+    """
+    api = process_definition_api or ProcessDefinitionAPI()
+    dependencies: Dict[int, Set[int]] = {}
+    for outcome in run_bounded(api.list_all_process_definitions, list(project_codes), max_workers):
+        if not outcome.ok:
+            raise outcome.error
+        for definition in outcome.result or []:
+            code = int((definition.get('processDefinition') or {}).get('code') or 0)
+            for task in definition.get('taskDefinitionList') or []:
+                if task.get('taskType') != TASK_TYPE_DEPENDENT:
+                    continue
+                params = task.get('taskParams') or {}
+                if isinstance(params, str):
+                    params = json.loads(params)
+                for depend_task in (params.get('dependence') or {}).get('dependTaskList') or []:
+                    for item in depend_task.get('dependItemList') or []:
+                        upstream = int(item.get('definitionCode') or 0)
+                        if upstream and upstream != code:
+                            dependencies.setdefault(code, set()).add(upstream)
+    return dependencies
+
+def find_collisions(targets: List[ScheduleTarget],
+                    start: Union[datetime.datetime, int],
+                    end: Union[datetime.datetime, int],
+                    min_size: int = 2) -> List[List[ScheduleTarget]]:
+    """
+    Group schedules by their next fire time in [start, end)
+
+    Returns:
+        Groups of at least min_size schedules, earliest fire time first
+    """
+    fires = schedule_fire_times([t.schedule for t in targets], start, end)
+    groups: Dict[int, List[ScheduleTarget]] = {}
+    for target, times in zip(targets, fires):
+        if len(times):
+            groups.setdefault(int(times[0]), []).append(target)
+    return [groups[fire] for fire in sorted(groups) if len(groups[fire]) >= min_size]
+
+def _dependency_order(group: List[ScheduleTarget], dependencies: Dict[int, Set[int]]) -> Tuple[List[int], Dict[int, List[int]]]:
+    """
+    Topological order of a group, upstream first, ties by definition name
+
+    Returns:
+        (order of group indices, group index -> indices of its downstreams)
+    """
+    index_by_code = {int(t.schedule.get('processDefinitionCode') or 0): i for i, t in enumerate(group)}
+    downstreams: Dict[int, List[int]] = {i: [] for i in range(len(group))}
+    in_degree = [0] * len(group)
+    for i, target in enumerate(group):
+        code = int(target.schedule.get('processDefinitionCode') or 0)
+        for upstream in dependencies.get(code, ()):
+            j = index_by_code.get(upstream)
+            if j is not None and j != i:
+                downstreams[j].append(i)
+                in_degree[i] += 1
+
+    def sort_key(i):
+        return group[i].name, group[i].id
+
+    heap = [(sort_key(i), i) for i in range(len(group)) if in_degree[i] == 0]
+    heapq.heapify(heap)
+    order = []
+    while heap:
+        _, i = heapq.heappop(heap)
+        order.append(i)
+        for j in downstreams[i]:
+            in_degree[j] -= 1
+            if in_degree[j] == 0:
+                heapq.heappush(heap, (sort_key(j), j))
+    # NOTE: schedules on a dependency cycle keep their name order
+    placed = set(order)
+    order.extend(sorted((i for i in range(len(group)) if i not in placed), key=sort_key))
+    return order, downstreams
+
+def plan_staggers(targets: List[ScheduleTarget],
+                  start: Union[datetime.datetime, int],
+                  end: Union[datetime.datetime, int],
+                  window_seconds: int = 600,
+                  dependencies: Optional[Dict[int, Set[int]]] = None,
+                  min_group: int = 2) -> List[StaggerChange]:
+    """
+    Spread schedules colliding on the same fire time across a window
+
+    Each group of colliding schedules is ordered upstream first, and the
+    n-th schedule of a group of size k is delayed by n * window / k seconds.
+    Delays are capped to stay within the hour of the crontab, and a
+    schedule is never delayed past one of its downstreams in the group, so
+    dependency order is preserved. Crontabs without single second and
+    minute values are not delayed.
+
+    Args:
+        targets: Schedules to consider
+        start: Horizon start
+        end: Horizon end
+        window_seconds: Spread window
+        dependencies: Process definition code -> upstream definition codes
+        min_group: Smallest group size considered a collision
+
+    Returns:
+        One change per delayed schedule
+    """
+    dependencies = dependencies or {}
+    changes = []
+    for group in find_collisions(targets, start, end, min_group):
+        order, downstreams = _dependency_order(group, dependencies)
+        spacing = window_seconds / len(group)
+
+        delays = [0] * len(group)
+        for position, i in enumerate(order):
+            delays[i] = min(int(round(position * spacing)), max(0, shift_range(group[i].schedule.get('crontab') or '')[1]))
+        # Pull upstreams back to their earliest downstream
+        for i in reversed(order):
+            for j in downstreams[i]:
+                delays[i] = min(delays[i], delays[j])
+
+        for i in order:
+            if delays[i] > 0:
+                crontab = group[i].schedule.get('crontab')
+                changes.append(StaggerChange(group[i], crontab, shift_crontab(crontab, delays[i]), delays[i]))
+    return changes
+
+def write_rollback(path: str, changes: List[StaggerChange]):
+    """
+    Save the original crontabs of the changes, before applying them
+
+    An existing file is merged: schedules already recorded keep the crontab
+    of their first stagger, so that the originals survive any number of
+    resumed runs.
+    """
+    created = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    records = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        created = data.get('created') or created
+        records = {f"{r['project_code']}/{r['id']}": r for r in data.get('schedules') or []}
+    for c in changes:
+        record = records.get(c.target.key)
+        if record is None:
+            records[c.target.key] = {
+                'project_code': c.target.project_code,
+                'id': c.target.id,
+                'name': c.target.name,
+                'crontab': c.crontab,
+                'new_crontab': c.new_crontab,
+            }
+        else:
+            record['new_crontab'] = c.new_crontab
+    data = {'created': created, 'schedules': list(records.values())}
+    with open(path, 'w') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+def load_rollback(path: str) -> List[Dict]:
+    with open(path, 'r') as f:
+        return json.load(f).get('schedules') or []
+
+def restore_originals(targets: List[ScheduleTarget], records: List[Dict]) -> List[ScheduleTarget]:
+    """
+    Targets with the original crontab of a rollback file, to plan a resumed stagger
+
+    Planning from the crontabs shifted by a previous run would group the
+    schedules differently; schedules whose crontab was modified after the
+    stagger keep their current crontab.
+    """
+    by_key = {f"{r['project_code']}/{r['id']}": r for r in records}
+    restored = []
+    for target in targets:
+        record = by_key.get(target.key)
+        if record is not None and target.schedule.get('crontab') in (record['crontab'], record['new_crontab']):
+            target = target._replace(schedule=dict(target.schedule, crontab=record['crontab']))
+        restored.append(target)
+    return restored
+
+def plan_rollback(targets: List[ScheduleTarget], records: List[Dict]) -> Tuple[Dict[str, Dict], List[Tuple[ScheduleTarget, str]]]:
+    """
+    Changes restoring the original crontabs of a rollback file
+
+    Schedules whose crontab was modified after the stagger are left alone.
+
+    Args:
+        targets: Current schedules
+        records: Entries of a rollback file
+
+    Returns:
+        (target key -> update options, [(target, reason not restored)])
+    """
+    by_key = {f"{r['project_code']}/{r['id']}": r for r in records}
+    changes_by_key = {}
+    conflicts = []
+    for target in targets:
+        record = by_key.get(target.key)
+        if record is None:
+            continue
+        crontab = target.schedule.get('crontab')
+        if crontab == record['crontab']:
+            continue
+        if crontab != record['new_crontab']:
+            conflicts.append((target, f"crontab changed since to '{crontab}'"))
+            continue
+        changes_by_key[target.key] = {'crontab': record['crontab']}
+    return changes_by_key, conflicts
@@ -0,0 +1,632 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import copy
+import datetime
+import itertools
+import json
+import random
+import threading
+from typing import Dict, List, Optional
+
+from common.enums.data_quality import Rule
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+MASKED_PASSWORD = "******"
+
+WORKER_GROUPS = ('default', 'etl', 'report')
+PRIORITIES = ('HIGHEST', 'HIGH', 'MEDIUM', 'LOW', 'LOWEST')
+DATASOURCE_TYPES = ('MYSQL', 'POSTGRESQL', 'HIVE', 'TRINO', 'CLICKHOUSE')
+DATASOURCE_PORTS = {'MYSQL': 3306, 'POSTGRESQL': 5432, 'HIVE': 10000, 'TRINO': 8080, 'CLICKHOUSE': 8123}
+
+# Input fields of the form-create json, common to all rules
+RULE_FIELDS = ('src_connector_type', 'src_datasource_id', 'src_database', 'src_table', 'src_filter', 'src_field',
+               'statistics_name', 'check_type', 'operator', 'threshold', 'failure_strategy', 'comparison_type')
+RULE_EXTRA_FIELDS = {5: ('logic_operator', 'field_length'), 7: ('regexp_pattern',), 9: ('enum_list',)}
+
+class StubError(Exception):
+    """Error returned in the response envelope, with a DolphinScheduler status code"""
+    def __init__(self, code: int, msg: str):
+        super().__init__(msg)
+        self.code = code
+        self.msg = msg
+
+def _format(value: datetime.datetime) -> str:
+    return value.strftime(DATETIME_FORMAT)
+
+def _duration(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}h {seconds % 3600 // 60}m {seconds % 60}s" if seconds >= 3600 else (
+        f"{seconds // 60}m {seconds % 60}s" if seconds >= 60 else f"{seconds}s")
+
+def paginate(items: List, page_no, page_size) -> Dict:
+    """Page data in the format of the paged list endpoints"""
+    page_no, page_size = max(1, int(page_no or 1)), max(1, int(page_size or 10))
+    total = len(items)
+    return {
+        'totalList': items[(page_no - 1) * page_size:page_no * page_size],
+        'total': total,
+        'totalPage': (total + page_size - 1) // page_size,
+        'pageSize': page_size,
+        'currentPage': page_no,
+        'pageNo': page_no,
+    }
+
+class StubData:
+    def __init__(self,
+                 seed: int = 0,
+                 projects: int = 2,
+                 definitions_per_project: int = 5,
+                 tasks_per_definition: int = 4,
+                 instances_per_definition: int = 20,
+                 running_instances: int = 1,
+                 datasources: int = 10,
+                 unhealthy_datasources: int = 1,
+                 data_quality_results: int = 50,
+                 now: Optional[datetime.datetime] = None):
+        """
+        In-memory state of a DolphinScheduler server, seeded with generated data
+
+        The same seed generates the same data, relative to now. All
+        methods are thread safe and return copies, like records read back
+        from the server.
+
+        Args:
+            seed: Seed of the generator
+            projects: Number of projects
+            definitions_per_project: Number of process definitions per project
+            tasks_per_definition: Number of tasks per process definition
+            instances_per_definition: Number of finished process instances per definition
+            running_instances: Number of running process instances per definition
+            datasources: Number of datasources
+            unhealthy_datasources: Number of datasources failing their connection test
+            data_quality_results: Number of data quality results
+            now: Reference time of the history, the current time by default
+        """
+        self.random = random.Random(seed)
+        self.now = (now or datetime.datetime.now()).replace(microsecond=0)
+        self.lock = threading.RLock()
+        self._codes = itertools.count(10 ** 12 + seed * 10 ** 7)
+        self._ids = itertools.count(1)
+        self.projects: Dict[int, Dict] = {}
+        self.definitions: Dict[int, Dict] = {}
+        self.schedules: Dict[int, Dict] = {}
+        self.process_instances: Dict[int, Dict] = {}
+        self.task_instances: Dict[int, List[Dict]] = {}
+        self.datasources: Dict[int, Dict] = {}
+        self.data_quality_results: List[Dict] = []
+
+        for p in range(projects):
+            project = self.create_project(f"project_{p}", f"Generated project {p}")
+            for d in range(definitions_per_project):
+                definition = self._generate_definition(project['code'], f"workflow_{p}_{d}", tasks_per_definition)
+                self._generate_instances(definition, instances_per_definition, running_instances)
+                if d % 2 == 0:
+                    self._generate_schedule(definition)
+        for i in range(datasources):
+            datasource_type = DATASOURCE_TYPES[i % len(DATASOURCE_TYPES)]
+            datasource = self.create_datasource({
+                'type': datasource_type, 'name': f"{datasource_type.lower()}_{i}", 'note': '',
+                'host': f"db{i}.example.com", 'port': DATASOURCE_PORTS[datasource_type],
+                'userName': 'reader', 'password': 'secret', 'database': f"db_{i}", 'other': {},
+            })
+            self.datasources[datasource['id']]['healthy'] = i >= unhealthy_datasources
+        self._generate_data_quality_results(data_quality_results)
+
+    def next_code(self) -> int:
+        return next(self._codes)
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+
+    def create_project(self, name: str, description: str = '') -> Dict:
+        with self.lock:
+            if any(p['name'] == name for p in self.projects.values()):
+                raise StubError(10009, f"project {name} already exists")
+            now = _format(self.now)
+            project = {'id': self.next_id(), 'code': self.next_code(), 'name': name, 'description': description or '',
+                       'userId': 1, 'userName': 'admin', 'createTime': now, 'updateTime': now, 'perm': 7,
+                       'defCount': 0, 'instRunningCount': 0}
+            self.projects[project['code']] = project
+            return copy.deepcopy(project)
+
+    def project(self, code) -> Dict:
+        project = self.projects.get(int(code))
+        if project is None:
+            raise StubError(10018, f"project {code} not found")
+        return project
+
+    def get_project(self, code) -> Dict:
+        with self.lock:
+            project = copy.deepcopy(self.project(code))
+            project['defCount'] = sum(d['processDefinition']['projectCode'] == project['code']
+                                      for d in self.definitions.values())
+            return project
+
+    def update_project(self, code, name: Optional[str] = None, description: Optional[str] = None) -> Dict:
+        with self.lock:
+            project = self.project(code)
+            if name is not None:
+                project['name'] = name
+            if description is not None:
+                project['description'] = description
+            project['updateTime'] = _format(datetime.datetime.now())
+            return copy.deepcopy(project)
+
+    def delete_project(self, code) -> bool:
+        with self.lock:
+            project = self.project(code)
+            if any(d['processDefinition']['projectCode'] == project['code'] for d in self.definitions.values()):
+                raise StubError(10117, "please delete the process definitions in project first!")
+            del self.projects[project['code']]
+            return True
+
+    def list_projects(self) -> List[Dict]:
+        with self.lock:
+            return [self.get_project(code) for code in self.projects]
+
+
+    def _generate_definition(self, project_code: int, name: str, task_count: int) -> Dict:
+        task_codes = [self.next_code() for _ in range(task_count)]
+        tasks, relations = [], []
+        for i, code in enumerate(task_codes):
+            tasks.append({
+                'code': code, 'name': f"task_{i}", 'version': 1, 'description': '', 'taskType': 'SHELL',
+                'taskParams': {'localParams': [], 'rawScript': f"echo task_{i}", 'resourceList': []},
+                'flag': 'YES', 'isCache': 'NO', 'taskPriority': self.random.choice(PRIORITIES[1:4]),
+                'workerGroup': self.random.choice(WORKER_GROUPS), 'environmentCode': -1,
+                'failRetryTimes': 0, 'failRetryInterval': 1, 'timeoutFlag': 'CLOSE', 'timeoutNotifyStrategy': None,
+                'timeout': 0, 'delayTime': 0, 'cpuQuota': self.random.choice((-1, 50, 100, 200)),
+                'memoryMax': self.random.choice((-1, 512, 1024)),
+            })
+            predecessors = self.random.sample(task_codes[:i], min(i, self.random.randint(1, 2))) if i else [0]
+            relations.extend({'name': '', 'preTaskCode': pre, 'preTaskVersion': 1 if pre else 0,
+                              'postTaskCode': code, 'postTaskVersion': 1, 'conditionType': 'NONE',
+                              'conditionParams': {}} for pre in predecessors)
+        params = {'name': name, 'description': '', 'globalParams': '[]', 'timeout': 0,
+                  'executionType': 'PARALLEL', 'locations': '[]'}
+        return self.create_process_definition(project_code, params, tasks, relations, release_state='ONLINE')
+
+    def create_process_definition(self, project_code, params: Dict, tasks: List[Dict], relations: List[Dict],
+                                  release_state: str = 'OFFLINE') -> Dict:
+        with self.lock:
+            project = self.project(project_code)
+            name = params.get('name')
+            if self.find_definition(project['code'], name) is not None:
+                raise StubError(10168, f"process definition name {name} already exists")
+            now = _format(datetime.datetime.now())
+            process_definition = {
+                'id': self.next_id(), 'code': self.next_code(), 'name': name, 'version': 1,
+                'releaseState': release_state, 'projectCode': project['code'], 'projectName': project['name'],
+                'description': params.get('description') or '', 'globalParams': params.get('globalParams') or '[]',
+                'locations': params.get('locations') or '[]', 'timeout': int(params.get('timeout') or 0),
+                'executionType': params.get('executionType') or 'PARALLEL', 'flag': 'YES', 'userId': 1,
+                'userName': 'admin', 'createTime': now, 'updateTime': now, 'scheduleReleaseState': None,
+            }
+            self.definitions[process_definition['code']] = {
+                'processDefinition': process_definition,
+                'taskDefinitionList': [self._task_definition(t, project['code']) for t in tasks],
+                'processTaskRelationList': [self._relation(r, process_definition) for r in relations],
+            }
+            return copy.deepcopy(process_definition)
+
+    @staticmethod
+    def _task_definition(task: Dict, project_code: int) -> Dict:
+        task = dict(task, projectCode=project_code, version=int(task.get('version') or 1))
+        if isinstance(task.get('taskParams'), str):
+            task['taskParams'] = json.loads(task['taskParams'])
+        return task
+
+    @staticmethod
+    def _relation(relation: Dict, process_definition: Dict) -> Dict:
+        return dict(relation, processDefinitionCode=process_definition['code'],
+                    processDefinitionVersion=process_definition['version'],
+                    projectCode=process_definition['projectCode'])
+
+    def definition(self, project_code, code) -> Dict:
+        definition = self.definitions.get(int(code))
+        if definition is None or definition['processDefinition']['projectCode'] != int(project_code):
+            raise StubError(50003, f"process definition {code} does not exist")
+        return definition
+
+    def find_definition(self, project_code, name: str) -> Optional[Dict]:
+        return next((d for d in self.definitions.values()
+                     if d['processDefinition']['projectCode'] == int(project_code)
+                     and d['processDefinition']['name'] == name), None)
+
+    def get_process_definition(self, project_code, code) -> Dict:
+        with self.lock:
+            return copy.deepcopy(self.definition(project_code, code))
+
+    def get_process_definition_by_name(self, project_code, name: str) -> Dict:
+        with self.lock:
+            self.project(project_code)
+            definition = self.find_definition(project_code, name)
+            if definition is None:
+                raise StubError(50003, f"process definition {name} does not exist")
+            return copy.deepcopy(definition)
+
+    def update_process_definition(self, project_code, code, params: Dict, tasks: List[Dict],
+                                  relations: List[Dict]) -> Dict:
+        with self.lock:
+            definition = self.definition(project_code, code)
+            process_definition = definition['processDefinition']
+            if process_definition['releaseState'] == 'ONLINE':
+                raise StubError(50008, f"process definition {code} is online, can not edit")
+            name = params.get('name') or process_definition['name']
+            other = self.find_definition(project_code, name)
+            if other is not None and other is not definition:
+                raise StubError(10168, f"process definition name {name} already exists")
+            current_tasks = {t['code']: t for t in definition['taskDefinitionList']}
+            process_definition.update({
+                'name': name, 'version': process_definition['version'] + 1,
+                'description': params.get('description') or '', 'globalParams': params.get('globalParams') or '[]',
+                'locations': params.get('locations') or '[]', 'timeout': int(params.get('timeout') or 0),
+                'executionType': params.get('executionType') or 'PARALLEL',
+                'updateTime': _format(datetime.datetime.now()),
+            })
+            new_tasks = []
+            for task in tasks:
+                task = self._task_definition(task, process_definition['projectCode'])
+                current = current_tasks.get(task['code'])
+                if current is not None:
+                    changed = any(current.get(k) != v for k, v in task.items() if k != 'version')
+                    task['version'] = current['version'] + 1 if changed else current['version']
+                new_tasks.append(task)
+            definition['taskDefinitionList'] = new_tasks
+            definition['processTaskRelationList'] = [self._relation(r, process_definition) for r in relations]
+            return copy.deepcopy(process_definition)
+
+    def release_process_definition(self, project_code, code, release_state: str) -> bool:
+        with self.lock:
+            process_definition = self.definition(project_code, code)['processDefinition']
+            if release_state not in ('ONLINE', 'OFFLINE'):
+                raise StubError(10001, "request parameter releaseState is not valid")
+            process_definition['releaseState'] = release_state
+            if release_state == 'OFFLINE':
+                # Taking a definition offline takes its schedule offline too
+                for schedule in self.schedules.values():
+                    if schedule['processDefinitionCode'] == process_definition['code']:
+                        schedule['releaseState'] = 'OFFLINE'
+            return True
+
+    def delete_process_definition(self, project_code, code) -> bool:
+        with self.lock:
+            process_definition = self.definition(project_code, code)['processDefinition']
+            if process_definition['releaseState'] == 'ONLINE':
+                raise StubError(50021, f"process definition {code} is online, can not delete")
+            if any(s['processDefinitionCode'] == process_definition['code'] and s['releaseState'] == 'ONLINE'
+                   for s in self.schedules.values()):
+                raise StubError(50023, "the schedule of the process definition is online")
+            del self.definitions[process_definition['code']]
+            for schedule_id in [i for i, s in self.schedules.items()
+                                if s['processDefinitionCode'] == process_definition['code']]:
+                del self.schedules[schedule_id]
+            return True
+
+    def list_definitions(self, project_code) -> List[Dict]:
+        with self.lock:
+            self.project(project_code)
+            definitions = [copy.deepcopy(d) for d in self.definitions.values()
+                           if d['processDefinition']['projectCode'] == int(project_code)]
+            for definition in definitions:
+                code = definition['processDefinition']['code']
+                definition['schedule'] = next((copy.deepcopy(s) for s in self.schedules.values()
+                                               if s['processDefinitionCode'] == code), None)
+            return definitions
+
+
+    def _generate_schedule(self, definition: Dict):
+        hour, minute = self.random.randint(0, 23), self.random.choice((0, 0, 0, 15, 30, 45))
+        schedule = self.create_schedule(definition['projectCode'], definition['code'], {
+            'startTime': _format(self.now - datetime.timedelta(days=365)),
+            'endTime': _format(self.now + datetime.timedelta(days=3650)),
+            'crontab': f"0 {minute} {hour} * * ? *", 'timezoneId': 'Asia/Shanghai',
+        }, {'workerGroup': self.random.choice(WORKER_GROUPS), 'tenantCode': 'default'})
+        self.schedules[schedule['id']]['releaseState'] = 'ONLINE'
+
+    def create_schedule(self, project_code, process_definition_code, schedule: Dict, params: Dict) -> Dict:
+        with self.lock:
+            definition = self.definition(project_code, process_definition_code)['processDefinition']
+            if any(s['processDefinitionCode'] == definition['code'] for s in self.schedules.values()):
+                raise StubError(10204, f"schedule of process definition {definition['code']} already exists")
+            now = _format(datetime.datetime.now())
+            record = {
+                'id': self.next_id(), 'processDefinitionCode': definition['code'],
+                'processDefinitionName': definition['name'], 'projectCode': definition['projectCode'],
+                'projectName': self.project(project_code)['name'],
+                'definitionDescription': definition['description'], 'releaseState': 'OFFLINE',
+                'warningType': 'NONE', 'warningGroupId': 0, 'failureStrategy': 'CONTINUE',
+                'processInstancePriority': 'MEDIUM', 'workerGroup': 'default', 'environmentCode': -1,
+                'tenantCode': 'default', 'userId': 1, 'userName': 'admin', 'createTime': now, 'updateTime': now,
+            }
+            record.update(self._schedule_fields(schedule, params))
+            self.schedules[record['id']] = record
+            return copy.deepcopy(record)
+
+    @staticmethod
+    def _schedule_fields(schedule: Dict, params: Dict) -> Dict:
+        fields = {k: schedule[k] for k in ('startTime', 'endTime', 'crontab', 'timezoneId') if k in schedule}
+        for key in ('warningType', 'failureStrategy', 'processInstancePriority', 'workerGroup', 'tenantCode'):
+            if params.get(key) is not None:
+                fields[key] = params[key]
+        for key in ('warningGroupId', 'environmentCode'):
+            if params.get(key) is not None:
+                fields[key] = int(params[key])
+        return fields
+
+    def schedule(self, schedule_id) -> Dict:
+        schedule = self.schedules.get(int(schedule_id))
+        if schedule is None:
+            raise StubError(10049, f"schedule {schedule_id} does not exist")
+        return schedule
+
+    def get_schedule(self, schedule_id) -> Dict:
+        with self.lock:
+            return copy.deepcopy(self.schedule(schedule_id))
+
+    def update_schedule(self, project_code, schedule_id, schedule: Dict, params: Dict) -> Dict:
+        with self.lock:
+            self.project(project_code)
+            record = self.schedule(schedule_id)
+            if record['releaseState'] == 'ONLINE':
+                raise StubError(10023, "online status does not allow update operations")
+            record.update(self._schedule_fields(schedule, params), updateTime=_format(datetime.datetime.now()))
+            return copy.deepcopy(record)
+
+    def release_schedule(self, project_code, schedule_id, release_state: str) -> bool:
+        with self.lock:
+            self.project(project_code)
+            record = self.schedule(schedule_id)
+            if release_state == 'ONLINE':
+                definition = self.definitions.get(record['processDefinitionCode'])
+                if definition is None or definition['processDefinition']['releaseState'] != 'ONLINE':
+                    raise StubError(50004, f"process definition {record['processDefinitionCode']} not online")
+            record['releaseState'] = release_state
+            return True
+
+    def delete_schedule(self, project_code, schedule_id) -> bool:
+        with self.lock:
+            self.project(project_code)
+            if self.schedule(schedule_id)['releaseState'] == 'ONLINE':
+                raise StubError(10024, "the schedule is online, can not delete")
+            del self.schedules[int(schedule_id)]
+            return True
+
+    def list_schedules(self, project_code) -> List[Dict]:
+        with self.lock:
+            project = self.project(project_code)
+            return [copy.deepcopy(s) for s in self.schedules.values() if s['projectCode'] == project['code']]
+
+
+    def _generate_instances(self, process_definition: Dict, finished: int, running: int):
+        definition = self.definitions[process_definition['code']]
+        tasks = definition['taskDefinitionList']
+        predecessors = {t['code']: [] for t in tasks}
+        for relation in definition['processTaskRelationList']:
+            if relation['preTaskCode']:
+                predecessors[relation['postTaskCode']].append(relation['preTaskCode'])
+        base = {t['code']: self.random.uniform(10, 600) for t in tasks}
+        total = finished + running
+        for n in range(total):
+            start = self.now - datetime.timedelta(hours=(total - n) * 6, seconds=self.random.randint(0, 600))
+            is_running = n >= finished
+            instance_id = self.next_id()
+            task_instances, ends = [], {}
+            for task in tasks:
+                ready = max((ends[p] for p in predecessors[task['code']]), default=start)
+                submit = ready + datetime.timedelta(seconds=1)
+                task_start = submit + datetime.timedelta(seconds=self.random.expovariate(1 / 5))
+                task_end = task_start + datetime.timedelta(seconds=base[task['code']] * self.random.lognormvariate(0, 0.2))
+                failed = not is_running and self.random.random() < 0.03
+                unfinished = is_running and task_end > self.now
+                if unfinished and task_start > self.now:
+                    continue
+                state = 'RUNNING_EXECUTION' if unfinished else ('FAILURE' if failed else 'SUCCESS')
+                ends[task['code']] = task_end
+                task_instances.append({
+                    'id': self.next_id(), 'name': task['name'], 'taskType': task['taskType'],
+                    'taskCode': task['code'], 'taskDefinitionVersion': task['version'],
+                    'processInstanceId': instance_id, 'processInstanceName': None, 'state': state,
+                    'firstSubmitTime': _format(submit), 'submitTime': _format(submit),
+                    'startTime': _format(task_start), 'endTime': None if unfinished else _format(task_end),
+                    'duration': None if unfinished else _duration((task_end - task_start).total_seconds()),
+                    'host': f"worker{self.random.randint(1, 3)}:1234", 'workerGroup': task['workerGroup'],
+                    'taskInstancePriority': task['taskPriority'], 'cpuQuota': task['cpuQuota'],
+                    'memoryMax': task['memoryMax'], 'retryTimes': 0, 'executorName': 'admin',
+                })
+            failed = any(t['state'] == 'FAILURE' for t in task_instances)
+            end = max(ends.values(), default=start)
+            name = f"{process_definition['name']}-{process_definition['version']}-{int(start.timestamp() * 1000)}"
+            for t in task_instances:
+                t['processInstanceName'] = name
+            self.process_instances[instance_id] = {
+                'id': instance_id, 'name': name, 'processDefinitionCode': process_definition['code'],
+                'processDefinitionVersion': process_definition['version'],
+                'projectCode': process_definition['projectCode'],
+                'state': 'RUNNING_EXECUTION' if is_running else ('FAILURE' if failed else 'SUCCESS'),
+                'commandType': 'SCHEDULER', 'scheduleTime': _format(start), 'commandStartTime': _format(start),
+                'startTime': _format(start), 'endTime': None if is_running else _format(end),
+                'updateTime': _format(self.now if is_running else end),
+                'duration': _duration(((self.now if is_running else end) - start).total_seconds()),
+                'runTimes': 1, 'host': 'master1:5678', 'workerGroup': 'default', 'tenantCode': 'default',
+                'timeout': process_definition['timeout'], 'recovery': 'NO', 'dryRun': 0, 'executorName': 'admin',
+            }
+            self.task_instances[instance_id] = task_instances
+
+    def process_instance(self, project_code, instance_id) -> Dict:
+        instance = self.process_instances.get(int(instance_id))
+        if instance is None or instance['projectCode'] != int(project_code):
+            raise StubError(10163, f"process instance {instance_id} does not exist")
+        return instance
+
+    def list_process_instances(self, project_code, process_definition_code=None, state_type=None,
+                               start_date=None, end_date=None, search_val=None) -> List[Dict]:
+        with self.lock:
+            self.project(project_code)
+            instances = [i for i in self.process_instances.values()
+                         if i['projectCode'] == int(project_code)
+                         and (not process_definition_code or i['processDefinitionCode'] == int(process_definition_code))
+                         and (not state_type or i['state'] == state_type)
+                         and (not start_date or i['startTime'] >= start_date)
+                         and (not end_date or i['startTime'] <= end_date)
+                         and (not search_val or search_val in i['name'])]
+            instances.sort(key=lambda i: (i['startTime'], i['id']), reverse=True)
+            return copy.deepcopy(instances)
+
+    def get_process_instance(self, project_code, instance_id) -> Dict:
+        with self.lock:
+            instance = copy.deepcopy(self.process_instance(project_code, instance_id))
+            definition = self.definitions.get(instance['processDefinitionCode'])
+            instance['dagData'] = copy.deepcopy(definition)
+            return instance
+
+    def list_task_instances(self, project_code, instance_id) -> Dict:
+        with self.lock:
+            instance = self.process_instance(project_code, instance_id)
+            return {'taskList': copy.deepcopy(self.task_instances.get(instance['id'], [])),
+                    'processInstanceState': instance['state']}
+
+    def task_log(self, task_instance_id, skip_line_num, limit) -> Dict:
+        """Log lines of a task instance, generated from its id"""
+        task_instance_id, skip_line_num, limit = int(task_instance_id), int(skip_line_num or 0), int(limit or 1000)
+        line_count = 20 + task_instance_id % 200
+        lines = [f"[INFO] {_format(self.now)} - [taskInstanceId {task_instance_id}] log line {n}\n"
+                 for n in range(skip_line_num, min(line_count, skip_line_num + limit))]
+        return {'lineNum': skip_line_num + len(lines), 'message': ''.join(lines)}
+
+
+    def create_datasource(self, params: Dict) -> Dict:
+        with self.lock:
+            name = params.get('name')
+            if not name or not params.get('type'):
+                raise StubError(10001, "request parameter name or type is not valid")
+            if any(d['name'] == name for d in self.datasources.values()):
+                raise StubError(10015, f"data source name {name} already exists")
+            now = _format(datetime.datetime.now())
+            datasource = {
+                'id': self.next_id(), 'name': name, 'note': params.get('note') or '',
+                'type': str(params['type']).upper(), 'host': params.get('host'), 'port': int(params.get('port') or 0),
+                'database': params.get('database') or '', 'userName': params.get('userName'),
+                'password': params.get('password') or '', 'other': params.get('other') or {},
+                'createTime': now, 'updateTime': now, 'healthy': True,
+            }
+            self.datasources[datasource['id']] = datasource
+            return self._datasource_record(datasource)
+
+    @staticmethod
+    def _datasource_record(datasource: Dict) -> Dict:
+        connection_params = {'user': datasource['userName'], 'password': MASKED_PASSWORD,
+                             'address': f"jdbc:{datasource['type'].lower()}://{datasource['host']}:{datasource['port']}",
+                             'database': datasource['database'], 'other': datasource['other']}
+        return {'id': datasource['id'], 'name': datasource['name'], 'note': datasource['note'],
+                'type': datasource['type'], 'userId': 1, 'userName': 'admin',
+                'connectionParams': json.dumps(connection_params),
+                'createTime': datasource['createTime'], 'updateTime': datasource['updateTime']}
+
+    def datasource(self, datasource_id) -> Dict:
+        datasource = self.datasources.get(int(datasource_id))
+        if datasource is None:
+            raise StubError(10040, f"data source {datasource_id} does not exist")
+        return datasource
+
+    def get_datasource(self, datasource_id) -> Dict:
+        with self.lock:
+            d = self.datasource(datasource_id)
+            return {'id': d['id'], 'name': d['name'], 'note': d['note'], 'type': d['type'], 'host': d['host'],
+                    'port': d['port'], 'database': d['database'], 'userName': d['userName'],
+                    'password': MASKED_PASSWORD, 'other': copy.deepcopy(d['other'])}
+
+    def update_datasource(self, datasource_id, params: Dict) -> Dict:
+        with self.lock:
+            datasource = self.datasource(datasource_id)
+            name = params.get('name') or datasource['name']
+            if any(d['name'] == name and d is not datasource for d in self.datasources.values()):
+                raise StubError(10015, f"data source name {name} already exists")
+            for key in ('name', 'note', 'host', 'database', 'userName', 'other'):
+                if key in params:
+                    datasource[key] = params[key]
+            if params.get('port') is not None:
+                datasource['port'] = int(params['port'])
+            if params.get('password') and params['password'] != MASKED_PASSWORD:
+                datasource['password'] = params['password']
+            datasource['updateTime'] = _format(datetime.datetime.now())
+            return self._datasource_record(datasource)
+
+    def delete_datasource(self, datasource_id) -> bool:
+        with self.lock:
+            del self.datasources[self.datasource(datasource_id)['id']]
+            return True
+
+    def list_datasources(self, datasource_type: Optional[str] = None, search_val: Optional[str] = None) -> List[Dict]:
+        with self.lock:
+            return [self._datasource_record(d) for d in self.datasources.values()
+                    if (not datasource_type or d['type'] == str(datasource_type).upper())
+                    and (not search_val or search_val in d['name'])]
+
+    def connect_test(self, datasource_id) -> bool:
+        with self.lock:
+            datasource = self.datasource(datasource_id)
+            if not datasource['healthy']:
+                raise StubError(10032, f"connect database error: {datasource['host']}:{datasource['port']} refused")
+            return True
+
+    def verify_datasource_name(self, name: str) -> bool:
+        with self.lock:
+            if any(d['name'] == name for d in self.datasources.values()):
+                raise StubError(10015, f"data source name {name} already exists")
+            return True
+
+    def list_databases(self, datasource_id) -> List[str]:
+        with self.lock:
+            return [self.datasource(datasource_id)['database'], 'default']
+
+    def list_tables(self, datasource_id, database: str) -> List[Dict]:
+        with self.lock:
+            self.datasource(datasource_id)
+            return [{'label': f"table_{n}", 'value': f"table_{n}"} for n in range(5)]
+
+    def list_columns(self, datasource_id, database: str, table: str) -> List[Dict]:
+        with self.lock:
+            self.datasource(datasource_id)
+            return [{'label': column, 'value': column} for column in ('id', 'name', 'amount', 'created_at')]
+
+
+    def list_rules(self) -> List[Dict]:
+        now = _format(self.now)
+        return [{'id': rule.id, 'name': rule.display_name, 'type': rule.rule_type, 'userId': 1,
+                 'userName': 'admin', 'createTime': now, 'updateTime': now} for rule in Rule]
+
+    def rule_form_create_json(self, rule_id) -> str:
+        rule = Rule.from_id(int(rule_id))
+        if rule is None:
+            raise StubError(10001, f"request parameter ruleId {rule_id} is not valid")
+        fields = RULE_FIELDS + RULE_EXTRA_FIELDS.get(rule.id, ())
+        return json.dumps([{'field': field, 'name': field, 'type': 'input', 'value': None,
+                            'props': {'disabled': False}} for field in fields])
+
+    def _generate_data_quality_results(self, count: int):
+        instances = list(self.process_instances.values())
+        rules = list(Rule)
+        for n in range(min(count, len(instances))):
+            instance = instances[self.random.randrange(len(instances))]
+            rule = rules[n % len(rules)]
+            actual = self.random.randint(0, 20)
+            self.data_quality_results.append({
+                'id': n + 1, 'processDefinitionId': 0, 'processInstanceId': instance['id'],
+                'taskInstanceId': 0, 'ruleType': rule.rule_type, 'ruleName': rule.display_name,
+                'userId': 1, 'userName': 'admin', 'statisticsValue': actual, 'comparisonValue': 0,
+                'comparisonType': 1, 'comparisonTypeName': 'FixValue', 'checkType': 0, 'threshold': 0,
+                'operator': 0, 'failureStrategy': 0, 'state': 1 if actual == 0 else 2,
+                'errorOutputPath': None, 'createTime': instance['startTime'], 'updateTime': instance['startTime'],
+            })
+
+    def query_data_quality_results(self, start_date=None, end_date=None, search_val=None) -> List[Dict]:
+        with self.lock:
+            results = [r for r in self.data_quality_results
+                       if (not start_date or r['createTime'] >= start_date)
+                       and (not end_date or r['createTime'] <= end_date)
+                       and (not search_val or search_val in r['ruleName'])]
+            results.sort(key=lambda r: r['createTime'], reverse=True)
+            return copy.deepcopy(results)
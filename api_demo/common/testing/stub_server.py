@@ -0,0 +1,332 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import gzip
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from common.testing.stub_data import StubData, StubError, paginate
+
+DEFAULT_TOKEN = "stub-token"
+CONTEXT_PATH = "/dolphinscheduler"
+
+INTERNAL_SERVER_ERROR = 10000
+USER_NOT_LOGIN = 10004
+
+# Routes bound with @RequestBody by the server; the other routes bind
+# @RequestParam, which reads the query string and form bodies but not JSON
+JSON_BODY_ROUTES = [(method, re.compile(pattern)) for method, pattern in (
+    ('POST', r"v2/projects"), ('PUT', r"v2/projects/\d+"),
+    ('POST', r"datasources"), ('PUT', r"datasources/\d+"), ('POST', r"datasources/connect"),
+)]
+
+def envelope(data=None, code: int = 0, msg: str = "success") -> Dict:
+    """Response body of the DolphinScheduler API"""
+    return {'code': code, 'msg': msg, 'data': data, 'success': code == 0, 'failed': code != 0}
+
+def _json_param(params: Dict, key: str, default):
+    value = params.get(key)
+    if value is None or value == '':
+        return default
+    return json.loads(value) if isinstance(value, str) else value
+
+class StubAPIServer:
+    def __init__(self,
+                 data: Optional[StubData] = None,
+                 token: str = DEFAULT_TOKEN,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 route_latency: Optional[Dict[str, float]] = None,
+                 error_rate: float = 0.0,
+                 http_error_rate: float = 0.0,
+                 compress_min_bytes: Optional[int] = 1024,
+                 seed: int = 0,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 context_path: str = CONTEXT_PATH):
+        """
+        In-process stand-in of the DolphinScheduler API
+
+        Serves the endpoints used by this project from a StubData, with the
+        envelopes, pagination and error codes of the real server, on a
+        background thread. Latency and errors can be injected, and changed
+        while the server runs, to measure the clients reproducibly.
+
+        Args:
+            data: Server state, generated with the default sizes if None
+            token: Token expected in the 'token' header
+            latency: Seconds added to every request
+            jitter: Upper bound of a uniform random delay added to the latency
+            route_latency: Route name -> seconds, replaces the latency of that route
+            error_rate: Share of requests answered with an INTERNAL_SERVER_ERROR envelope
+            http_error_rate: Share of requests answered with an HTTP 500
+            compress_min_bytes: Smallest response body gzip or deflate encoded
+                when the client accepts it, never compress if None
+            seed: Seed of the jitter and error injection
+            host: Bound address
+            port: Bound port, any free port if 0
+            context_path: Path prefix of the API
+        """
+        self.data = data or StubData(seed=seed)
+        self.token = token
+        self.latency = latency
+        self.jitter = jitter
+        self.route_latency = dict(route_latency or {})
+        self.error_rate = error_rate
+        self.http_error_rate = http_error_rate
+        self.compress_min_bytes = compress_min_bytes
+        self.context_path = context_path.rstrip('/')
+        self.random = random.Random(seed)
+        self.requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._routes = self._build_routes()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Value of DOLPHINSCHEDULER_SERVER_URL for this server"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{self.context_path}"
+
+    def start(self) -> "StubAPIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-api-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def request_count(self, route: Optional[str] = None) -> int:
+        """Requests served, for one route or in total"""
+        with self._lock:
+            return self.requests.get(route, 0) if route else sum(self.requests.values())
+
+    def reset_counts(self):
+        with self._lock:
+            self.requests.clear()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, like the real server
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._dispatch(self, 'GET')
+
+            def do_POST(self):
+                server._dispatch(self, 'POST')
+
+            def do_PUT(self):
+                server._dispatch(self, 'PUT')
+
+            def do_DELETE(self):
+                server._dispatch(self, 'DELETE')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _send(self, handler: BaseHTTPRequestHandler, status: int, body: bytes,
+              content_type: str = "application/json;charset=UTF-8"):
+        accepted = handler.headers.get('Accept-Encoding') or ''
+        encoding = None
+        if self.compress_min_bytes is not None and len(body) >= self.compress_min_bytes:
+            encoding = 'gzip' if 'gzip' in accepted else 'deflate' if 'deflate' in accepted else None
+        if encoding == 'gzip':
+            body = gzip.compress(body, 6)
+        elif encoding == 'deflate':
+            body = zlib.compress(body, 6)
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        if encoding:
+            handler.send_header("Content-Encoding", encoding)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _read_params(self, handler: BaseHTTPRequestHandler, query: str) -> Tuple[Dict, Dict]:
+        """(query string and form parameters, JSON body)"""
+        params = {k: v[-1] for k, v in parse_qs(query, keep_blank_values=True).items()}
+        json_body = {}
+        length = int(handler.headers.get('Content-Length') or 0)
+        if length:
+            body = handler.rfile.read(length)
+            encoding = handler.headers.get('Content-Encoding')
+            if encoding == 'gzip':
+                body = gzip.decompress(body)
+            elif encoding == 'deflate':
+                body = zlib.decompress(body)
+            body = body.decode('utf-8')
+            if 'json' in (handler.headers.get('Content-Type') or ''):
+                json_body = json.loads(body) if body.strip() else {}
+            else:
+                params.update({k: v[-1] for k, v in parse_qs(body, keep_blank_values=True).items()})
+        return params, json_body
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str):
+        parts = urlsplit(handler.path)
+        params, json_body = self._read_params(handler, parts.query)
+        path = parts.path
+        if not path.startswith(self.context_path + '/'):
+            self._send(handler, 404, b'{"status":404,"error":"Not Found"}')
+            return
+        path = path[len(self.context_path) + 1:].rstrip('/')
+
+        for route_method, pattern, name, func in self._routes:
+            match = pattern.fullmatch(path) if route_method == method else None
+            if match:
+                break
+        else:
+            self._send(handler, 404, b'{"status":404,"error":"Not Found"}')
+            return
+        if json_body and any(m == method and p.fullmatch(path) for m, p in JSON_BODY_ROUTES):
+            params.update(json_body)
+
+        with self._lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+            roll, http_roll, delay = self.random.random(), self.random.random(), self.random.uniform(0, self.jitter)
+        delay += self.route_latency.get(name, self.latency)
+        if delay > 0:
+            time.sleep(delay)
+
+        if handler.headers.get('token') != self.token:
+            self._send(handler, 401, json.dumps(envelope(code=USER_NOT_LOGIN, msg="user not login")).encode())
+            return
+        if http_roll < self.http_error_rate:
+            self._send(handler, 500, b"Internal Server Error", "text/plain")
+            return
+        if roll < self.error_rate:
+            body = envelope(code=INTERNAL_SERVER_ERROR, msg="Internal Server Error: injected")
+        else:
+            try:
+                body = envelope(func(params, *match.groups()))
+            except StubError as e:
+                body = envelope(code=e.code, msg=e.msg)
+            except (KeyError, ValueError, TypeError) as e:
+                body = envelope(code=10001, msg=f"request parameter is not valid: {e}")
+        self._send(handler, 200, json.dumps(body, ensure_ascii=False).encode('utf-8'))
+
+    def _build_routes(self) -> List[Tuple[str, "re.Pattern", str, Callable]]:
+        d = self.data
+        pd = r"projects/(\d+)/process-definition"
+        routes = [
+            # projects, v1 with query parameters and v2 with JSON bodies
+            ('POST', r"(?:v2/)?projects", 'project_create',
+             lambda p: d.create_project(p['projectName'], p.get('description', ''))),
+            ('GET', r"(?:v2/)?projects/list", 'project_list', lambda p: d.list_projects()),
+            ('GET', r"(?:v2/)?projects/created-and-authed", 'project_list_user', lambda p: d.list_projects()),
+            ('GET', r"(?:v2/)?projects", 'project_page',
+             lambda p: paginate([x for x in d.list_projects() if p.get('searchVal', '') in x['name']],
+                                p.get('pageNo'), p.get('pageSize'))),
+            ('GET', r"(?:v2/)?projects/(\d+)", 'project_get', lambda p, code: d.get_project(code)),
+            ('PUT', r"(?:v2/)?projects/(\d+)", 'project_update',
+             lambda p, code: d.update_project(code, p.get('projectName'), p.get('description'))),
+            ('DELETE', r"(?:v2/)?projects/(\d+)", 'project_delete', lambda p, code: d.delete_project(code)),
+
+            # process definitions
+            ('GET', r"projects/(\d+)/task-definition/gen-task-codes", 'gen_task_codes',
+             lambda p, project: [d.next_code() for _ in range(int(p.get('genNum') or 1))]),
+            ('POST', pd, 'definition_create', lambda p, project: d.create_process_definition(
+                project, p, _json_param(p, 'taskDefinitionJson', []), _json_param(p, 'taskRelationJson', []))),
+            ('GET', pd, 'definition_page', lambda p, project: paginate(
+                [x['processDefinition'] for x in d.list_definitions(project)
+                 if p.get('searchVal', '') in x['processDefinition']['name']], p.get('pageNo'), p.get('pageSize'))),
+            ('GET', pd + r"/all", 'definition_all', lambda p, project: d.list_definitions(project)),
+            ('GET', pd + r"/(?:list|query-process-definition-list)", 'definition_list',
+             lambda p, project: [x['processDefinition'] for x in d.list_definitions(project)]),
+            ('GET', pd + r"/simple-list", 'definition_simple_list', lambda p, project: [
+                {k: x['processDefinition'][k] for k in ('id', 'code', 'name', 'projectCode')}
+                for x in d.list_definitions(project)]),
+            ('POST', pd + r"/query-by-name", 'definition_by_name',
+             lambda p, project: d.get_process_definition_by_name(project, p['name'])),
+            ('GET', pd + r"/verify-name", 'definition_verify_name', self._verify_definition_name),
+            ('GET', pd + r"/(\d+)", 'definition_get', lambda p, project, code: d.get_process_definition(project, code)),
+            ('PUT', pd + r"/(\d+)", 'definition_update', lambda p, project, code: d.update_process_definition(
+                project, code, p, _json_param(p, 'taskDefinitionJson', []), _json_param(p, 'taskRelationJson', []))),
+            ('DELETE', pd + r"/(\d+)", 'definition_delete',
+             lambda p, project, code: d.delete_process_definition(project, code)),
+            ('POST', pd + r"/(\d+)/release", 'definition_release',
+             lambda p, project, code: d.release_process_definition(project, code, p['releaseState'])),
+
+            # process and task instances
+            ('GET', r"projects/(\d+)/process-instances", 'instance_page', lambda p, project: paginate(
+                d.list_process_instances(project, p.get('processDefineCode'), p.get('stateType'), p.get('startDate'),
+                                         p.get('endDate'), p.get('searchVal')), p.get('pageNo'), p.get('pageSize'))),
+            ('GET', r"projects/(\d+)/process-instances/(\d+)", 'instance_get',
+             lambda p, project, instance: d.get_process_instance(project, instance)),
+            ('GET', r"projects/(\d+)/process-instances/(\d+)/tasks", 'instance_tasks',
+             lambda p, project, instance: d.list_task_instances(project, instance)),
+            ('GET', r"log/detail", 'log_detail',
+             lambda p: d.task_log(p['taskInstanceId'], p.get('skipLineNum'), p.get('limit'))),
+
+            # schedules
+            ('POST', r"projects/(\d+)/schedules", 'schedule_create', lambda p, project: d.create_schedule(
+                project, p['processDefinitionCode'], _json_param(p, 'schedule', {}), p)),
+            ('POST', r"projects/(\d+)/schedules/list", 'schedule_list', lambda p, project: d.list_schedules(project)),
+            ('PUT', r"projects/(\d+)/schedules/(\d+)", 'schedule_update',
+             lambda p, project, schedule: d.update_schedule(project, schedule, _json_param(p, 'schedule', {}), p)),
+            ('POST', r"projects/(\d+)/schedules/(\d+)/online", 'schedule_online',
+             lambda p, project, schedule: d.release_schedule(project, schedule, 'ONLINE')),
+            ('POST', r"projects/(\d+)/schedules/(\d+)/offline", 'schedule_offline',
+             lambda p, project, schedule: d.release_schedule(project, schedule, 'OFFLINE')),
+            ('DELETE', r"projects/(\d+)/schedules/(\d+)", 'schedule_delete',
+             lambda p, project, schedule: d.delete_schedule(project, schedule)),
+            ('GET', r"v2/schedules/(\d+)", 'schedule_get', lambda p, schedule: d.get_schedule(schedule)),
+
+            # datasources
+            ('POST', r"datasources", 'datasource_create', lambda p: d.create_datasource(p)),
+            ('GET', r"datasources", 'datasource_page', lambda p: paginate(
+                d.list_datasources(search_val=p.get('searchVal')), p.get('pageNo'), p.get('pageSize'))),
+            ('GET', r"datasources/list", 'datasource_list', lambda p: d.list_datasources(p['type'])),
+            ('GET', r"datasources/verify-name", 'datasource_verify_name',
+             lambda p: d.verify_datasource_name(p['name'])),
+            ('POST', r"datasources/connect", 'datasource_connect', lambda p: True),
+            ('GET', r"datasources/databases", 'datasource_databases', lambda p: d.list_databases(p['datasourceId'])),
+            ('GET', r"datasources/tables", 'datasource_tables',
+             lambda p: d.list_tables(p['datasourceId'], p.get('database'))),
+            ('GET', r"datasources/tableColumns", 'datasource_columns',
+             lambda p: d.list_columns(p['datasourceId'], p.get('database'), p.get('tableName'))),
+            ('GET', r"datasources/(\d+)", 'datasource_get', lambda p, datasource: d.get_datasource(datasource)),
+            ('PUT', r"datasources/(\d+)", 'datasource_update',
+             lambda p, datasource: d.update_datasource(datasource, p)),
+            ('DELETE', r"datasources/(\d+)", 'datasource_delete', lambda p, datasource: d.delete_datasource(datasource)),
+            ('GET', r"datasources/(\d+)/connect-test", 'datasource_connect_test',
+             lambda p, datasource: d.connect_test(datasource)),
+
+            # data quality
+            ('GET', r"data-quality/ruleList", 'dq_rule_list', lambda p: d.list_rules()),
+            ('GET', r"data-quality/getRuleFormCreateJson", 'dq_rule_form',
+             lambda p: d.rule_form_create_json(p['ruleId'])),
+            ('GET', r"data-quality/result/page", 'dq_result_page', lambda p: paginate(
+                d.query_data_quality_results(p.get('startDate'), p.get('endDate'), p.get('searchVal')),
+                p.get('pageNo'), p.get('pageSize'))),
+        ]
+        return [(method, re.compile(pattern), name, func) for method, pattern, name, func in routes]
+
+    def _verify_definition_name(self, params: Dict, project) -> bool:
+        with self.data.lock:
+            self.data.project(project)
+            if self.data.find_definition(project, params['name']) is not None:
+                raise StubError(10168, f"process definition name {params['name']} already exists")
+        return True
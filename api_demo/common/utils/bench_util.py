@@ -0,0 +1,147 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import platform
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from common.utils.concurrent_util import TaskOutcome, run_bounded
+
+SERIAL = 'serial'
+POOLED = 'pooled'
+ASYNC = 'async'
+MODES = (SERIAL, POOLED, ASYNC)
+
+class BenchResult(NamedTuple):
+    scenario: str
+    mode: str
+    ops: int
+    errors: int
+    wall: float
+    latencies: List[float]
+
+    @property
+    def throughput(self) -> float:
+        """Successful operations per second of wall time"""
+        return (self.ops - self.errors) / self.wall if self.wall > 0 else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Latency percentile in seconds, nearest rank"""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+    def to_dict(self) -> Dict:
+        return {
+            'scenario': self.scenario, 'mode': self.mode, 'ops': self.ops, 'errors': self.errors,
+            'wall_s': round(self.wall, 6), 'ops_per_s': round(self.throughput, 3),
+            'p50_ms': round(self.percentile(50) * 1000, 3), 'p95_ms': round(self.percentile(95) * 1000, 3),
+            'p99_ms': round(self.percentile(99) * 1000, 3),
+        }
+
+def _timed(func: Callable[[Any], Any], item) -> float:
+    start = time.perf_counter()
+    func(item)
+    return time.perf_counter() - start
+
+def measure(scenario: str, mode: str, func: Callable[[Any], Any], items: Iterable,
+            concurrency: int = 8) -> BenchResult:
+    """
+    Time func over every item in one of the execution modes
+
+    Args:
+        scenario: Scenario name recorded in the result
+        mode: serial (one call after another), pooled (thread pool of
+            concurrency workers) or async (asyncio tasks bounded by a
+            semaphore, blocking calls offloaded with asyncio.to_thread)
+        func: Callable taking one item, one operation per call
+        items: Items to process
+        concurrency: Maximum number of calls in flight for pooled and async
+
+    Returns:
+        BenchResult with the latency of every successful operation
+    """
+    items = list(items)
+    start = time.perf_counter()
+    if mode == SERIAL:
+        outcomes = run_bounded(lambda item: _timed(func, item), items, max_workers=1)
+    elif mode == POOLED:
+        outcomes = run_bounded(lambda item: _timed(func, item), items, max_workers=concurrency)
+    elif mode == ASYNC:
+        outcomes = asyncio.run(_measure_async(func, items, concurrency))
+    else:
+        raise ValueError(f"Unknown benchmark mode: {mode}")
+    wall = time.perf_counter() - start
+
+    latencies = [o.result for o in outcomes if o.ok]
+    return BenchResult(scenario, mode, len(items), len(items) - len(latencies), wall, latencies)
+
+async def _measure_async(func: Callable[[Any], Any], items: List, concurrency: int) -> List[TaskOutcome]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(item):
+        async with semaphore:
+            try:
+                return TaskOutcome(item, await asyncio.to_thread(_timed, func, item))
+            except Exception as e:
+                return TaskOutcome(item, error=e)
+
+    return await asyncio.gather(*(call(item) for item in items))
+
+def save_results(path: str, results: List[BenchResult], params: Optional[Dict] = None):
+    """Write the results and the benchmark parameters as JSON"""
+    with open(path, 'w') as f:
+        json.dump({
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'params': params or {},
+            'results': [r.to_dict() for r in results],
+        }, f, indent=2)
+
+def load_results(path: str) -> Dict[tuple, Dict]:
+    """Results of a saved run, keyed by (scenario, mode)"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return {(r['scenario'], r['mode']): r for r in data.get('results') or []}
+
+def compare_results(results: List[BenchResult], baseline: Dict[tuple, Dict],
+                    tolerance: float = 0.1) -> List[Dict]:
+    """
+    Compare results with a saved baseline
+
+    Args:
+        results: Results of the current run
+        baseline: Baseline returned by load_results
+        tolerance: Relative change allowed before a metric counts as a
+            regression, e.g. 0.1 for 10% less throughput or 10% more p95 latency;
+            any increase of the number of errors is a regression
+
+    Returns:
+        One comparison per result found in the baseline, with the relative
+        change of throughput and p95 latency, the errors and a 'regression' flag
+    """
+    comparisons = []
+    for result in results:
+        base = baseline.get((result.scenario, result.mode))
+        if not base:
+            continue
+        current = result.to_dict()
+        throughput = _relative(current['ops_per_s'], base.get('ops_per_s'))
+        p95 = _relative(current['p95_ms'], base.get('p95_ms'))
+        comparisons.append({
+            'scenario': result.scenario, 'mode': result.mode,
+            'ops_per_s': current['ops_per_s'], 'base_ops_per_s': base.get('ops_per_s'), 'throughput_change': throughput,
+            'p95_ms': current['p95_ms'], 'base_p95_ms': base.get('p95_ms'), 'p95_change': p95,
+            'errors': result.errors, 'base_errors': base.get('errors', 0),
+            'regression': ((throughput is not None and throughput < -tolerance) or (p95 is not None and p95 > tolerance)
+                           or result.errors > base.get('errors', 0)),
+        })
+    return comparisons
+
+def _relative(value: float, base: Optional[float]) -> Optional[float]:
+    if not base:
+        return None
+    return (value - base) / base
@@ -0,0 +1,120 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+class TaskOutcome(NamedTuple):
+    item: Any
+    result: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class RateLimiter:
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Thread-safe token bucket
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+def run_bounded(func: Callable[[Any], Any], items: Iterable, max_workers: int = 8,
+                on_done: Optional[Callable[[TaskOutcome], None]] = None) -> List[TaskOutcome]:
+    """
+    Apply func to every item with at most max_workers calls in flight
+
+    Exceptions are captured per item instead of aborting the whole batch.
+
+    Args:
+        func: Callable taking one item
+        items: Items to process
+        max_workers: Maximum number of concurrent calls
+        on_done: Optional callback invoked with each outcome as soon as it is known
+
+    Returns:
+        List of TaskOutcome, in the order of items
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    def call(item):
+        try:
+            outcome = TaskOutcome(item, func(item))
+        except Exception as e:
+            outcome = TaskOutcome(item, error=e)
+        if on_done is not None:
+            on_done(outcome)
+        return outcome
+
+    if max_workers <= 1 or len(items) == 1:
+        return [call(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(call, items))
+
+def fetch_pages(fetch_page: Callable[[Any, int], Dict], keys: Iterable, page_size: int,
+                max_workers: int = 8, chunk_pages: int = 64) -> Iterator[Tuple[Any, List[Dict]]]:
+    """
+    Fetch every page of paged list endpoints
+
+    The first page of every key is fetched to learn the totals, then the
+    remaining pages are fetched concurrently, chunk_pages at a time, so
+    that callers can store each chunk before the next one is requested.
+
+    Args:
+        fetch_page: Callable (key, page_no) -> page data with 'total' and 'totalList'
+        keys: Keys to page through, e.g. project codes
+        page_size: Page size used by fetch_page
+        max_workers: Maximum number of concurrent requests
+        chunk_pages: Number of pages fetched between two yields
+
+    Yields:
+        (key, items of one page)
+
+    Raises:
+        Exception: The first error of a page request
+    """
+    def call(item):
+        key, page_no = item
+        return fetch_page(key, page_no) or {}
+
+    remaining = []
+    for outcome in run_bounded(call, [(key, 1) for key in keys], max_workers):
+        if not outcome.ok:
+            raise outcome.error
+        key = outcome.item[0]
+        total = outcome.result.get('total') or 0
+        remaining.extend((key, n) for n in range(2, (total + page_size - 1) // page_size + 1))
+        yield key, outcome.result.get('totalList') or []
+
+    for i in range(0, len(remaining), chunk_pages):
+        for outcome in run_bounded(call, remaining[i:i + chunk_pages], max_workers):
+            if not outcome.ok:
+                raise outcome.error
+            yield outcome.item[0], outcome.result.get('totalList') or []
@@ -2,7 +2,47 @@
 # -*- coding: utf-8 -*-
 
 import os
-import dotenv
+import re
+import threading
+from typing import Dict, NamedTuple, Optional
+
+_dotenv_lock = threading.Lock()
+_dotenv_loaded = False
+
+# ${VAR} references, and $${VAR} escaping a literal ${VAR}
+_ENV_REFERENCE = re.compile(r'\$(\$?)\{([^}]*)\}')
+
+def load_dotenv_once():
+    """Load the .env file, if it exists, on the first call only"""
+    global _dotenv_loaded
+    with _dotenv_lock:
+        if not _dotenv_loaded:
+            # NOTE: imported on first use, to keep it out of the startup of scripts
+            import dotenv
+            dotenv.load_dotenv()
+            _dotenv_loaded = True
+
+def expand_env(value: str) -> str:
+    """
+    Expand the ${VAR} references of a string from the environment
+
+    Only the braced form is expanded, so that passwords and tokens can
+    contain '$'; $${VAR} is the literal ${VAR}.
+
+    Raises:
+        ValueError if a referenced variable is not set
+    """
+    load_dotenv_once()
+
+    def replace(match):
+        escaped, name = match.groups()
+        if escaped:
+            return '${' + name + '}'
+        if name not in os.environ:
+            raise ValueError(f"Environment variable {name} is not set")
+        return os.environ[name]
+
+    return _ENV_REFERENCE.sub(replace, value)
 
 def load_config():
     """
@@ -15,7 +55,7 @@ def load_config():
         ValueError if required configuration is missing
     """
     # Load .env file if exists
-    dotenv.load_dotenv()
+    load_dotenv_once()
     
     server_url = os.getenv('DOLPHINSCHEDULER_SERVER_URL')
     user_token = os.getenv('DOLPHINSCHEDULER_USER_TOKEN')
@@ -25,4 +65,67 @@ def load_config():
     if not user_token:
         raise ValueError("Missing user authentication token (DOLPHINSCHEDULER_USER_TOKEN)")
     
-    return server_url, user_token
\ No newline at end of file
+    return server_url, user_token
+
+DEFAULT_CLUSTER = 'default'
+DEFAULT_TENANT = 'default'
+
+class ClusterConfig(NamedTuple):
+    name: str
+    server_url: str
+    tokens: Dict[str, str]
+    timeout: Optional[float] = None
+
+    def token(self, tenant: Optional[str] = None) -> str:
+        """Token of a tenant, the default tenant if None"""
+        tenant = tenant or DEFAULT_TENANT
+        if tenant not in self.tokens:
+            raise ValueError(f"No token of tenant '{tenant}' for cluster '{self.name}'")
+        return self.tokens[tenant]
+
+def load_clusters(path: Optional[str] = None) -> Dict[str, ClusterConfig]:
+    """
+    Load the configuration of several clusters
+
+    The clusters file is YAML with a ``clusters`` mapping of cluster name to
+    ``server_url``, an optional ``timeout`` and either one ``token`` or a
+    ``tokens`` mapping of tenant name to token; ${VAR} references are
+    expanded from the environment, which keeps tokens out of the file;
+    other '$' characters are kept as is and $${VAR} is the literal ${VAR}.
+    Without a file, the single cluster of load_config() is named 'default'.
+
+    Args:
+        path: Clusters file, DOLPHINSCHEDULER_CLUSTERS_FILE if None
+
+    Returns:
+        Cluster name -> ClusterConfig
+
+    Raises:
+        ValueError if a cluster misses its server URL or tokens, or references an unset variable
+    """
+    load_dotenv_once()
+    path = path or os.getenv('DOLPHINSCHEDULER_CLUSTERS_FILE')
+    if not path:
+        server_url, user_token = load_config()
+        return {DEFAULT_CLUSTER: ClusterConfig(DEFAULT_CLUSTER, server_url, {DEFAULT_TENANT: user_token})}
+
+    import yaml
+    with open(path, 'r') as f:
+        data = yaml.safe_load(f) or {}
+    clusters = {}
+    for name, entry in (data.get('clusters') or {}).items():
+        entry = entry or {}
+        tokens = entry.get('tokens') or ({DEFAULT_TENANT: entry['token']} if entry.get('token') else {})
+        try:
+            server_url = expand_env(str(entry.get('server_url') or ''))
+            tokens = {str(tenant): expand_env(str(token)) for tenant, token in tokens.items()}
+        except ValueError as e:
+            raise ValueError(f"{e}, referenced by cluster '{name}' in {path}")
+        if not server_url:
+            raise ValueError(f"Missing server URL of cluster '{name}' in {path}")
+        if not tokens:
+            raise ValueError(f"Missing token of cluster '{name}' in {path}")
+        clusters[str(name)] = ClusterConfig(str(name), server_url, tokens, entry.get('timeout'))
+    if not clusters:
+        raise ValueError(f"No cluster in {path}")
+    return clusters
@@ -0,0 +1,260 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+from functools import lru_cache
+from typing import Optional, Tuple, Union
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+MONTH_NAMES = {name: i + 1 for i, name in enumerate(
+    ('JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC'))}
+# Quartz numbers the days of week from 1 (SUN) to 7 (SAT)
+DAY_NAMES = {name: i + 1 for i, name in enumerate(('SUN', 'MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT'))}
+
+SECONDS_PER_DAY = 86400
+
+def _parse_value(value: str, names: Optional[dict]) -> int:
+    value = value.upper()
+    if names and value in names:
+        return names[value]
+    if not value.isdigit():
+        raise ValueError(f"Invalid cron value '{value}'")
+    return int(value)
+
+def parse_cron_field(field: str, low: int, high: int, names: Optional[dict] = None) -> np.ndarray:
+    """
+    Expand a plain cron field: '*', values, names, ranges, steps and lists
+
+    Args:
+        field: Field expression, e.g. '0,30', '1-5', '*/15', 'MON-FRI'
+        low: Smallest allowed value
+        high: Largest allowed value
+        names: Optional name -> value mapping
+
+    Returns:
+        Sorted array of the allowed values
+
+    Raises:
+        ValueError: If the field is invalid or out of range
+    """
+    values = set()
+    for part in field.split(','):
+        step = 1
+        stepped = '/' in part
+        if stepped:
+            part, step_value = part.split('/', 1)
+            step = _parse_value(step_value, None)
+            if step <= 0:
+                raise ValueError(f"Invalid cron step in '{field}'")
+        if part in ('*', '?'):
+            start, end = low, high
+        elif '-' in part:
+            start_value, end_value = part.split('-', 1)
+            start, end = _parse_value(start_value, names), _parse_value(end_value, names)
+        else:
+            start = _parse_value(part, names)
+            # NOTE: Quartz 'a/b' means from a to the end of the range by b
+            end = high if stepped else start
+        if not (low <= start <= high and low <= end <= high):
+            raise ValueError(f"Cron field '{field}' out of range {low}-{high}")
+        if start <= end:
+            values.update(range(start, end + 1, step))
+        else:
+            # Wrapping range, e.g. FRI-MON or 22-2
+            values.update(v if v <= high else v - (high - low + 1)
+                          for v in range(start, end + (high - low + 1) + 1, step))
+    return np.array(sorted(values), dtype=np.int64)
+
+class QuartzCron:
+    def __init__(self, expression: str):
+        """
+        Parsed Quartz cron expression
+
+        Supports '*', '?', values, names, ranges, steps and lists in every
+        field, 'L' and 'L-n' in the day of month, 'nL' and 'n#k' in the day
+        of week. 'W' is not supported.
+
+        Args:
+            expression: 'sec min hour day-of-month month day-of-week [year]'
+
+        Raises:
+            ValueError: If the expression is invalid or unsupported
+        """
+        fields = expression.split()
+        if len(fields) not in (6, 7):
+            raise ValueError(f"Quartz cron '{expression}' must have 6 or 7 fields")
+        self.expression = expression
+        self.fields = fields
+
+        self.seconds = parse_cron_field(fields[0], 0, 59)
+        self.minutes = parse_cron_field(fields[1], 0, 59)
+        self.hours = parse_cron_field(fields[2], 0, 23)
+        self.months = parse_cron_field(fields[4], 1, 12, MONTH_NAMES)
+        self.years = parse_cron_field(fields[6], 1970, 2099) if len(fields) == 7 and fields[6] != '*' else None
+
+        day_of_month, day_of_week = fields[3].upper(), fields[5].upper()
+        if day_of_month != '?' and day_of_week != '?':
+            raise ValueError(f"Quartz cron '{expression}' must have '?' in day-of-month or day-of-week")
+        if 'W' in day_of_month:
+            raise ValueError(f"Quartz cron '{expression}': 'W' is not supported")
+        self.day_of_month = day_of_month
+        self.day_of_week = day_of_week
+        self._day_of_month_values = None
+        self._day_of_week_values = None
+        if day_of_month not in ('?', '*') and not day_of_month.startswith('L'):
+            self._day_of_month_values = parse_cron_field(day_of_month, 1, 31)
+        if day_of_week not in ('?', '*') and not day_of_week.endswith('L') and '#' not in day_of_week:
+            self._day_of_week_values = parse_cron_field(day_of_week, 1, 7, DAY_NAMES)
+
+        # Seconds of day of every fire time, sorted
+        self.times_of_day = np.sort((self.hours[:, None, None] * 3600
+                                     + self.minutes[None, :, None] * 60
+                                     + self.seconds[None, None, :]).ravel())
+
+    def __repr__(self):
+        return f"QuartzCron({self.expression!r})"
+
+    def day_mask(self, days: np.ndarray) -> np.ndarray:
+        """
+        Boolean mask of the days (datetime64[D]) matching the date fields
+        """
+        month_start = days.astype('M8[M]')
+        year = month_start.astype('M8[Y]').astype(np.int64) + 1970
+        month = month_start.astype(np.int64) % 12 + 1
+        day = (days - month_start.astype('M8[D]')).astype(np.int64) + 1
+        last_day = ((month_start + 1).astype('M8[D]') - month_start.astype('M8[D]')).astype(np.int64)
+        # 1970-01-01 is a Thursday, i.e. 5 in Quartz numbering
+        weekday = (days.astype(np.int64) + 4) % 7 + 1
+
+        mask = np.isin(month, self.months)
+        if self.years is not None:
+            mask &= np.isin(year, self.years)
+
+        if self._day_of_month_values is not None:
+            mask &= np.isin(day, self._day_of_month_values)
+        elif self.day_of_month == 'L':
+            mask &= day == last_day
+        elif self.day_of_month.startswith('L-'):
+            mask &= day == last_day - int(self.day_of_month[2:])
+
+        if self._day_of_week_values is not None:
+            mask &= np.isin(weekday, self._day_of_week_values)
+        elif '#' in self.day_of_week:
+            value, nth = self.day_of_week.split('#', 1)
+            mask &= (weekday == _parse_value(value, DAY_NAMES)) & ((day - 1) // 7 + 1 == int(nth))
+        elif self.day_of_week.endswith('L') and self.day_of_week != 'L':
+            value = _parse_value(self.day_of_week[:-1], DAY_NAMES)
+            mask &= (weekday == value) & (day + 7 > last_day)
+        elif self.day_of_week == 'L':
+            mask &= weekday == DAY_NAMES['SAT']
+        return mask
+
+    def fire_times(self,
+                   start: Union[datetime.datetime, int],
+                   end: Union[datetime.datetime, int],
+                   timezone: str = 'UTC') -> np.ndarray:
+        """
+        All fire times in [start, end)
+
+        Fire times are expanded as local wall times, one row per matching
+        day, and converted to UTC with the offset of their local hour, so
+        every fire of the horizon is computed without a Python level loop.
+
+        Args:
+            start: Horizon start, epoch seconds or datetime (naive means UTC)
+            end: Horizon end, epoch seconds or datetime (naive means UTC)
+            timezone: Timezone of the expression, e.g. 'Asia/Shanghai'
+
+        Returns:
+            Sorted int64 array of epoch seconds
+        """
+        start, end = to_epoch_seconds(start), to_epoch_seconds(end)
+        if end <= start:
+            return np.empty(0, dtype=np.int64)
+
+        # Widen the local day range by the largest possible UTC offset
+        days = np.arange((start - SECONDS_PER_DAY) // SECONDS_PER_DAY,
+                         (end + SECONDS_PER_DAY) // SECONDS_PER_DAY + 1).astype('M8[D]')
+        days = days[self.day_mask(days)]
+        if not len(days):
+            return np.empty(0, dtype=np.int64)
+
+        local = (days.astype(np.int64)[:, None] * SECONDS_PER_DAY + self.times_of_day[None, :]).ravel()
+        fires = local - utc_offsets(local, timezone)
+        fires = fires[(fires >= start) & (fires < end)]
+        fires.sort()
+        return fires
+
+@lru_cache(maxsize=1024)
+def parse_quartz_cron(expression: str) -> QuartzCron:
+    """Parse a Quartz cron expression, cached by expression"""
+    return QuartzCron(expression)
+
+@lru_cache(maxsize=65536)
+def _utc_offset(timezone: str, local_hour: int) -> int:
+    local_time = datetime.datetime(1970, 1, 1) + datetime.timedelta(hours=local_hour)
+    return int(ZoneInfo(timezone).utcoffset(local_time).total_seconds())
+
+def utc_offsets(local: np.ndarray, timezone: str) -> np.ndarray:
+    """
+    UTC offsets in seconds of local epoch seconds
+
+    Offsets are looked up once per distinct local hour, which is exact for
+    all timezones whose transitions fall on the hour.
+    """
+    if timezone in ('UTC', 'GMT', 'Etc/UTC'):
+        return np.zeros_like(local)
+    hours, inverse = np.unique(local // 3600, return_inverse=True)
+    offsets = np.fromiter((_utc_offset(timezone, int(h)) for h in hours), dtype=np.int64, count=len(hours))
+    return offsets[inverse]
+
+def to_epoch_seconds(value: Union[datetime.datetime, int, float]) -> int:
+    """Epoch seconds of a datetime, naive datetimes being UTC"""
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return int(value.timestamp())
+    return int(value)
+
+def parse_local_time(value: Optional[str], timezone: str) -> Optional[int]:
+    """Epoch seconds of a '%Y-%m-%d %H:%M:%S' local time, None if empty"""
+    if not value:
+        return None
+    local_time = datetime.datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    return int(local_time.replace(tzinfo=ZoneInfo(timezone)).timestamp())
+
+def shift_crontab(expression: str, seconds: int) -> str:
+    """
+    Delay a crontab with a single second and minute value
+
+    Args:
+        expression: Quartz cron expression
+        seconds: Delay in seconds; the shifted time must stay in the same hour
+
+    Returns:
+        Shifted cron expression
+
+    Raises:
+        ValueError: If the second or minute field is not a single value, or
+            the shift crosses the hour
+    """
+    fields = expression.split()
+    if not (fields[0].isdigit() and fields[1].isdigit()):
+        raise ValueError(f"Cannot shift crontab '{expression}': seconds and minutes must be single values")
+    total = int(fields[1]) * 60 + int(fields[0]) + seconds
+    if not 0 <= total < 3600:
+        raise ValueError(f"Cannot shift crontab '{expression}' by {seconds}s across the hour")
+    fields[0], fields[1] = str(total % 60), str(total // 60)
+    return ' '.join(fields)
+
+def shift_range(expression: str) -> Tuple[int, int]:
+    """
+    Range of delays in seconds accepted by shift_crontab, or (0, 0)
+    """
+    fields = expression.split()
+    if len(fields) < 2 or not (fields[0].isdigit() and fields[1].isdigit()):
+        return 0, 0
+    offset = int(fields[1]) * 60 + int(fields[0])
+    return -offset, 3599 - offset
@@ -0,0 +1,340 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from common.exceptions import DAGValidationError
+
+# Code of the virtual start node in task relations
+START_TASK_CODE = 0
+
+class DAGTask:
+    """Task node of a ProcessDAG"""
+    __slots__ = ('index', 'code', 'name', 'version', 'timeout', 'delay_time', 'definition')
+
+    def __init__(self, index: int, definition: Dict):
+        self.index = index
+        self.code = int(definition['code'])
+        self.name = definition.get('name')
+        self.version = int(definition.get('version') or 1)
+        self.timeout = int(definition.get('timeout') or 0)
+        self.delay_time = int(definition.get('delayTime') or 0)
+        self.definition = definition
+
+    def __repr__(self):
+        return f"DAGTask(code={self.code}, name={self.name!r})"
+
+class CriticalPath(NamedTuple):
+    length: int
+    task_codes: List[int]
+
+class ProcessDAG:
+    def __init__(self):
+        """
+        In-memory DAG of a process definition
+
+        Tasks are stored in a list and addressed by index; successors and
+        predecessors are per-task lists of indices, so traversals never hash
+        task codes.
+        """
+        self.tasks: List[DAGTask] = []
+        self._index_by_code: Dict[int, int] = {}
+        self._successors: List[List[int]] = []
+        self._predecessors: List[List[int]] = []
+        # (pre index, post index) -> relation attributes
+        self._relations: Dict[Tuple[int, int], Dict] = {}
+        self._problems: List[str] = []
+
+    def __len__(self):
+        return len(self.tasks)
+
+    @classmethod
+    def from_definition(cls, task_definitions: Sequence[Dict], task_relations: Sequence[Dict]) -> "ProcessDAG":
+        """
+        Build a DAG from taskDefinitionJson and taskRelationJson style lists
+
+        Problems (duplicate codes, dangling relations, ...) are collected
+        instead of raised, see validate().
+        """
+        dag = cls()
+        for task_definition in task_definitions:
+            dag.add_task(task_definition)
+        for relation in task_relations:
+            dag.add_relation(
+                relation.get('preTaskCode') or START_TASK_CODE,
+                relation.get('postTaskCode'),
+                relation.get('conditionType') or 'NONE',
+                relation.get('conditionParams'),
+                relation.get('name') or '',
+            )
+        return dag
+
+    def add_task(self, task_definition: Dict) -> Optional[DAGTask]:
+        """Add a task from its definition, which must carry a non-zero code"""
+        code = int(task_definition.get('code') or START_TASK_CODE)
+        if code == START_TASK_CODE:
+            self._problems.append(f"Task {task_definition.get('name')!r} has no code")
+            return None
+        if code in self._index_by_code:
+            self._problems.append(f"Duplicate task code {code}")
+            return None
+
+        task = DAGTask(len(self.tasks), task_definition)
+        self.tasks.append(task)
+        self._index_by_code[code] = task.index
+        self._successors.append([])
+        self._predecessors.append([])
+        return task
+
+    def add_relation(self, pre_task_code, post_task_code,
+                     condition_type: str = 'NONE',
+                     condition_params: Optional[Dict] = None,
+                     name: str = ''):
+        """
+        Add an edge between two tasks
+
+        Edges from the start node (code 0) only mark root tasks and are not
+        stored: roots are the tasks without predecessors.
+        """
+        pre_task_code = int(pre_task_code or START_TASK_CODE)
+        post_index = self._index_by_code.get(int(post_task_code or START_TASK_CODE))
+        if post_index is None:
+            self._problems.append(f"Relation {pre_task_code} -> {post_task_code} targets an unknown task")
+            return
+        if pre_task_code == START_TASK_CODE:
+            return
+        pre_index = self._index_by_code.get(pre_task_code)
+        if pre_index is None:
+            self._problems.append(f"Relation {pre_task_code} -> {post_task_code} starts from an unknown task")
+            return
+        if pre_index == post_index:
+            self._problems.append(f"Task {pre_task_code} depends on itself")
+            return
+        if (pre_index, post_index) in self._relations:
+            self._problems.append(f"Duplicate relation {pre_task_code} -> {post_task_code}")
+            return
+
+        self._successors[pre_index].append(post_index)
+        self._predecessors[post_index].append(pre_index)
+        self._relations[(pre_index, post_index)] = {
+            'name': name,
+            'conditionType': condition_type,
+            'conditionParams': condition_params or {},
+        }
+
+    def task(self, code) -> DAGTask:
+        return self.tasks[self._index_by_code[int(code)]]
+
+    def successors(self, code) -> List[int]:
+        return [self.tasks[i].code for i in self._successors[self._index_by_code[int(code)]]]
+
+    def predecessors(self, code) -> List[int]:
+        return [self.tasks[i].code for i in self._predecessors[self._index_by_code[int(code)]]]
+
+    def adjacency(self) -> Tuple[List[List[int]], List[List[int]]]:
+        """Successor and predecessor index lists, indexed like self.tasks"""
+        return self._successors, self._predecessors
+
+    def roots(self) -> List[int]:
+        return [t.code for t in self.tasks if not self._predecessors[t.index]]
+
+    def _topological_indices(self) -> Tuple[List[int], List[int]]:
+        """Kahn's algorithm; returns (order, indices left on cycles)"""
+        in_degree = [len(p) for p in self._predecessors]
+        queue = deque(i for i, d in enumerate(in_degree) if d == 0)
+        order = []
+        while queue:
+            i = queue.popleft()
+            order.append(i)
+            for j in self._successors[i]:
+                in_degree[j] -= 1
+                if in_degree[j] == 0:
+                    queue.append(j)
+        remaining = [i for i, d in enumerate(in_degree) if d > 0]
+        return order, remaining
+
+    def find_cycle(self) -> Optional[List[int]]:
+        """
+        Find a cycle
+
+        Returns:
+            Task codes of one cycle, or None if the graph is acyclic
+        """
+        _, remaining = self._topological_indices()
+        if not remaining:
+            return None
+
+        # Every node left by Kahn's algorithm has a predecessor that is also
+        # left, so walking predecessors must eventually revisit a node.
+        on_cycle = set(remaining)
+        seen = {}
+        path = []
+        i = remaining[0]
+        while i not in seen:
+            seen[i] = len(path)
+            path.append(i)
+            i = next(p for p in self._predecessors[i] if p in on_cycle)
+        cycle = path[seen[i]:]
+        cycle.reverse()
+        return [self.tasks[j].code for j in cycle]
+
+    def topological_order(self) -> List[int]:
+        """
+        Task codes in topological order
+
+        Raises:
+            DAGValidationError: If the graph has a cycle
+        """
+        order, remaining = self._topological_indices()
+        if remaining:
+            cycle = self.find_cycle()
+            raise DAGValidationError(f"Task relations have a cycle: {' -> '.join(map(str, cycle))}",
+                                     problems=[f"Cycle {cycle}"])
+        return [self.tasks[i].code for i in order]
+
+    def validate(self, raise_error: bool = True) -> List[str]:
+        """
+        Validate the DAG before submission
+
+        Checks duplicate codes and names, relations to unknown tasks, self
+        dependencies, duplicate relations and cycles.
+
+        Args:
+            raise_error: Raise instead of returning the problems
+
+        Returns:
+            List of problems, empty if the DAG is valid
+
+        Raises:
+            DAGValidationError: If raise_error and the DAG is invalid
+        """
+        problems = list(self._problems)
+
+        names = {}
+        for task in self.tasks:
+            if not task.name:
+                problems.append(f"Task {task.code} has no name")
+            elif task.name in names:
+                problems.append(f"Duplicate task name {task.name!r} ({names[task.name]}, {task.code})")
+            else:
+                names[task.name] = task.code
+
+        cycle = self.find_cycle()
+        if cycle:
+            problems.append(f"Task relations have a cycle: {' -> '.join(map(str, cycle))}")
+
+        if problems and raise_error:
+            raise DAGValidationError(f"Invalid DAG: {'; '.join(problems[:5])}"
+                                     + (f" (and {len(problems) - 5} more)" if len(problems) > 5 else ""),
+                                     problems=problems)
+        return problems
+
+    def levels(self) -> List[int]:
+        """
+        Longest-path level of every task, indexed like self.tasks
+
+        Roots are on level 0 and every task is one level below its deepest
+        predecessor.
+        """
+        order, remaining = self._topological_indices()
+        if remaining:
+            self.topological_order()
+        level = [0] * len(self.tasks)
+        for i in order:
+            next_level = level[i] + 1
+            for j in self._successors[i]:
+                if level[j] < next_level:
+                    level[j] = next_level
+        return level
+
+    def critical_path(self, default_duration: int = 0) -> CriticalPath:
+        """
+        Estimate the critical path from task delays and timeouts
+
+        A task weighs its delayTime plus its timeout, or default_duration if
+        it has no timeout, all in minutes.
+
+        Args:
+            default_duration: Duration assumed for tasks without timeout
+
+        Returns:
+            CriticalPath with the length in minutes and the task codes on it
+        """
+        order, remaining = self._topological_indices()
+        if remaining:
+            self.topological_order()
+        if not order:
+            return CriticalPath(0, [])
+
+        weight = [t.delay_time + (t.timeout if t.timeout > 0 else default_duration) for t in self.tasks]
+        finish = [0] * len(self.tasks)
+        parent = [-1] * len(self.tasks)
+        for i in order:
+            start = 0
+            for p in self._predecessors[i]:
+                if finish[p] > start:
+                    start = finish[p]
+                    parent[i] = p
+            finish[i] = start + weight[i]
+
+        last = max(order, key=lambda i: finish[i])
+        path = []
+        i = last
+        while i != -1:
+            path.append(self.tasks[i].code)
+            i = parent[i]
+        path.reverse()
+        return CriticalPath(finish[last], path)
+
+    def to_task_definition_json(self) -> List[Dict]:
+        return [t.definition for t in self.tasks]
+
+    def to_task_relation_json(self) -> List[Dict]:
+        """Relations including the start node edges of the root tasks"""
+        relations = []
+        for task in self.tasks:
+            if not self._predecessors[task.index]:
+                relations.append({
+                    'name': '',
+                    'preTaskCode': START_TASK_CODE,
+                    'preTaskVersion': 0,
+                    'postTaskCode': task.code,
+                    'postTaskVersion': task.version,
+                    'conditionType': 'NONE',
+                    'conditionParams': {},
+                })
+        for (pre_index, post_index), attrs in self._relations.items():
+            pre, post = self.tasks[pre_index], self.tasks[post_index]
+            relations.append({
+                'name': attrs['name'],
+                'preTaskCode': pre.code,
+                'preTaskVersion': pre.version,
+                'postTaskCode': post.code,
+                'postTaskVersion': post.version,
+                'conditionType': attrs['conditionType'],
+                'conditionParams': attrs['conditionParams'],
+            })
+        return relations
+
+    def to_locations(self, positions: Optional[Dict[int, Tuple[int, int]]] = None, **layout_options) -> List[Dict]:
+        """
+        Node locations, one entry per task
+
+        Args:
+            positions: Task code -> (x, y); computed by layered_layout by default
+            layout_options: Options of layered_layout
+        """
+        if positions is None:
+            from common.utils.layout_util import layered_layout
+            positions = layered_layout(self, **layout_options)
+        return [{'taskCode': t.code, 'x': positions[t.code][0], 'y': positions[t.code][1]} for t in self.tasks]
+
+    def to_params(self, **location_options) -> Dict[str, str]:
+        """taskDefinitionJson, taskRelationJson and locations as request parameters"""
+        return {
+            'taskDefinitionJson': json.dumps(self.to_task_definition_json()),
+            'taskRelationJson': json.dumps(self.to_task_relation_json()),
+            'locations': json.dumps(self.to_locations(**location_options)),
+        }
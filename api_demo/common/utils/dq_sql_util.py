@@ -0,0 +1,288 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import functools
+import hashlib
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from common.enums.data_quality import ComparisonType, ConnectorType, Rule
+
+TRNIO_ENV_VARS = {
+    'dest_catalog': 'TRNIO_DQ_DATACATALOG',
+    'dest_database': 'TRNIO_DQ_DATABASE',
+    'dest_dq_execute_result_table': 'TRNIO_DQ_EXECUTE_RESULT_TABLE',
+    'dest_dq_task_statistics_value_table': 'TRNIO_DQ_TASK_STATISTICS_VALUE_TABLE',
+}
+
+RULE_REQUIRED_PARAMS = {
+    Rule.NULL_CHECK.id: ['src_connector_type', 'src_datasource_id', 'src_catalog', 'src_database', 'src_table', 'src_field', 'check_type', 'operator', 'threshold', 'failure_strategy', 'comparison_type'],
+    Rule.FIELD_LENGTH_CHECK.id: ['src_connector_type', 'src_datasource_id', 'src_catalog', 'src_database', 'src_table', 'src_field', 'logic_operator', 'field_length', 'check_type', 'operator', 'threshold', 'failure_strategy', 'comparison_type'],
+    Rule.UNIQUENESS_CHECK.id: ['src_connector_type', 'src_datasource_id', 'src_catalog', 'src_database', 'src_table', 'src_field', 'check_type', 'operator', 'threshold', 'failure_strategy', 'comparison_type'],
+    Rule.REGEXP_CHECK.id: ['src_connector_type', 'src_datasource_id', 'src_catalog', 'src_database', 'src_table', 'src_field', 'regexp_pattern', 'check_type', 'operator', 'threshold', 'failure_strategy', 'comparison_type'],
+    Rule.ENUMERATION_CHECK.id: ['src_connector_type', 'src_datasource_id', 'src_catalog', 'src_database', 'src_table', 'src_field', 'enum_list', 'check_type', 'operator', 'threshold', 'failure_strategy', 'comparison_type'],
+    Rule.TABLE_COUNT_CHECK.id: ['src_connector_type', 'src_datasource_id', 'src_catalog', 'src_database', 'src_table', 'check_type', 'operator', 'threshold', 'failure_strategy', 'comparison_type']
+}
+
+# Row conditions of the rules whose offending rows are materialized into an items table
+RULE_CONDITIONS = {
+    Rule.NULL_CHECK.id: "({src_field} is null or {src_field} = '')",
+    Rule.FIELD_LENGTH_CHECK.id: "LENGTH({src_field}) {logic_operator} {field_length}",
+    Rule.REGEXP_CHECK.id: "({src_field} not regexp '{regexp_pattern}')",
+    Rule.ENUMERATION_CHECK.id: "({src_field} NOT IN ({enum_list}) OR {src_field} IS NULL)",
+}
+
+# XXX: the date bounds are emitted verbatim, including the doubled braces
+COMPARISON_DATE_RANGES = {
+    ComparisonType.DailyAvg.id: ("day", "DATE_ADD('day', -1, DATE_TRUNC('day', ${{data_time}}))", "DATE_TRUNC('day', ${{data_time}})"),
+    ComparisonType.WeeklyAvg.id: ("week", "DATE_ADD('week', -1, DATE_TRUNC('week', ${{data_time}}))", "DATE_TRUNC('week', ${{data_time}})"),
+    ComparisonType.MonthlyAvg.id: ("month", "DATE_ADD('month', -1, DATE_TRUNC('month', ${{data_time}}))", "DATE_TRUNC('month', ${{data_time}})"),
+    ComparisonType.Last7DayAvg.id: ("day", "DATE_ADD('day', -7, DATE_TRUNC('day', ${{data_time}}))", "DATE_TRUNC('day', ${{data_time}})"),
+    ComparisonType.Last30DayAvg.id: ("day", "DATE_ADD('day', -30, DATE_TRUNC('day', ${{data_time}}))", "DATE_TRUNC('day', ${{data_time}})")
+}
+
+# Fields of the rule input parameter substituted into the compiled templates
+TEMPLATE_FIELDS = ('src_catalog', 'src_database', 'src_table', 'src_field', 'src_filter',
+                   'logic_operator', 'field_length', 'regexp_pattern', 'enum_list',
+                   'check_type', 'operator', 'threshold', 'failure_strategy')
+
+def generate_unique_code(src_table, src_connector_type, src_datasource_id, src_field, src_database, rule_id, statistics_name, src_filter,
+                         deterministic: bool = False) -> Tuple[str, str]:
+    """
+    Generate the statistics unique code and the short code suffixed to temporary tables
+
+    Args:
+        deterministic: Derive the task unique code from the rule identity only,
+            instead of mixing in the current millisecond timestamp
+
+    Returns:
+        Tuple of (unique_code, task_unique_code)
+    """
+    s = f'{src_table}{src_connector_type}{src_datasource_id}{src_field}{src_database}{rule_id}{statistics_name}{src_filter}'
+    md5_hash = hashlib.md5()
+    md5_hash.update(s.encode('utf-8'))
+    unique_code = md5_hash.hexdigest()
+
+    if deterministic:
+        combined = unique_code.encode('utf-8')
+    else:
+        current_time = int(time.time() * 1000)  # 毫秒时间戳
+        combined = f"{unique_code}{current_time}".encode('utf-8')
+    task_hash = hashlib.sha256(combined).hexdigest()
+    task_unique_code = "".join(c for c in task_hash if c.isalpha())[:6].lower()
+
+    return unique_code, task_unique_code
+
+def _escape(s) -> str:
+    """Escape a constant so it survives str.format unchanged"""
+    return str(s).replace('{', '{{').replace('}', '}}')
+
+@functools.lru_cache(maxsize=None)
+def compile_trnio_sql_template(rule_id: int, comparison_type_id, has_filter: bool) -> str:
+    """
+    Compile the SQL template of a (rule, comparison type) pair
+
+    Everything that only depends on the rule and the comparison type is baked
+    into the template, leaving ``str.format`` fields for the destination
+    tables, the rule input parameters and the generated codes.
+
+    Args:
+        rule_id: Data quality rule id
+        comparison_type_id: Comparison type id
+        has_filter: Whether the rule input parameter carries a ``src_filter``
+
+    Returns:
+        SQL template string
+    """
+    rule = Rule.from_id(rule_id)
+    dest = "{dest_catalog}.{dest_database}"
+    src = "{src_catalog}.{src_database}.{src_table}"
+    output_items_table = f"{rule.output_items_table}_{{task_unique_code}}"
+    output_count_table = f"{rule.output_count_table}_{{task_unique_code}}"
+
+    if rule_id in RULE_CONDITIONS:
+        filter_clause = " AND ({src_filter})" if has_filter else ""
+        sql = (
+            f"CREATE TABLE IF NOT EXISTS {dest}.{output_items_table} "
+            f"AS SELECT * FROM {src} WHERE {RULE_CONDITIONS[rule_id]}{filter_clause};\n"
+            f"CREATE TABLE IF NOT EXISTS {dest}.{output_count_table} "
+            f"AS SELECT COUNT(*) AS {rule.field_alias} "
+            f"FROM {dest}.{output_items_table};\n"
+        )
+    elif rule_id == Rule.UNIQUENESS_CHECK.id:
+        sql = (
+            f"CREATE TABLE IF NOT EXISTS {dest}.{output_items_table} "
+            f"AS SELECT {{src_field}} FROM {src} "
+            f"{' WHERE ({src_filter}) ' if has_filter else ''}"
+            f"GROUP BY {{src_field}} HAVING COUNT(*) > 1;\n"
+            f"CREATE TABLE IF NOT EXISTS {dest}.{output_count_table} "
+            f"AS SELECT COUNT(*) AS {rule.field_alias} "
+            f"FROM {dest}.{output_items_table};\n"
+        )
+    else:
+        sql = (
+            f"CREATE TABLE IF NOT EXISTS {dest}.{output_count_table} "
+            f"AS SELECT COUNT(*) AS {rule.field_alias} "
+            f"FROM {src}"
+            f"{' WHERE ({src_filter})' if has_filter else ''};\n"
+        )
+
+    output_comparison_table = None
+    comparison_value = '0'
+    if comparison_type_id and comparison_type_id in COMPARISON_DATE_RANGES:
+        _, start_date, end_date = COMPARISON_DATE_RANGES[comparison_type_id]
+        date_clause = _escape(f"data_time >= {start_date} AND data_time < {end_date}")
+
+        comparison_type = ComparisonType.from_id(comparison_type_id)
+        if comparison_type and comparison_type.output_table:
+            output_comparison_table = f"{comparison_type.output_table}_{{task_unique_code}}"
+            comparison_value = f"{dest}.{output_comparison_table}.{comparison_type.output_column}"
+
+            sql += (
+                f"CREATE TABLE IF NOT EXISTS {dest}.{output_comparison_table} AS "
+                f"SELECT IFNULL(ROUND(AVG(statistics_value), 2)) AS {comparison_type.output_column} "
+                f"FROM {dest}.{{dest_dq_task_statistics_value_table}} "
+                f"WHERE {date_clause} AND unique_code = '{{unique_code}}' AND statistics_name = '{rule.statistics_name}';\n"
+            )
+    elif comparison_type_id == ComparisonType.FixValue.id:
+        comparison_value = "{comparison_name}"
+
+    sql += (
+        f"INSERT INTO "
+        f"{dest}.{{dest_dq_execute_result_table}} ("
+        f"rule_type, "
+        f"rule_name, "
+        f"process_definition_id, "
+        f"process_instance_id, "
+        f"task_instance_id, "
+        f"statistics_value, "
+        f"comparison_value, "
+        f"comparison_type, "
+        f"check_type, "
+        f"threshold, "
+        f"operator, "
+        f"failure_strategy, "
+        f"create_time, "
+        f"update_time ) "
+        f"SELECT "
+        f"{rule.rule_type} AS rule_type, "
+        f"'{_escape(rule.display_name)}' AS rule_name, "
+        f"${{{{system.workflow.definition.code}}}} AS process_definition_id, "
+        f"${{{{system.workflow.instance.id}}}} AS process_instance_id, "
+        f"${{{{system.task.instance.id}}}} AS task_instance_id, "
+        f"t_count.{rule.field_alias} AS statistics_value, "
+        f"{comparison_value} AS comparison_value, "
+        f"{_escape(comparison_type_id)} AS comparison_type, "
+        f"{{check_type}} AS check_type, "
+        f"{{threshold}} AS threshold, "
+        f"{{operator}} AS operator, "
+        f"{{failure_strategy}} AS failure_strategy, "
+        f"NOW() AS create_time, "
+        f"NOW() AS update_time "
+        f"FROM {dest}.{output_count_table} AS t_count"
+    )
+
+    if output_comparison_table:
+        sql += f"FULL JOIN {dest}.{output_comparison_table};\n"
+    else:
+        sql += ";\n"
+
+    sql += (
+        f"INSERT INTO "
+        f"{dest}.{{dest_dq_task_statistics_value_table}} ("
+        f"process_definition_id, "
+        f"task_instance_id, "
+        f"rule_id, "
+        f"unique_code, "
+        f"statistics_name, "
+        f"statistics_value, "
+        f"data_time, "
+        f"create_time, "
+        f"update_time ) "
+        f"SELECT "
+        f"${{{{system.workflow.definition.code}}}} AS process_definition_id, "
+        f"${{{{system.task.instance.id}}}} AS task_instance_id, "
+        f"{rule_id} AS rule_id, "
+        f"'{{unique_code}}' AS unique_code, "
+        f"'{rule.statistics_name}' AS statistics_name, "
+        f"t_count.{rule.field_alias} AS statistics_value, "
+        f"NOW() AS data_time, "
+        f"NOW() AS create_time, "
+        f"NOW() AS update_time "
+        f"FROM {dest}.{output_count_table} AS t_count;\n"
+    )
+
+    sql += (
+        f"DROP TABLE IF EXISTS {dest}.{output_items_table};\n"
+        f"DROP TABLE IF EXISTS {dest}.{output_count_table};\n"
+    )
+    if output_comparison_table:
+        sql += (
+            f"DELETE FROM {dest}.{output_comparison_table};\n"
+        )
+
+    return sql
+
+def build_trnio_sql(rule_id, rule_input_parameter, deterministic: bool = False) -> Optional[str]:
+    """
+    Build the Trino SQL of a single table data quality check
+
+    Args:
+        rule_id: Data quality rule id
+        rule_input_parameter: Rule input parameters, as in the rule form-create json
+        deterministic: Name the temporary tables after the rule identity only,
+            so that an unchanged rule always yields the same SQL
+
+    Returns:
+        SQL script, or None if the parameters are invalid
+    """
+    if not isinstance(rule_id, int) or not isinstance(rule_input_parameter, dict):
+        print("Invalid parameter types")
+        return None
+
+    src_connector_type = rule_input_parameter.get('src_connector_type')
+    if src_connector_type != ConnectorType.TRINO.value:
+        print(f"Not trino connector type: {src_connector_type}")
+        return None
+
+    rule = Rule.from_id(rule_id)
+    if not rule:
+        print(f"Invalid data quality rule id: {rule_id}")
+        return None
+
+    env_vars = {k: os.getenv(v) for k, v in TRNIO_ENV_VARS.items()}
+    if any(v is None for v in env_vars.values()):
+        print("Missing required environment variables")
+        return None
+
+    required_params = RULE_REQUIRED_PARAMS[rule_id]
+    if not all(p in rule_input_parameter for p in required_params):
+        print("Missing required parameters")
+        return None
+
+    unique_code, task_unique_code = generate_unique_code(
+        rule_input_parameter.get('src_table'),
+        src_connector_type,
+        rule_input_parameter.get('src_datasource_id'),
+        rule_input_parameter.get('src_field'),
+        rule_input_parameter.get('src_database'),
+        rule_id,
+        rule.statistics_name,
+        rule_input_parameter.get('src_filter'),
+        deterministic=deterministic
+    )
+
+    template = compile_trnio_sql_template(
+        rule_id,
+        rule_input_parameter.get('comparison_type'),
+        bool(rule_input_parameter.get('src_filter'))
+    )
+
+    values = {k: rule_input_parameter.get(k) for k in TEMPLATE_FIELDS}
+    values.update(env_vars)
+    values['comparison_name'] = rule_input_parameter.get('comparison_name', '0')
+    values['unique_code'] = unique_code
+    values['task_unique_code'] = task_unique_code
+
+    return template.format_map(values)
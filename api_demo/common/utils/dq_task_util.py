@@ -0,0 +1,180 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+from typing import Callable, Dict, List, Optional, Set
+
+from common.utils.dq_sql_util import build_trnio_sql
+
+# According to /data-quality/getRuleFormCreateJson?ruleId=${rule_id}
+INT_RULE_INPUT_PARAMETER_KEYS = ('src_connector_type', 'src_datasource_id', 'comparison_type')
+STR_RULE_INPUT_PARAMETER_KEYS = ('check_type', 'operator', 'threshold', 'failure_strategy', 'field_length')
+
+# Keys of task params holding datasource ids, at any depth (SQL, PROCEDURE and DATA_QUALITY tasks)
+DATASOURCE_KEYS = ('datasource', 'src_datasource_id', 'target_datasource_id')
+
+def build_data_quality_task_params(task_params_spec: Dict, rule_input_parameter_keys: List[str]) -> Dict:
+    """
+    Build the taskParams of a DATA_QUALITY task from a check spec
+
+    Args:
+        task_params_spec: ``taskDefinition.taskParams`` of the check spec
+        rule_input_parameter_keys: Input fields of the rule form-create json
+
+    Returns:
+        DATA_QUALITY task params
+    """
+    rule_id = int(task_params_spec.get('ruleId'))
+    spec_rule_input_parameter = task_params_spec.get('ruleInputParameter')
+    spec_spark_parameters = task_params_spec.get('sparkParameters')
+
+    rule_input_parameter = dict()
+    for k in rule_input_parameter_keys:
+        if k in INT_RULE_INPUT_PARAMETER_KEYS:
+            rule_input_parameter[k] = int(spec_rule_input_parameter.get(k))
+        elif k in STR_RULE_INPUT_PARAMETER_KEYS:
+            rule_input_parameter[k] = str(spec_rule_input_parameter.get(k))
+        else:
+            rule_input_parameter[k] = spec_rule_input_parameter.get(k)
+
+    if int(spec_rule_input_parameter.get('comparison_type')) == 1:
+        # if comparison type is fix value, set it.
+        rule_input_parameter['comparison_name'] = str(spec_rule_input_parameter.get('comparison_name'))
+
+    spark_parameters = {
+        'deployMode': spec_spark_parameters.get('deployMode'),
+        'driverCores': int(spec_spark_parameters.get('driverCores')),
+        'driverMemory': spec_spark_parameters.get('driverMemory'),
+        'executorCores': int(spec_spark_parameters.get('executorCores')),
+        'executorMemory': spec_spark_parameters.get('executorMemory'),
+        'numExecutors': int(spec_spark_parameters.get('numExecutors')),
+        'others': spec_spark_parameters.get('others'),
+        'yarnQueue': '',
+    }
+
+    return {
+        'resourceList': [],
+        'localParams': [],
+        'ruleId': rule_id,
+        'ruleInputParameter': rule_input_parameter,
+        'sparkParameters': spark_parameters,
+    }
+
+def build_trnio_sql_task_params(task_params_spec: Dict) -> Optional[Dict]:
+    """
+    Build the taskParams of a Trino SQL task running the check as plain SQL
+
+    Args:
+        task_params_spec: ``taskDefinition.taskParams`` of the check spec
+
+    Returns:
+        SQL task params, or None if the SQL cannot be built
+    """
+    rule_id = int(task_params_spec.get('ruleId'))
+    rule_input_parameter = task_params_spec.get('ruleInputParameter')
+    sql = build_trnio_sql(rule_id, rule_input_parameter, deterministic=True)
+    if not sql:
+        return None
+
+    return {
+        'localParams': [],
+        'resourceList': [],
+        'type': 'TRINO',
+        'datasource': rule_input_parameter.get('src_datasource_id'),
+        'sql': sql,
+        'sqlType': "1",
+        'preStatements': [],
+        'postStatements': [],
+        'displayRows': 10
+    }
+
+def build_task_definition(task_definition_spec: Dict, task_code: int, task_type: str, task_params: Dict) -> Dict:
+    """
+    Build a task definition from a check spec
+
+    Args:
+        task_definition_spec: ``taskDefinition`` of the check spec
+        task_code: Generated task code
+        task_type: DATA_QUALITY or SQL
+        task_params: Task params built for the task type
+
+    Returns:
+        Task definition, as sent in taskDefinitionJson
+    """
+    return {
+        'code': task_code,
+        'name': task_definition_spec.get('name'),
+        'description': task_definition_spec.get('description'),
+        'taskType': task_type,
+        'taskParams': json.dumps(task_params),
+        'flag': task_definition_spec.get('flag'),
+        'isCache': task_definition_spec.get('isCache'),
+        'taskPriority': task_definition_spec.get('taskPriority'),
+        'workerGroup': task_definition_spec.get('workerGroup'),
+        'environmentCode': -1,
+        'failRetryTimes': int(task_definition_spec.get('failRetryTimes')),
+        'failRetryInterval': task_definition_spec.get('failRetryInterval'),
+        'timeoutFlag': task_definition_spec.get('timeoutFlag'),
+        'timeoutNotifyStrategy': task_definition_spec.get('timeoutNotifyStrategy'),
+        'timeout': int(task_definition_spec.get('timeout')),
+        'delayTime': int(task_definition_spec.get('delayTime')),
+        'cpuQuota': -1,
+        'memoryMax': -1,
+    }
+
+def build_parallel_task_relations(task_codes: List[int], task_versions: Optional[Dict[int, int]] = None) -> List[Dict]:
+    """
+    Build task relations running every task in parallel from the start node
+
+    Args:
+        task_codes: Task codes
+        task_versions: Current versions of existing tasks, new tasks default to 1
+
+    Returns:
+        Task relations, as sent in taskRelationJson
+    """
+    task_versions = task_versions or {}
+    return [
+        {
+            'name': '',
+            'preTaskCode': 0,
+            'preTaskVersion': 0,
+            'postTaskCode': task_code,
+            'postTaskVersion': task_versions.get(task_code, 1),
+            'conditionType': 'NONE',
+            'conditionParams': {},
+        }
+        for task_code in task_codes
+    ]
+
+def map_task_datasources(task_params, mapper: Callable[[int], int]):
+    """
+    Copy of task params with every datasource id replaced by mapper(id)
+
+    Ids keep their type, string ids of rule input parameters stay strings.
+    """
+    if isinstance(task_params, dict):
+        mapped = {}
+        for key, value in task_params.items():
+            if key in DATASOURCE_KEYS and value not in (None, '', 0, '0') and not isinstance(value, (dict, list)):
+                new = mapper(int(value))
+                mapped[key] = str(new) if isinstance(value, str) else new
+            else:
+                mapped[key] = map_task_datasources(value, mapper)
+        return mapped
+    if isinstance(task_params, list):
+        return [map_task_datasources(value, mapper) for value in task_params]
+    return task_params
+
+def task_datasource_ids(task_definitions: List[Dict]) -> Set[int]:
+    """Datasource ids referenced by task definitions, taskParams as a mapping or JSON string"""
+    ids = set()
+
+    def collect(datasource_id):
+        ids.add(datasource_id)
+        return datasource_id
+
+    for task in task_definitions:
+        params = task.get('taskParams')
+        map_task_datasources(json.loads(params) if isinstance(params, str) and params else params, collect)
+    return ids
@@ -0,0 +1,89 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import gzip
+import json
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+# Encodings of the responses accepted by the clients
+ACCEPT_ENCODING = 'gzip, deflate'
+
+class TransferStats:
+    """
+    Thread-safe counters of the bytes exchanged with the server
+
+    Wire bytes are the bytes actually transferred, after compression;
+    decoded bytes are the sizes of the uncompressed bodies.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.compressed_requests = 0
+            self.compressed_responses = 0
+            self.sent_wire = 0
+            self.sent_decoded = 0
+            self.received_wire = 0
+            self.received_decoded = 0
+
+    def record_sent(self, wire: int, decoded: int):
+        with self._lock:
+            self.requests += 1
+            self.compressed_requests += wire != decoded
+            self.sent_wire += wire
+            self.sent_decoded += decoded
+
+    def record_received(self, wire: int, decoded: int, compressed: bool):
+        with self._lock:
+            self.compressed_responses += compressed
+            self.received_wire += wire
+            self.received_decoded += decoded
+
+    def snapshot(self) -> Dict:
+        """Current counters, with the ratio of wire to decoded bytes of both directions"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'compressed_requests': self.compressed_requests,
+                'compressed_responses': self.compressed_responses,
+                'sent_wire': self.sent_wire,
+                'sent_decoded': self.sent_decoded,
+                'sent_ratio': self.sent_wire / self.sent_decoded if self.sent_decoded else 1.0,
+                'received_wire': self.received_wire,
+                'received_decoded': self.received_decoded,
+                'received_ratio': self.received_wire / self.received_decoded if self.received_decoded else 1.0,
+            }
+
+    def format(self) -> str:
+        s = self.snapshot()
+        return (f"{s['requests']} requests, sent {s['sent_wire']} of {s['sent_decoded']} bytes "
+                f"({s['compressed_requests']} compressed), received {s['received_wire']} of "
+                f"{s['received_decoded']} bytes ({s['compressed_responses']} compressed)")
+
+def encode_json_body(json_data, compress_min_bytes: Optional[int]) -> Tuple[bytes, Dict[str, str], int]:
+    """
+    Serialize a JSON request body, gzip compressed if large enough
+
+    Args:
+        json_data: JSON payload
+        compress_min_bytes: Smallest body sent compressed, never compress if None
+
+    Returns:
+        (body, headers to send with it, uncompressed size)
+    """
+    body = json.dumps(json_data, allow_nan=False).encode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+    size = len(body)
+    if compress_min_bytes is not None and size >= compress_min_bytes:
+        body = gzip.compress(body, 6)
+        headers['Content-Encoding'] = 'gzip'
+    return body, headers, size
+
+def encode_form_body(form_data: Dict) -> Tuple[bytes, Dict[str, str]]:
+    """Serialize form parameters as an application/x-www-form-urlencoded body"""
+    return urlencode(form_data).encode('ascii'), {'Content-Type': 'application/x-www-form-urlencoded'}
@@ -0,0 +1,130 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import codecs
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence
+
+WHITESPACE = ' \t\n\r'
+
+# Characters that can continue a JSON number
+NUMBER_CHARS = '0123456789.eE+-'
+
+# Consumed characters kept in the buffer before it is compacted
+COMPACT_THRESHOLD = 1 << 16
+
+class _Reader:
+    """Character buffer over an iterable of byte chunks"""
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        if self.pos > COMPACT_THRESHOLD:
+            self.buf, self.pos = self.buf[self.pos:], 0
+        for chunk in self.chunks:
+            text = self.decoder.decode(chunk)
+            if text:
+                self.buf += text
+                return True
+        self.buf += self.decoder.decode(b'', final=True)
+        self.eof = True
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, without consuming it, '' at the end"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError(f"Expected one of {chars!r} but got {c or 'end of data'!r}")
+        self.pos += 1
+        return c
+
+    def value(self) -> Any:
+        """
+        Decode the next complete JSON value
+
+        A number is only accepted once the character following it is in
+        the buffer and cannot continue it, so that a number split across
+        chunks, e.g. at '.' or 'e', is not cut short.
+        """
+        decoder = json.JSONDecoder()
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+                number = isinstance(value, (int, float)) and not isinstance(value, bool)
+                if self.eof or not number or (end < len(self.buf) and self.buf[end] not in NUMBER_CHARS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+def iter_json_items(chunks: Iterable[bytes], path: Sequence[str] = ('data',),
+                    envelope: Optional[Dict] = None) -> Iterator[Any]:
+    """
+    Yield the items of an array nested in a JSON object, as the body arrives
+
+    Only one item at a time is decoded into Python objects; the other
+    members of the objects along the path are decoded whole.
+
+    Args:
+        chunks: Body as byte chunks, e.g. response.iter_content()
+        path: Keys leading from the top-level object to the array
+        envelope: Filled with the other members of the top-level object,
+            e.g. code, msg and success; complete once the iterator is exhausted
+
+    Yields:
+        Items of the array, nothing if the path is missing or null
+
+    Raises:
+        ValueError: If the body is not valid JSON or the path is not an array
+    """
+    reader = _Reader(chunks)
+    envelope = envelope if envelope is not None else {}
+    yield from _iter_object(reader, list(path), envelope)
+    if reader.peek():
+        raise ValueError("Extra data after the JSON document")
+
+def _iter_object(reader: _Reader, path: list, members: Dict) -> Iterator[Any]:
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.pos += 1
+        return
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if key == path[0] and reader.peek() != 'n':
+            if len(path) == 1:
+                yield from _iter_array(reader)
+            else:
+                yield from _iter_object(reader, path[1:], {})
+        else:
+            members[key] = reader.value()
+        if reader.expect(',}') == '}':
+            return
+
+def _iter_array(reader: _Reader) -> Iterator[Any]:
+    reader.expect('[')
+    if reader.peek() == ']':
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        if reader.expect(',]') == ']':
+            return
@@ -6,6 +6,8 @@ import os
 import sys
 import requests
 
+OPTION_KEYS = frozenset(['label', 'value'])
+
 
 if __name__ == '__main__':
     server_url = os.getenv('DOLPHINSCHEDULER_SERVER_URL')
@@ -49,7 +51,7 @@ if __name__ == '__main__':
         field = x.get('field')
         options = x.get('options')
         if options is not None:
-            options = [ {k: v for k, v in option.items() if k in set(['label', 'value'])} for option in options ]
+            options = [ {k: v for k, v in option.items() if k in OPTION_KEYS} for option in options ]
         print({
             'field': field,
             'options': options,
@@ -0,0 +1,85 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import datetime
+import sys
+import os
+import threading
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.analytics.datasource_health import HealthStore
+from common.analytics.history_store import DATETIME_FORMAT
+from common.exceptions import APIException
+from common.services.health_check import DatasourceHealthCheck
+
+def print_report(store, args):
+    since = (datetime.datetime.now() - datetime.timedelta(days=args.days)).strftime(DATETIME_FORMAT)
+    report = store.health(since, args.window, args.min_flips)
+    print(f"  {'id':>6} {'type':<12} {'checks':>6} {'avail':>6} {'p50 ms':>8} {'p95 ms':>8} {'flips':>5}  status  name")
+    for h in report[:args.top]:
+        status = 'FLAP' if h.flapping else ('OK' if h.last_ok else 'DOWN')
+        print(f"  {h.datasource_id:>6} {h.type:<12} {h.checks:>6} {h.availability:>6.0%} {h.latency_p50:>8.0f} "
+              f"{h.latency_p95:>8.0f} {h.flips:>5}  {status:<6}  {h.name}")
+    flapping = [h for h in report if h.flapping]
+    down = [h for h in report if not h.flapping and not h.last_ok]
+    print(f"{len(report)} datasources, {len(flapping)} flapping, {len(down)} down")
+
+def main():
+    parser = argparse.ArgumentParser(description="Connection test sweep over all datasources with a local time series of the results")
+    parser.add_argument("--db", default="datasource_health.db", help="SQLite database file")
+    parser.add_argument("--type", action="append", default=[], help="datasource type, repeatable; all types by default")
+    parser.add_argument("--name", help="only datasource names matching this glob pattern")
+    parser.add_argument("--concurrency", type=int, default=32, help="maximum number of tests in flight")
+    parser.add_argument("--timeout", type=float, default=10, help="seconds after which a test fails")
+    parser.add_argument("--rate", type=float, help="maximum number of tests started per second")
+    parser.add_argument("--interval", type=float, help="repeat the sweep every this many seconds")
+    parser.add_argument("--report-only", action="store_true", help="print the report of the stored results only")
+    parser.add_argument("--days", type=int, default=7, help="checks of the last days in the report")
+    parser.add_argument("--window", type=int, default=20, help="latest checks per datasource in the report")
+    parser.add_argument("--min-flips", type=int, default=3, help="result changes over the window of a flapping source")
+    parser.add_argument("--top", type=int, default=30, help="number of report rows")
+    args = parser.parse_args()
+
+    # NOTE: results are reported from the worker threads
+    print_lock = threading.Lock()
+
+    def on_result(datasource, result):
+        if not result.ok:
+            with print_lock:
+                print(f"  FAIL {datasource['id']:>6} {datasource.get('type', ''):<12} {result.latency_ms:>8.0f}ms  "
+                      f"{datasource.get('name', '')}: {result.error}", flush=True)
+
+    try:
+        with HealthStore(args.db) as store:
+            if args.report_only:
+                print_report(store, args)
+                return
+
+            # 初始化健康检查
+            check = DatasourceHealthCheck(store, max_workers=args.concurrency, timeout=args.timeout, rate=args.rate)
+            while True:
+                started = time.monotonic()
+                results = check.sweep(args.type, args.name, on_result)
+                failed = sum(not r.ok for r in results)
+                print(f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S} swept {len(results)} datasources in "
+                      f"{time.monotonic() - started:.1f}s, {failed} failed", flush=True)
+                print_report(store, args)
+                if not args.interval:
+                    break
+                time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+
+    except KeyboardInterrupt:
+        pass
+    except APIException as e:
+        print(f"Error checking datasources: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.exceptions import APIException
+from common.services.datasource_provision import DatasourceProvisioner, ProvisionPlan, load_manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Create or update datasources from a YAML manifest")
+    parser.add_argument("manifest", help="manifest with a 'datasources' list and optional 'defaults'")
+    parser.add_argument("--apply", action="store_true", help="submit the plan, otherwise only print it")
+    parser.add_argument("--connect-test", action="store_true", help="connect-test the created and updated datasources")
+    parser.add_argument("--force", action="store_true", help="update matching datasources even without a change")
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum number of concurrent API calls")
+    parser.add_argument("--verbose", action="store_true", help="print the changed fields")
+    args = parser.parse_args()
+
+    try:
+        desired = load_manifest(args.manifest)
+        if not desired:
+            print(f"No datasource in {args.manifest}")
+            sys.exit(1)
+
+        # 生成变更计划
+        provisioner = DatasourceProvisioner(max_workers=args.concurrency)
+        plans = provisioner.plan(desired, force=args.force)
+        counts = {}
+        for plan in plans:
+            counts[plan.action] = counts.get(plan.action, 0) + 1
+            print(plan.format(verbose=args.verbose))
+        print(f"Plan: {len(plans)} datasources, " + ", ".join(f"{n} {action}" for action, n in counts.items()))
+
+        if not args.apply:
+            return
+
+        # 提交变更
+        failed = counts.get(ProvisionPlan.CONFLICT, 0)
+        for outcome in provisioner.apply(plans, connect_test=args.connect_test):
+            if outcome.item.action not in (ProvisionPlan.CREATE, ProvisionPlan.UPDATE):
+                continue
+            if outcome.ok:
+                print(f"{outcome.item.action} {outcome.item.name}: OK")
+            else:
+                failed += 1
+                print(f"{outcome.item.action} {outcome.item.name} failed: {outcome.error}")
+        if failed:
+            sys.exit(1)
+
+    except ValueError as e:
+        print(f"Invalid manifest: {e}")
+        sys.exit(1)
+    except APIException as e:
+        print(f"Error provisioning datasources: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
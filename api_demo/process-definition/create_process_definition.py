@@ -6,6 +6,11 @@ import os
 import sys
 import requests
 
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.utils.dag_util import ProcessDAG
+
 
 if __name__ == '__main__':
     server_url = os.getenv('DOLPHINSCHEDULER_SERVER_URL')
@@ -49,7 +54,6 @@ if __name__ == '__main__':
     name = "dag_test"
     description = "desc test"
     global_params = "[]"
-    locations = "[]"
     timeout = 0
     task_relation = [
         {
@@ -106,7 +110,7 @@ if __name__ == '__main__':
         'name': name,
         'description': description,
         'globalParams': global_params,
-        'locations': locations,
+        'locations': json.dumps(ProcessDAG.from_definition(task_definition, task_relation).to_locations()),
         'timeout': timeout,
         'taskRelationJson': json.dumps(task_relation),
         'taskDefinitionJson': json.dumps(task_definition),
@@ -114,8 +118,9 @@ if __name__ == '__main__':
        'executionType': execution_type,
     }
         
+    # NOTE: form body instead of query string, large definitions exceed URL length limits
     try:
-        response = requests.post(url, headers=headers, params=params)
+        response = requests.post(url, headers=headers, data=params)
         response.raise_for_status()
         json_data = response.json()
     except Exception as e:
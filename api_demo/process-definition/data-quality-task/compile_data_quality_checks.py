@@ -0,0 +1,65 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common.api.process_definition_api import ProcessDefinitionAPI
+from common.exceptions import APIException
+from common.services.definition_sync import SyncPlan
+from common.services.dq_compiler import DataQualityCompiler, load_check_specs
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile data quality check specs into process definitions")
+    parser.add_argument("project_code", help="project code")
+    parser.add_argument("source", help="directory of check specs, manifest or single check spec")
+    parser.add_argument("--apply", action="store_true", help="submit the plan, otherwise only print it")
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum number of concurrent API calls")
+    parser.add_argument("--verbose", action="store_true", help="print the diff of updated process definitions")
+    args = parser.parse_args()
+
+    try:
+        specs = load_check_specs(args.source)
+        if not specs:
+            print(f"No check spec found in {args.source}")
+            sys.exit(1)
+
+        # 初始化API客户端
+        api = ProcessDefinitionAPI()
+        compiler = DataQualityCompiler(args.project_code, process_definition_api=api, max_workers=args.concurrency)
+
+        # 生成变更计划
+        plans = compiler.plan(specs)
+        print(f"Plan: {len(specs)} checks in {len(plans)} process definitions")
+        for plan in plans:
+            print(plan.format(verbose=args.verbose))
+
+        if not args.apply:
+            return
+
+        # 提交变更
+        failed = 0
+        for outcome in compiler.apply(plans):
+            if outcome.item.action == SyncPlan.NOOP:
+                continue
+            if outcome.ok:
+                print(f"{outcome.item.action} {outcome.item.name}: {outcome.result}")
+            else:
+                failed += 1
+                print(f"{outcome.item.action} {outcome.item.name} failed: {outcome.error}")
+        if failed:
+            sys.exit(1)
+
+    except APIException as e:
+        print(f"Error compiling data quality checks: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
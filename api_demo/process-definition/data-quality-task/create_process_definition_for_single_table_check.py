@@ -8,6 +8,11 @@ import sys
 import requests
 import yaml
 
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common.utils.dag_util import ProcessDAG
+
 class Rule(Enum):
     NULL_CHECK = 1
     FIELD_LENGTH_CHECK = 5
@@ -117,7 +122,6 @@ if __name__ == '__main__':
     name = yaml_data.get('name')
     description = yaml_data.get('description')
     global_params = "[]"
-    locations = "[]"
     timeout = 0
     task_relation = [
         {
@@ -192,7 +196,7 @@ if __name__ == '__main__':
         'name': name,
         'description': description,
         'globalParams': global_params,
-        'locations': locations,
+        'locations': json.dumps(ProcessDAG.from_definition(task_definition, task_relation).to_locations()),
         'timeout': timeout,
         'taskRelationJson': json.dumps(task_relation),
         'taskDefinitionJson': json.dumps(task_definition),
@@ -200,8 +204,9 @@ if __name__ == '__main__':
         'executionType': execution_type,
     }
     
+    # NOTE: form body instead of query string, large definitions exceed URL length limits
     try:
-        response = requests.post(url, headers=headers, params=params)
+        response = requests.post(url, headers=headers, data=params)
         response.raise_for_status()
         json_data = response.json()
     except Exception as e:
@@ -0,0 +1,58 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.exceptions import APIException, DeploymentValidationError
+from common.services.deployment import ReleaseDeployer, load_release
+
+def main():
+    parser = argparse.ArgumentParser(description="Deploy a release of new process definitions and schedules, all or nothing")
+    parser.add_argument("project_code", help="project code")
+    parser.add_argument("release", help="release YAML file, with a 'definitions' list and optional 'defaults'")
+    parser.add_argument("--validate-only", action="store_true", help="validate the release without deploying it")
+    parser.add_argument("--no-rollback", action="store_true", help="keep the applied operations if the deployment fails")
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum number of concurrent API calls")
+    args = parser.parse_args()
+
+    try:
+        specs = load_release(args.release)
+        deployer = ReleaseDeployer(args.project_code, max_workers=args.concurrency)
+
+        # 部署前并发校验名字与数据源
+        if args.validate_only:
+            problems = deployer.validate(specs)
+            for problem in problems:
+                print(f"  {problem}")
+            print(f"Release of {len(specs)} process definitions is {'invalid' if problems else 'valid'}")
+            sys.exit(1 if problems else 0)
+
+        # 并行创建、上线、调度，失败时逆序回滚
+        result = deployer.deploy(specs, rollback=not args.no_rollback)
+        print(result.format())
+        if not result.ok:
+            sys.exit(1)
+
+    except DeploymentValidationError as e:
+        print(f"{e}:")
+        for problem in e.problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Invalid release: {e}")
+        sys.exit(1)
+    except APIException as e:
+        print(f"API Error: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,65 +1,33 @@
 #!/bin/env python3
 # -*- coding: utf-8 -*-
 
-from http import HTTPStatus
 import json
 import os
 import sys
-import requests
 
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-if __name__ == '__main__':
-    server_url = os.getenv('DOLPHINSCHEDULER_SERVER_URL')
-    user_token = os.getenv('DOLPHINSCHEDULER_USER_TOKEN')
-    
-    if len(sys.argv) < 2:
+from common.exceptions import APIException
+from common.services.definition_sync import DefinitionSync, DesiredDefinition, SyncPlan
+
+def main():
+    if len(sys.argv) < 3:
         print("Usage: {} <project-code> <process-definition-code>".format(sys.argv[0]))
         sys.exit(1)
-    
+
     project_code = sys.argv[1]
     process_definition_code = sys.argv[2]
-    
-    # XXX: Depend on another API that query task code list
-    url = os.path.join(server_url, 'projects', project_code, 'task-definition', 'gen-task-codes')
-    headers = {'token': user_token}
-    params = {
-        'genNum': 1
-    }
-        
-    try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        json_data = response.json()
-    except Exception as e:
-        print(f'Request failed, error: {e}')
-        sys.exit(1)
-    
-    success = json_data.get('success')
-    failed = json_data.get('failed')
-    if (not success) or failed:
-        code = json_data.get('code')
-        msg = json_data.get('msg')
-        print(f'Query task code failed, code: {code}, msg: {msg}')
-        sys.exit(1)
-    
-    data = json_data.get('data')
-    task_code = data[0]
-    
-    # Update process definition
-    url = os.path.join(server_url, 'projects', project_code, 'process-definition', process_definition_code)
-    
-    name = "dag_test"
-    description = "desc test"
-    global_params = "[]"
-    locations = "[]"
-    timeout = 0
+
+    # NOTE: local task code, mapped to the existing task code of the same name
+    task_code = 1
     task_relation = [
         {
             'name': '',
             'preTaskCode': 0,
             'preTaskVersion': 0,
             'postTaskCode': task_code,
-            'postTaskVersion': 2,
+            'postTaskVersion': 1,
             'conditionType': 'NONE',
             'conditionParams': {},
             },
@@ -101,37 +69,33 @@ if __name__ == '__main__':
             'resourceIds': ''
             }
         ]
-    other_params = ''
-    execution_type = "PARALLEL"
-    
-    params = {
-        'name': name,
-        'description': description,
-        'globalParams': global_params,
-        'locations': locations,
-        'timeout': timeout,
-        'taskRelationJson': json.dumps(task_relation),
-        'taskDefinitionJson': json.dumps(task_definition),
-        'otherParamsJson': json.dumps(other_params),
-        'executionType': execution_type,
-    }
+    desired = DesiredDefinition(
+        "dag_test",
+        task_definition,
+        task_relation,
+        description="desc test",
+        global_params="[]",
+        timeout=0,
+        execution_type="PARALLEL",
+    )
 
     try:
-        response = requests.put(url, headers=headers, params=params)
-        response.raise_for_status()
-        json_data = response.json()
-    except Exception as e:
-        print(f'Request failed, error: {e}')
+        # 初始化同步引擎
+        sync = DefinitionSync(project_code)
+
+        # 仅在有变更时更新流程定义
+        plan, data = sync.sync(desired, process_definition_code)
+        print(plan.format(verbose=True))
+        if plan.action != SyncPlan.NOOP:
+            print(data)
+
+    except APIException as e:
+        print(f"Failed to update process definition: {e}")
         sys.exit(1)
-    
-    success = json_data.get('success')
-    failed = json_data.get('failed')
-    if (not success) or failed:
-        code = json_data.get('code')
-        msg = json_data.get('msg')
-        print(f'Update failed, code: {code}, msg: {msg}')
+    except Exception as e:
+        print(f"Unexpected error: {e}")
         sys.exit(1)
-    
-    data = json_data.get('data')
-    print(data)
-    
\ No newline at end of file
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.api.process_definition_api import ProcessDefinitionAPI
+from common.exceptions import APIException
+from common.utils.dag_util import ProcessDAG
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: {} <project-code> <process-definition-code> [default-task-duration-minutes]".format(sys.argv[0]))
+        sys.exit(1)
+
+    project_code = sys.argv[1]
+    process_definition_code = sys.argv[2]
+    default_duration = int(sys.argv[3]) if len(sys.argv) >= 4 else 0
+
+    try:
+        # 初始化API客户端
+        api = ProcessDefinitionAPI()
+
+        # 查询流程定义并在本地构建DAG
+        data = api.get_process_definition(project_code, process_definition_code)
+        dag = ProcessDAG.from_definition(data.get('taskDefinitionList') or [], data.get('processTaskRelationList') or [])
+
+        problems = dag.validate(raise_error=False)
+        if problems:
+            print("Invalid DAG:")
+            for problem in problems:
+                print(f"  {problem}")
+            sys.exit(1)
+
+        levels = dag.levels()
+        critical_path = dag.critical_path(default_duration)
+        print(f"Tasks: {len(dag)}, roots: {len(dag.roots())}, depth: {max(levels) + 1 if levels else 0}")
+        print(f"Critical path: {critical_path.length} minutes")
+        for code in critical_path.task_codes:
+            task = dag.task(code)
+            print(f"  {task.code} {task.name} (delay {task.delay_time}, timeout {task.timeout})")
+
+    except APIException as e:
+        print(f"Failed to validate process definition: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.analytics.critical_path import aggregate_criticality, fetch_and_analyze
+from common.api.process_instance_api import ProcessInstanceAPI
+from common.exceptions import APIException
+
+def main():
+    parser = argparse.ArgumentParser(description="Critical path and slack of finished workflow runs from real task timings")
+    parser.add_argument("project_code", help="project code")
+    parser.add_argument("process_instance_ids", nargs="*", help="process instance ids")
+    parser.add_argument("--definition", help="analyze the last successful runs of this process definition code")
+    parser.add_argument("--last", type=int, default=20, help="number of runs, with --definition")
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum number of concurrent API calls")
+    parser.add_argument("--verbose", action="store_true", help="print the timings of every task of every run")
+    args = parser.parse_args()
+
+    try:
+        # 初始化API客户端
+        api = ProcessInstanceAPI()
+        ids = list(args.process_instance_ids)
+        if args.definition:
+            page = api.list_process_instances(args.project_code, 1, args.last,
+                                              process_definition_code=args.definition, state_type='SUCCESS')
+            ids.extend(str(instance['id']) for instance in (page or {}).get('totalList') or [])
+        if not ids:
+            print("No process instance to analyze")
+            sys.exit(1)
+
+        # 并发拉取并分析
+        runs = []
+        for outcome in fetch_and_analyze(args.project_code, ids, api, args.concurrency):
+            if not outcome.ok:
+                print(f"Process instance {outcome.item} failed: {outcome.error}")
+                continue
+            run = outcome.result
+            runs.append(run)
+            path = ' -> '.join(f"{t.name} ({t.wait:.0f}s + {t.duration:.0f}s)" for t in run.path_tasks())
+            print(f"{run.process_instance_id} {run.name}: {run.makespan:.0f}s, critical path: {path}")
+            if args.verbose:
+                for t in sorted(run.tasks.values(), key=lambda t: t.start):
+                    mark = '*' if t.critical else ' '
+                    print(f"  {mark} {t.name:<30} start {t.start:>7.0f}s wait {t.wait:>6.0f}s "
+                          f"duration {t.duration:>7.0f}s slack {t.slack:>7.0f}s")
+
+        if not runs:
+            sys.exit(1)
+
+        # 汇总关键路径占比
+        print(f"\nTasks bounding the wall-clock time over {len(runs)} runs:")
+        print(f"  {'task':<30} {'type':<14} {'critical':>8} {'duration':>9} {'wait':>7} {'slack':>8} {'share':>6}")
+        for r in aggregate_criticality(runs):
+            print(f"  {r.name:<30} {r.task_type:<14} {r.critical_runs:>4}/{r.runs:<3} {r.mean_duration:>9.0f} "
+                  f"{r.mean_wait:>7.0f} {r.mean_slack:>8.0f} {r.critical_share:>6.1%}")
+
+    except APIException as e:
+        print(f"Error analyzing process instances: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
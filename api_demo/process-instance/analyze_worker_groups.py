@@ -0,0 +1,67 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import datetime
+import json
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.analytics.history_store import DATETIME_FORMAT, HistoryStore
+from common.analytics.worker_groups import analyze_worker_groups, load_task_runs
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker group utilization, queueing and quota recommendations from the local history")
+    parser.add_argument("--db", default="process_instance_history.db", help="SQLite database file")
+    parser.add_argument("--days", type=int, default=30, help="task runs of the last days, 0 for all")
+    parser.add_argument("--min-runs", type=int, default=5, help="smallest number of runs for a task to be profiled")
+    parser.add_argument("--queue-threshold", type=float, default=60, help="queue wait p95 in seconds of a congested group")
+    parser.add_argument("--contention-threshold", type=float, default=0.5, help="duration/concurrency correlation of a contention sensitive task")
+    parser.add_argument("--failure-threshold", type=float, default=0.2, help="failure rate of a memory capped task to flag")
+    parser.add_argument("--top", type=int, default=20, help="number of task rows")
+    parser.add_argument("--json", help="also write the full report to this JSON file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"History database {args.db} not found, run sync_process_instance_history.py first")
+        sys.exit(1)
+
+    since = (datetime.datetime.now() - datetime.timedelta(days=args.days)).strftime(DATETIME_FORMAT) if args.days > 0 else None
+
+    # 从本地历史库加载任务实例并分析
+    with HistoryStore(args.db) as store:
+        runs = load_task_runs(store, since)
+    report = analyze_worker_groups(runs, args.min_runs, args.queue_threshold,
+                                   args.contention_threshold, args.failure_threshold)
+
+    print(f"{len(runs)} task runs loaded")
+    print(f"  {'worker group':<20} {'tasks':>7} {'peak':>5} {'mean':>6} {'p95':>5} {'cpu%':>7} {'memMB':>7} "
+          f"{'unlim':>6} {'q p50':>7} {'q p95':>7} {'q p99':>7}")
+    for g in report.groups:
+        print(f"  {g.worker_group:<20} {g.tasks:>7} {g.peak:>5} {g.mean:>6.1f} {g.p95:>5.0f} {g.peak_cpu:>7.0f} "
+              f"{g.peak_memory:>7.0f} {g.unlimited_share:>6.0%} {g.queue_p50:>7.0f} {g.queue_p95:>7.0f} {g.queue_p99:>7.0f}")
+
+    print("\nTasks most sensitive to contention:")
+    print(f"  {'worker group':<20} {'priority':<8} {'runs':>5} {'duration':>9} {'q p95':>7} {'fail':>5} {'r':>6}  name")
+    for t in report.tasks[:args.top]:
+        print(f"  {t.worker_group:<20} {t.priority:<8} {t.runs:>5} {t.mean_duration:>9.0f} {t.queue_p95:>7.0f} "
+              f"{t.failure_rate:>5.0%} {t.contention:>6.2f}  {t.name}")
+
+    print(f"\n{len(report.recommendations)} recommendations:")
+    for r in report.recommendations:
+        target = f"{r.worker_group}/{r.name}" if r.name else r.worker_group
+        print(f"  [{r.kind}] {target}: {r.message}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'groups': [g._asdict() for g in report.groups],
+                       'tasks': [t._asdict() for t in report.tasks],
+                       'recommendations': [r._asdict() for r in report.recommendations]},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\nReport written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import datetime
+import json
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.analytics.duration_regression import METHODS, detect_regressions, load_run_history
+from common.analytics.history_store import DATETIME_FORMAT, HistoryStore
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag runs slower than their rolling baseline, from the local history")
+    parser.add_argument("--db", default="process_instance_history.db", help="SQLite database file")
+    parser.add_argument("--days", type=int, default=7, help="flag runs of the last days")
+    parser.add_argument("--history-days", type=int, default=90, help="runs loaded for the baselines, 0 for all")
+    parser.add_argument("--window", type=int, default=30, help="number of previous runs in the baseline")
+    parser.add_argument("--min-history", type=int, default=10, help="smallest baseline for a run to be judged")
+    parser.add_argument("--method", choices=METHODS, default="sigma", help="threshold method")
+    parser.add_argument("--sigma", type=float, default=3.0, help="standard deviations above the mean, for sigma")
+    parser.add_argument("--percentile", type=float, default=95, help="percentile of previous runs, for percentile")
+    parser.add_argument("--min-increase", type=float, default=0.1, help="smallest relative increase over the mean")
+    parser.add_argument("--top", type=int, default=20, help="number of rows per report")
+    parser.add_argument("--json", help="also write the full report to this JSON file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"History database {args.db} not found, run sync_process_instance_history.py first")
+        sys.exit(1)
+
+    now = datetime.datetime.now()
+    since = (now - datetime.timedelta(days=args.days)).strftime(DATETIME_FORMAT)
+    history_since = (now - datetime.timedelta(days=args.history_days)).strftime(DATETIME_FORMAT) if args.history_days > 0 else None
+
+    try:
+        with HistoryStore(args.db) as store:
+            history = load_run_history(store, history_since)
+        report = detect_regressions(history, args.window, args.min_history, args.method, args.sigma,
+                                    args.percentile, args.min_increase, since=since)
+    except ValueError as e:
+        print(f"Invalid arguments: {e}")
+        sys.exit(1)
+
+    print(f"{len(history)} runs loaded, {len(report.flags)} regressions in the last {args.days} days")
+    print(f"  {'start time':<19} {'instance':>9} {'duration':>9} {'baseline':>9} {'threshold':>9} {'timeout':>7}  name")
+    for f in report.flags[:args.top]:
+        timeout = f"{f.timeout_ratio:.0%}" if f.timeout_ratio else '-'
+        print(f"  {f.start_time:<19} {f.instance_id:>9} {f.duration:>9.0f} {f.baseline:>9.0f} {f.threshold:>9.0f} "
+              f"{timeout:>7}  {f.name}")
+
+    print("\nDefinitions closest to their timeout, then drifting the most:")
+    print(f"  {'code':<16} {'runs':>6} {'baseline':>9} {'latest':>9} {'drift':>7} {'timeout':>7} {'flags':>5}  name")
+    for t in report.trends[:args.top]:
+        timeout = f"{t.timeout_ratio:.0%}" if t.timeout_ratio else '-'
+        print(f"  {t.process_definition_code:<16} {t.runs:>6} {t.baseline:>9.0f} {t.latest:>9.0f} {t.drift:>7.2f} "
+              f"{timeout:>7} {t.flags:>5}  {t.name}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'flags': [flag._asdict() for flag in report.flags],
+                       'trends': [trend._asdict() for trend in report.trends]}, f, ensure_ascii=False, indent=2)
+        print(f"\nReport written to {args.json}")
+
+if __name__ == "__main__":
+    main()
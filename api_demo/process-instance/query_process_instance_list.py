@@ -5,6 +5,11 @@ import os
 import sys
 import requests
 
+PROCESS_INSTANCE_KEYS = frozenset(['id', 'processDefinitionCode', 'projectCode', 'state', 'recovery',
+                                   'startTime', 'endTime', 'runTimes', 'name', 'commandType', 'scheduleTime',
+                                   'duration', 'dryRun'])
+TASK_KEYS = frozenset(['id', 'name', 'taskType', 'taskCode'])
+
 
 if __name__ == '__main__':
     server_url = os.getenv('DOLPHINSCHEDULER_SERVER_URL')
@@ -51,9 +56,7 @@ if __name__ == '__main__':
     
     total_list = data.get('totalList')
     for process_instance in total_list:
-        process_instance = {k: v for k, v in process_instance.items() \
-            if k in set(['id', 'processDefinitionCode', 'projectCode', 'state', 'recovery',
-                         'startTime', 'endTime', 'runTimes', 'name', 'commandType', 'scheduleTime', 'duration', 'dryRun'])}
+        process_instance = {k: v for k, v in process_instance.items() if k in PROCESS_INSTANCE_KEYS}
         
         # XXX: query task list by process instance id
         process_instance_id = process_instance.get('id')
@@ -76,8 +79,7 @@ if __name__ == '__main__':
             sys.exit(1)
             
         task_list = json_data.get('data').get('taskList')
-        task_list = [ {k: v for k, v in task.items() if k in set(['id', 'name', 'taskType', 'taskCode'])} \
-            for task in task_list ]
+        task_list = [ {k: v for k, v in task.items() if k in TASK_KEYS} for task in task_list ]
         
         process_instance['taskList'] = task_list
         print(process_instance)
@@ -0,0 +1,44 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import datetime
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.analytics.history_store import DATETIME_FORMAT, HistoryStore
+
+def main():
+    parser = argparse.ArgumentParser(description="Duration percentiles, failure rates and queue times from the local history")
+    parser.add_argument("--db", default="process_instance_history.db", help="SQLite database file")
+    parser.add_argument("--days", type=int, default=30, help="only runs of the last days, 0 for all")
+    parser.add_argument("--top", type=int, default=20, help="number of rows per report")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"History database {args.db} not found, run sync_process_instance_history.py first")
+        sys.exit(1)
+    since = (datetime.datetime.now() - datetime.timedelta(days=args.days)).strftime(DATETIME_FORMAT) if args.days > 0 else None
+
+    with HistoryStore(args.db) as store:
+        print("Duration percentiles (seconds) of successful runs, slowest p90 first:")
+        print(f"  {'code':<16} {'runs':>6} {'p50':>9} {'p90':>9} {'p99':>9}  name")
+        durations = sorted(store.duration_percentiles(since), key=lambda r: -r['p90'])
+        for r in durations[:args.top]:
+            print(f"  {r['code']:<16} {r['runs']:>6} {r['p50']:>9.0f} {r['p90']:>9.0f} {r['p99']:>9.0f}  {r['name']}")
+
+        print("\nFailure rates:")
+        print(f"  {'code':<16} {'runs':>6} {'failed':>6} {'rate':>7}  name")
+        for r in store.failure_rates(since)[:args.top]:
+            print(f"  {r['code']:<16} {r['runs']:>6} {r['failures']:>6} {r['failure_rate']:>7.1%}  {r['name']}")
+
+        print("\nTask queue time (seconds, submit to start) per worker group:")
+        print(f"  {'worker group':<20} {'tasks':>7} {'p50':>7} {'p90':>7} {'p99':>7}")
+        for r in store.queue_times(since):
+            print(f"  {r['worker_group']:<20} {r['tasks']:>7} {r['p50']:>7.1f} {r['p90']:>7.1f} {r['p99']:>7.1f}")
+
+if __name__ == "__main__":
+    main()
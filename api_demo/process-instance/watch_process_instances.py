@@ -0,0 +1,67 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import datetime
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.exceptions import APIException
+from common.services.run_monitor import ACTIVE_STATES, RunMonitor
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch active process instances across projects and print their state transitions")
+    parser.add_argument("--project", action="append", default=[], help="project code, repeatable; all projects by default")
+    parser.add_argument("--state", action="append", choices=ACTIVE_STATES, help="listed state, repeatable; RUNNING_EXECUTION by default")
+    parser.add_argument("--page-size", type=int, default=100, help="page size of the list calls")
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum number of concurrent API calls")
+    parser.add_argument("--max-detail-calls", type=int, default=20, help="maximum number of detail calls per cycle")
+    parser.add_argument("--idle-every", type=int, default=5, help="cycles between two polls of a project without active runs")
+    parser.add_argument("--min-interval", type=float, default=5, help="seconds between cycles while runs are changing")
+    parser.add_argument("--max-interval", type=float, default=60, help="longest interval between quiet cycles")
+    parser.add_argument("--cycles", type=int, help="stop after this number of cycles")
+    parser.add_argument("--initial", action="store_true", help="also print the runs found by the first cycle")
+    parser.add_argument("--verbose", action="store_true", help="print the stats of every cycle")
+    args = parser.parse_args()
+
+    def on_transition(t):
+        previous = t.previous or 'NEW'
+        duration = f" ({t.duration})" if t.duration and t.state not in ACTIVE_STATES else ''
+        print(f"{t.at}  {t.project_code}  {t.process_instance_id:>9}  {previous} -> {t.state}{duration}  {t.name}",
+              flush=True)
+
+    def on_cycle(stats):
+        if args.verbose or monitor.cycle == 1:
+            print(f"# {datetime.datetime.now():%H:%M:%S} cycle {monitor.cycle}: {stats.tracked} active runs in "
+                  f"{stats.projects} projects, {stats.transitions} transitions, {stats.api_calls} API calls, "
+                  f"{stats.pending} pending, next in {stats.interval:.0f}s", flush=True)
+
+    try:
+        # 初始化监控器
+        monitor = RunMonitor(project_codes=args.project,
+                             states=args.state or ['RUNNING_EXECUTION'],
+                             page_size=args.page_size,
+                             max_workers=args.concurrency,
+                             max_detail_calls=args.max_detail_calls,
+                             idle_every=args.idle_every,
+                             min_interval=args.min_interval,
+                             max_interval=args.max_interval)
+        monitor.watch(on_transition, on_cycle, report_initial=args.initial, cycles=args.cycles)
+
+    except KeyboardInterrupt:
+        pass
+    except ValueError as e:
+        print(f"Invalid arguments: {e}")
+        sys.exit(1)
+    except APIException as e:
+        print(f"Error watching process instances: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
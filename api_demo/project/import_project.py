@@ -0,0 +1,65 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.exceptions import APIException
+from common.services.project_snapshot import ProjectImporter, load_snapshot
+
+def parse_datasource_map(value: str) -> dict:
+    mapping = {}
+    for pair in filter(None, (value or '').split(',')):
+        source, _, target = pair.partition('=')
+        if not target:
+            raise ValueError(f"Invalid datasource mapping '{pair}', expected <source-id>=<target-id>")
+        mapping[int(source)] = int(target)
+    return mapping
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a project snapshot, remapping task codes and datasources")
+    parser.add_argument("project_code", help="target project code")
+    parser.add_argument("archive", help="snapshot file written by export_project.py")
+    parser.add_argument("--datasource-map", help="comma separated <source-id>=<target-id>, by name otherwise")
+    parser.add_argument("--dry-run", action="store_true", help="print the plan without importing")
+    parser.add_argument("--offline", action="store_true", help="leave every definition offline, their schedules are not created")
+    parser.add_argument("--no-schedules", action="store_true", help="do not recreate the schedules")
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum number of concurrent API calls")
+    args = parser.parse_args()
+
+    try:
+        snapshot = load_snapshot(args.archive)
+        importer = ProjectImporter(args.project_code, max_workers=args.concurrency)
+
+        # 计划：跳过已存在的流程定义，按名字匹配数据源，按引用关系分批
+        plan = importer.plan(snapshot, parse_datasource_map(args.datasource_map))
+        print(plan.format())
+        if plan.problems:
+            sys.exit(1)
+        if args.dry_run:
+            print(f"Dry run, {plan.task_count} tasks would be created")
+            return
+
+        # 批量生成任务代码，分批并行创建
+        result = importer.apply(plan, release=not args.offline, with_schedules=not args.no_schedules)
+        print(result.format())
+        if not result.ok:
+            sys.exit(1)
+
+    except ValueError as e:
+        print(f"Invalid input: {e}")
+        sys.exit(1)
+    except APIException as e:
+        print(f"API Error: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
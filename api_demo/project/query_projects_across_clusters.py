@@ -0,0 +1,56 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.api.project_api import ProjectAPI
+from common.exceptions import APIException
+from common.services.cluster_registry import ClusterRegistry
+
+def format_project(project: dict) -> str:
+    return "{:<15} {:<10} {:<20} {:<30}".format(project['cluster'], project['id'], project['code'], project['name'])
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the projects of several clusters concurrently")
+    parser.add_argument("--clusters-file", help="clusters YAML file, DOLPHINSCHEDULER_CLUSTERS_FILE by default")
+    parser.add_argument("--clusters", help="comma separated cluster names, all by default")
+    parser.add_argument("--tenant", help="tenant whose token is used, the default tenant by default")
+    parser.add_argument("--all", action="store_true", help="all projects instead of the authorized and user created ones")
+    args = parser.parse_args()
+
+    try:
+        with ClusterRegistry.from_file(args.clusters_file) as registry:
+            clusters = args.clusters.split(',') if args.clusters else None
+            # 并发查询各集群的项目并合并结果
+            projects, errors = registry.fan_out_merged(
+                ProjectAPI, lambda api: api.list_all_projects() if args.all else api.list_user_projects(),
+                clusters, args.tenant)
+
+        print("\nProjects List:")
+        print("{:<15} {:<10} {:<20} {:<30}".format("Cluster", "ID", "Code", "Project Name"))
+        print("-" * 75)
+        for project in sorted(projects, key=lambda p: (p['cluster'], p['name'])):
+            print(format_project(project))
+        for cluster, error in errors.items():
+            print(f"Cluster {cluster} failed: {error}")
+        if errors:
+            sys.exit(1)
+
+    except ValueError as e:
+        print(f"Invalid configuration: {e}")
+        sys.exit(1)
+    except APIException as e:
+        print(f"API Error: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import sys
+import os
+import threading
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.exceptions import APIException
+from common.services.schedule_bulk import OPERATIONS, BulkScheduleManager, ScheduleOutcome, ScheduleSelector
+
+def main():
+    parser = argparse.ArgumentParser(description="Online, offline, update or delete many schedules at once")
+    parser.add_argument("operation", choices=OPERATIONS, help="operation applied to every selected schedule")
+    parser.add_argument("--project", action="append", default=[], help="project code, repeatable; all projects by default")
+    parser.add_argument("--name", help="glob pattern of process definition names, e.g. 'dq_*'")
+    parser.add_argument("--worker-group", help="select schedules of this worker group")
+    parser.add_argument("--release-state", choices=("ONLINE", "OFFLINE"), help="select schedules in this state")
+    parser.add_argument("--crontab", help="update: new crontab, e.g. '0 0 6 * * ? *'")
+    parser.add_argument("--timezone", help="update: new timezone, e.g. 'Asia/Shanghai'")
+    parser.add_argument("--start-time", help="update: new start time, %%Y-%%m-%%d %%H:%%M:%%S")
+    parser.add_argument("--end-time", help="update: new end time, %%Y-%%m-%%d %%H:%%M:%%S")
+    parser.add_argument("--tenant", help="update: new tenant code")
+    parser.add_argument("--new-worker-group", help="update: new worker group")
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum number of schedules handled concurrently")
+    parser.add_argument("--rate", type=float, default=10, help="maximum number of API calls per second, 0 for unlimited")
+    parser.add_argument("--checkpoint", help="progress file; rerun with the same file to resume after a failure")
+    parser.add_argument("--dry-run", action="store_true", help="only print what would be done")
+    args = parser.parse_args()
+
+    changes = {
+        'crontab': args.crontab,
+        'timezone_id': args.timezone,
+        'start_time': args.start_time,
+        'end_time': args.end_time,
+        'tenant_code': args.tenant,
+        'worker_group': args.new_worker_group,
+    }
+    changes = {k: v for k, v in changes.items() if v is not None}
+
+    try:
+        # 初始化API客户端
+        manager = BulkScheduleManager(max_workers=args.concurrency, rate=args.rate or None)
+
+        # 选择定时
+        selector = ScheduleSelector(args.project, args.name, args.worker_group, args.release_state)
+        targets = manager.select(selector)
+        print(f"Selected {len(targets)} schedules")
+
+        # NOTE: outcomes are reported from the worker threads
+        print_lock = threading.Lock()
+
+        def report(outcome: ScheduleOutcome):
+            target = outcome.target
+            with print_lock:
+                print(f"{outcome.status:<8} {target.key} {target.name}: {outcome.detail}")
+
+        outcomes = manager.run(args.operation, targets, changes=changes,
+                               checkpoint_path=args.checkpoint, dry_run=args.dry_run, on_outcome=report)
+
+        counts = {}
+        for outcome in outcomes:
+            counts[outcome.status] = counts.get(outcome.status, 0) + 1
+        print("Summary: " + ", ".join(f"{status} {count}" for status, count in sorted(counts.items())))
+        if counts.get(ScheduleOutcome.FAILED):
+            if args.checkpoint:
+                print(f"Rerun with --checkpoint {args.checkpoint} to retry the failed schedules")
+            sys.exit(1)
+
+    except ValueError as e:
+        print(f"Invalid arguments: {e}")
+        sys.exit(1)
+    except APIException as e:
+        print(f"Error running bulk schedule operation: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
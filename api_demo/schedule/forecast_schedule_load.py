@@ -0,0 +1,81 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import datetime
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.analytics.schedule_load import (forecast_load, historical_durations, schedule_fire_times,
+                                            suggest_staggers)
+from common.exceptions import APIException
+from common.services.schedule_bulk import BulkScheduleManager, ScheduleSelector
+
+def main():
+    parser = argparse.ArgumentParser(description="Forecast per-minute workflow starts of online schedules")
+    parser.add_argument("--project", action="append", default=[], help="project code, repeatable; all projects by default")
+    parser.add_argument("--name", help="glob pattern of process definition names")
+    parser.add_argument("--worker-group", help="only schedules of this worker group")
+    parser.add_argument("--hours", type=int, default=24, help="forecast horizon in hours from now")
+    parser.add_argument("--history-days", type=int, default=7,
+                        help="days of successful runs used for durations, 0 to skip")
+    parser.add_argument("--default-duration", type=int, default=60, help="duration in seconds of workflows without history")
+    parser.add_argument("--top", type=int, default=10, help="number of peak minutes to print")
+    parser.add_argument("--max-starts", type=int, default=5, help="acceptable number of starts per minute")
+    parser.add_argument("--window", type=int, default=30, help="largest suggested delay in minutes")
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum number of concurrent API calls")
+    args = parser.parse_args()
+
+    try:
+        # 查询上线的定时
+        manager = BulkScheduleManager(max_workers=args.concurrency)
+        selector = ScheduleSelector(args.project, args.name, args.worker_group, release_state='ONLINE')
+        targets = manager.select(selector)
+        schedules = [target.schedule for target in targets]
+        print(f"Selected {len(schedules)} online schedules")
+
+        now = datetime.datetime.now()
+        start = now.replace(second=0, microsecond=0).astimezone()
+        end = start + datetime.timedelta(hours=args.hours)
+
+        # 历史运行时长
+        durations = {}
+        if args.history_days > 0 and targets:
+            project_codes = sorted({target.project_code for target in targets})
+            durations = historical_durations(project_codes, now - datetime.timedelta(days=args.history_days),
+                                             max_workers=args.concurrency)
+            print(f"Durations from history: {len(durations)} process definitions")
+
+        # 负载预测
+        fires = schedule_fire_times(schedules, start, end)
+        forecast = forecast_load(schedules, start, end, durations, args.default_duration, fires=fires)
+        print(f"Forecast {start:%Y-%m-%d %H:%M} - {end:%Y-%m-%d %H:%M}: "
+              f"{int(forecast.starts.sum())} starts, peak {int(forecast.starts.max(initial=0))} starts/min, "
+              f"peak {int(forecast.running.max(initial=0))} running")
+        print(f"{'minute':<17} {'starts':>6} {'running':>7}")
+        for minute, starts, running in forecast.peaks(args.top):
+            print(f"{minute:%Y-%m-%d %H:%M} {starts:>6} {running:>7}")
+
+        # 错峰建议
+        suggestions = suggest_staggers(schedules, start, end, args.max_starts, args.window, fires=fires)
+        if suggestions:
+            print(f"\nStagger suggestions ({len(suggestions)}):")
+            for s in suggestions:
+                print(f"  {s.schedule.get('id')} {s.schedule.get('processDefinitionName')}: "
+                      f"'{s.crontab}' -> '{s.new_crontab}' (+{s.delay_minutes}m, peak {s.peak_before} -> {s.peak_after})")
+
+    except ValueError as e:
+        print(f"Invalid schedule: {e}")
+        sys.exit(1)
+    except APIException as e:
+        print(f"Error forecasting schedule load: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import datetime
+import sys
+import os
+import threading
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.exceptions import APIException
+from common.services.schedule_bulk import BulkScheduleManager, ScheduleOutcome, ScheduleSelector
+from common.services.schedule_stagger import (load_rollback, plan_rollback, plan_staggers, restore_originals,
+                                              workflow_dependencies, write_rollback)
+
+# Checkpoint operations, followed by the rollback file they belong to
+STAGGER_OPERATION = 'stagger'
+ROLLBACK_OPERATION = 'stagger-rollback'
+
+def operation_id(operation: str, rollback_path: str) -> str:
+    """Checkpoint identifier of a run, keyed by schedule only as resumed runs plan again"""
+    return f"{operation}:{os.path.abspath(rollback_path)}"
+
+# Outcomes are printed from the worker threads
+_print_lock = threading.Lock()
+
+def print_outcome(outcome: ScheduleOutcome):
+    target = outcome.target
+    with _print_lock:
+        print(f"{outcome.status:<8} {target.key} {target.name}: {outcome.detail}")
+
+def summarize(outcomes) -> int:
+    counts = {}
+    for outcome in outcomes:
+        counts[outcome.status] = counts.get(outcome.status, 0) + 1
+    print("Summary: " + ", ".join(f"{status} {count}" for status, count in sorted(counts.items())))
+    return counts.get(ScheduleOutcome.FAILED, 0)
+
+def rollback(manager: BulkScheduleManager, args) -> int:
+    records = load_rollback(args.rollback)
+    selector = ScheduleSelector(sorted({str(r['project_code']) for r in records}))
+    current = manager.select(selector)
+    changes_by_key, conflicts = plan_rollback(current, records)
+    for target, reason in conflicts:
+        print(f"{'SKIPPED':<8} {target.key} {target.name}: {reason}")
+
+    targets = [t for t in current if t.key in changes_by_key]
+    print(f"Restoring {len(targets)} of {len(records)} schedules from {args.rollback}")
+    outcomes = manager.run('update', targets, changes_by_key=changes_by_key, checkpoint_path=args.checkpoint,
+                           dry_run=args.dry_run, on_outcome=print_outcome,
+                           operation_id=operation_id(ROLLBACK_OPERATION, args.rollback))
+    return summarize(outcomes)
+
+def stagger(manager: BulkScheduleManager, args) -> int:
+    selector = ScheduleSelector(args.project, args.name, args.worker_group, release_state='ONLINE')
+    current = manager.select(selector)
+    print(f"Selected {len(current)} online schedules")
+
+    # 续跑时按回滚文件中的原始crontab重新规划，已错开的调度保持不变
+    targets = current
+    if args.rollback_file and os.path.exists(args.rollback_file):
+        targets = restore_originals(current, load_rollback(args.rollback_file))
+
+    dependencies = {}
+    if not args.ignore_dependencies and targets:
+        dependencies = workflow_dependencies(sorted({t.project_code for t in targets}), max_workers=args.concurrency)
+
+    start = datetime.datetime.now().astimezone()
+    end = start + datetime.timedelta(hours=args.hours)
+    changes = plan_staggers(targets, start, end, args.window * 60, dependencies, args.min_group)
+    crontabs = {t.key: t.schedule.get('crontab') for t in current}
+    done = [c for c in changes if crontabs[c.target.key] == c.new_crontab]
+    if done:
+        print(f"Skipping {len(done)} schedules staggered by a previous run")
+        changes = [c for c in changes if crontabs[c.target.key] != c.new_crontab]
+    if not changes:
+        print("No colliding schedules to stagger")
+        return 0
+
+    for change in changes:
+        print(f"{change.target.key} {change.target.name}: '{change.crontab}' -> '{change.new_crontab}' "
+              f"(+{change.delay_seconds}s)")
+
+    if not args.dry_run:
+        # 先保存原始crontab用于回滚，已存在的回滚文件保留首次记录的crontab
+        rollback_path = args.rollback_file or f"stagger-rollback-{start:%Y%m%d%H%M%S}.json"
+        write_rollback(rollback_path, changes)
+        print(f"Rollback file: {rollback_path}")
+
+    changes_by_key = {c.target.key: {'crontab': c.new_crontab} for c in changes}
+    outcomes = manager.run('update', [c.target for c in changes], changes_by_key=changes_by_key,
+                           checkpoint_path=args.checkpoint, dry_run=args.dry_run, on_outcome=print_outcome,
+                           operation_id=operation_id(STAGGER_OPERATION, args.rollback_file) if args.checkpoint else None)
+    return summarize(outcomes)
+
+def main():
+    parser = argparse.ArgumentParser(description="Spread online schedules colliding on the same fire time")
+    parser.add_argument("--project", action="append", default=[], help="project code, repeatable; all projects by default")
+    parser.add_argument("--name", help="glob pattern of process definition names")
+    parser.add_argument("--worker-group", help="only schedules of this worker group")
+    parser.add_argument("--window", type=int, default=10, help="spread window in minutes")
+    parser.add_argument("--hours", type=int, default=24, help="horizon in hours used to detect collisions")
+    parser.add_argument("--min-group", type=int, default=2, help="smallest number of schedules considered a collision")
+    parser.add_argument("--ignore-dependencies", action="store_true", help="do not order by DEPENDENT tasks")
+    parser.add_argument("--rollback-file", help="where to save the original crontabs; an existing file is merged "
+                                                "and its crontabs are planned from, which resumes a failed run")
+    parser.add_argument("--rollback", help="restore the original crontabs saved in this rollback file")
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum number of schedules handled concurrently")
+    parser.add_argument("--rate", type=float, default=10, help="maximum number of API calls per second, 0 for unlimited")
+    parser.add_argument("--checkpoint", help="progress file, requires --rollback-file when staggering; "
+                                             "rerun with the same files to resume after a failure")
+    parser.add_argument("--dry-run", action="store_true", help="only print the changes")
+    args = parser.parse_args()
+    if args.checkpoint and not args.rollback and not args.rollback_file:
+        parser.error("--checkpoint requires --rollback-file, the original crontabs a resumed run plans from")
+
+    try:
+        # 初始化API客户端
+        manager = BulkScheduleManager(max_workers=args.concurrency, rate=args.rate or None)
+        failed = rollback(manager, args) if args.rollback else stagger(manager, args)
+        if failed:
+            sys.exit(1)
+
+    except ValueError as e:
+        print(f"Invalid schedule: {e}")
+        sys.exit(1)
+    except APIException as e:
+        print(f"Error staggering schedules: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
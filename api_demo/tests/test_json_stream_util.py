@@ -0,0 +1,25 @@
+#!/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.utils.json_stream_util import iter_json_items
+
+BODY = '{"code":0,"msg":"成功","data":[1.5,2e3,-0.25E-2,10,"a\\"b",true,null,{"x":[1,2]},[]],"total":12}'.encode()
+
+def test_split_at_every_offset():
+    expected = json.loads(BODY)
+    for offset in range(len(BODY) + 1):
+        envelope = {}
+        items = list(iter_json_items([BODY[:offset], BODY[offset:]], envelope=envelope))
+        assert items == expected['data'], offset
+        assert envelope == {k: v for k, v in expected.items() if k != 'data'}, offset
+
+def test_byte_chunks():
+    expected = json.loads(BODY)
+    assert list(iter_json_items([BODY[i:i + 1] for i in range(len(BODY))])) == expected['data']